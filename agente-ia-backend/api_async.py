@@ -0,0 +1,157 @@
+# api_async.py
+"""
+Modo de servicio asíncrono de /ask-agent (ASGI, sin Flask).
+Un solo proceso y un solo event loop: cada petición espera la BD sin ocupar un hilo.
+
+Uso:
+    pip install "sqlalchemy[asyncio]" asyncpg aiosqlite uvicorn
+    uvicorn api_async:app --port 5000
+"""
+import json
+from urllib.parse import parse_qs
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from config import DB_URL, ASYNC_DB_URL, SESSION_STORE_BACKEND, SESSION_STORE_SIZE, SESSION_TTL, SESSION_STORE_PATH
+from db_pool import to_async_url, build_async_engine_options, instrument_pool, InstrumentedAsyncQueuePool, POOL_METRICS
+from session_store import create_session_store, load_conversation, save_conversation
+from db_agent import process_query_async, get_plan_cache_stats
+from statement_cache import statement_cache_stats, statement_cache_gauges
+from metrics import AGENT_METRICS, PROMETHEUS_CONTENT_TYPE, track_request, finish_request, serialize_response, pool_gauges, set_request_labels
+from batch import validate_batch, answer_batch_async, batch_summary
+
+# --- 1. CONFIGURACIÓN DEL ENGINE ASÍNCRONO ---
+ASYNC_URL = ASYNC_DB_URL or to_async_url(DB_URL)
+async_engine = create_async_engine(ASYNC_URL, **build_async_engine_options(ASYNC_URL))
+if isinstance(async_engine.pool, InstrumentedAsyncQueuePool):
+    instrument_pool(async_engine.pool)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+SESSION_STORE = create_session_store(SESSION_STORE_BACKEND, maxsize=SESSION_STORE_SIZE, ttl=SESSION_TTL, path=SESSION_STORE_PATH)
+
+CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+    (b'access-control-allow-headers', b'content-type'),
+    (b'access-control-allow-methods', b'GET, POST, OPTIONS'),
+]
+
+# --- 2. UTILIDADES HTTP ---
+async def read_json_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    return json.loads(body or b'{}')
+
+async def send_body(send, body, content_type=b'application/json', status=200):
+    headers = [(b'content-type', content_type)] + CORS_HEADERS
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body.encode('utf-8')})
+
+async def send_json(send, payload, status=200):
+    await send_body(send, json.dumps(payload, default=str), status=status)
+
+async def send_ndjson(send, agent_response):
+    """Mismo formato que ndjson_response de api.py: cabecera, una línea por fila y cierre."""
+    rows = agent_response.pop('stream')
+    headers = [(b'content-type', b'application/x-ndjson')] + CORS_HEADERS
+    await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+
+    async def send_line(payload):
+        line = (json.dumps(payload, default=str) + "\n").encode('utf-8')
+        await send({'type': 'http.response.body', 'body': line, 'more_body': True})
+
+    await send_line(agent_response)
+    count = 0
+    try:
+        async for row in rows:
+            count += 1
+            await send_line(row)
+        await send_line({"type": "stream_end", "rows": count})
+    except Exception as e:
+        await send_line({"type": "error", "agent_text": f"❌ Error al consultar la BD: {e}"})
+    await send({'type': 'http.response.body', 'body': b''})
+
+# --- 3. ENDPOINTS ---
+async def ask_agent(scope, receive, send):
+    data = await read_json_body(receive)
+    user_query = data.get('query', '')
+    session_id, conversation_state = load_conversation(SESSION_STORE, data)
+    query_args = parse_qs(scope.get('query_string', b'').decode())
+    stream = bool(data.get('stream')) or query_args.get('stream') == ['1']
+    include_timings = bool(data.get('timings')) or query_args.get('timings') == ['1']
+
+    if not user_query:
+        return await send_json(send, {"agent_text": "Por favor, ingresa una consulta.", "type": "error"}, status=400)
+
+    # Una AsyncSession por petición; en streaming sigue abierta hasta enviar la última fila
+    with track_request() as timings:
+        async with AsyncSessionLocal() as session:
+            agent_response = await process_query_async(user_query, session, conversation_state=conversation_state, stream=stream)
+            save_conversation(SESSION_STORE, session_id, agent_response)
+            if 'stream' in agent_response:
+                finish_request(timings, agent_response.get('type'))
+                return await send_ndjson(send, agent_response)
+        body = serialize_response(agent_response, timings, include_timings)
+    await send_body(send, body)
+
+async def ask_agent_batch(scope, receive, send):
+    data = await read_json_body(receive)
+    queries = data.get('queries')
+    error = validate_batch(queries)
+    if error:
+        return await send_json(send, {"agent_text": error, "type": "error"}, status=400)
+
+    with track_request() as timings:
+        set_request_labels('BATCH', None)
+        results = await answer_batch_async(queries, AsyncSessionLocal)
+        for agent_response in results:
+            save_conversation(SESSION_STORE, None, agent_response)
+        body = serialize_response({'agent_text': batch_summary(results), 'type': 'batch_result', 'results': results}, timings)
+    await send_body(send, body)
+
+async def pool_metrics(scope, receive, send):
+    await send_json(send, POOL_METRICS.snapshot())
+
+async def prometheus_metrics(scope, receive, send):
+    gauges = {**pool_gauges(POOL_METRICS.snapshot()), **statement_cache_gauges(statement_cache_stats())}
+    body = AGENT_METRICS.render(gauges)
+    await send_body(send, body, content_type=PROMETHEUS_CONTENT_TYPE.encode())
+
+async def cache_stats(scope, receive, send):
+    await send_json(send, {'plans': get_plan_cache_stats(), **statement_cache_stats()})
+
+ROUTES = {
+    ('POST', '/ask-agent'): ask_agent,
+    ('POST', '/ask-agent/batch'): ask_agent_batch,
+    ('GET', '/pool-metrics'): pool_metrics,
+    ('GET', '/metrics'): prometheus_metrics,
+    ('GET', '/cache-stats'): cache_stats,
+}
+
+# --- 4. APLICACIÓN ASGI ---
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await async_engine.dispose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['method'] == 'OPTIONS':
+        await send({'type': 'http.response.start', 'status': 204, 'headers': CORS_HEADERS})
+        return await send({'type': 'http.response.body', 'body': b''})
+
+    handler = ROUTES.get((scope['method'], scope['path']))
+    if handler is None:
+        return await send_json(send, {"agent_text": "Ruta no encontrada.", "type": "error"}, status=404)
+    try:
+        await handler(scope, receive, send)
+    except json.JSONDecodeError:
+        await send_json(send, {"agent_text": "El cuerpo de la petición no es JSON válido.", "type": "error"}, status=400)
@@ -0,0 +1,252 @@
+# batch.py
+"""
+Varias consultas en lenguaje natural en una sola petición (/ask-agent/batch).
+- Todas se parsean primero (caché de planes de db_agent).
+- Los SELECT de una misma tabla (sin relaciones) comparten UN round trip: un UNION ALL con
+  una subconsulta paginada por predicado distinto, etiquetada con su posición.
+- Las lecturas independientes (grupos y resto de consultas) se ejecutan en paralelo con un
+  número acotado de workers, cada uno con su propia sesión.
+- Las escrituras (INSERT/UPDATE/DELETE) se ejecutan solas y en orden: las lecturas posteriores
+  ven sus cambios.
+Devuelve una respuesta por consulta, en el mismo orden; un error solo afecta a su consulta.
+"""
+import asyncio
+import copy
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select, literal, union_all, bindparam
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.elements import BindParameter
+
+from config import SELECT_FAST_PATH, SELECT_PAGE_SIZE, BATCH_MAX_QUERIES, BATCH_MAX_WORKERS
+from db_agent import (
+    MODEL_MAP, PROJECTION_MAP, RESULT_CACHE, FILTER_USAGE, REFERENCE_CACHE,
+    get_query_plan, process_query, select_dependencies, select_page_response, select_template, sql_preview
+)
+from plan_cache import bind_literals
+from statement_cache import STATEMENT_CACHE, StatementTemplate, parameterize_predicate, shape_key
+from result_cache import result_cache_key
+from parsing import correct_query
+from fuzzy import with_corrections
+from metrics import measured
+
+WRITE_INTENTS = {'INSERT', 'UPDATE', 'DELETE'}
+
+# --- 1. Planificación del Lote ---
+def validate_batch(queries):
+    """Mensaje de error si el cuerpo no es una lista válida de consultas; None si lo es."""
+    if not isinstance(queries, list) or not queries:
+        return "Envía una lista no vacía de consultas en 'queries'."
+    if len(queries) > BATCH_MAX_QUERIES:
+        return f"Máximo {BATCH_MAX_QUERIES} consultas por lote (recibidas {len(queries)})."
+    if not all(isinstance(query, str) and query.strip() for query in queries):
+        return "Cada consulta del lote debe ser un texto no vacío."
+    return None
+
+def plan_item(index, query):
+    """Clasifica una consulta: 'select' (agrupable por tabla), 'read' o 'write'."""
+    corrected, corrections = correct_query(query)
+    plan, literals = get_query_plan(corrected)
+    table = plan['table']
+    if plan['intent'] == 'SELECT' and table in MODEL_MAP and SELECT_FAST_PATH and not plan['relations']:
+        predicate = bind_literals(plan['predicate'], literals) if plan['is_template'] else plan['predicate']
+        return {'index': index, 'query': query, 'kind': 'select', 'table': table, 'predicate': predicate, 'corrections': corrections}
+    kind = 'write' if plan['intent'] in WRITE_INTENTS else 'read'
+    return {'index': index, 'query': query, 'kind': kind, 'table': table}
+
+def plan_batch(queries):
+    """
+    Tramos de tareas en orden: cada escritura es un tramo propio; entre escrituras, las lecturas
+    forman un tramo de tareas independientes (un grupo por tabla para los SELECT, una por consulta).
+    Cada tarea es una función session -> {índice: respuesta}.
+    """
+    segments, reads = [], []
+
+    def close_reads():
+        if reads:
+            segments.append(read_tasks(reads))
+            reads.clear()
+
+    for index, query in enumerate(queries):
+        try:
+            item = plan_item(index, query)
+        except Exception as e:
+            segments.append([error_task(index, e)])
+            continue
+        if item['kind'] == 'write':
+            close_reads()
+            segments.append([single_task(item)])
+        else:
+            reads.append(item)
+    close_reads()
+    return segments
+
+def read_tasks(items):
+    by_table, by_query = defaultdict(list), defaultdict(list)
+    for item in items:
+        if item['kind'] == 'select':
+            by_table[item['table']].append(item)
+        else:
+            # La misma lectura repetida en el tramo se ejecuta una sola vez
+            by_query[item['query']].append(item['index'])
+    tasks = [group_task(table, members) if len(members) > 1 else single_task(members[0]) for table, members in by_table.items()]
+    for query, indexes in by_query.items():
+        tasks.append(single_task({'index': indexes[0], 'query': query}, copies=indexes[1:]))
+    return tasks
+
+# --- 2. Tareas (cada una con su sesión) ---
+def error_response(e):
+    return {'agent_text': f"❌ Error al procesar la consulta: {e}", 'type': 'error', 'conversation_state': {}}
+
+def error_task(index, e):
+    return lambda db_session: {index: error_response(e)}
+
+def single_task(item, copies=()):
+    def run(db_session):
+        try:
+            response = process_query(item['query'], db_session=db_session)
+        except Exception as e:
+            db_session.rollback()
+            response = error_response(e)
+        # Copias independientes: cada respuesta recibe después su propio session_id
+        return {item['index']: response, **{index: copy.deepcopy(response) for index in copies}}
+    return run
+
+def group_task(table, members):
+    def run(db_session):
+        try:
+            return run_select_group(db_session, table, members)
+        except Exception:
+            # Si el UNION ALL falla, cada consulta por separado: el error queda en la suya
+            db_session.rollback()
+            responses = {}
+            for item in members:
+                responses.update(single_task(item)(db_session))
+            return responses
+    return run
+
+def _slot_page(template, slot, names):
+    """
+    La sentencia 'page' de la plantilla como subconsulta del hueco slot del UNION ALL, con sus
+    parámetros renombrados ('lit0' -> 'b2_lit0') para que no choquen con los de otros huecos.
+    """
+    def rename(element):
+        if isinstance(element, BindParameter) and element.key in names:
+            return bindparam(f"b{slot}_{element.key}", type_=element.type, expanding=element.expanding)
+        return None
+    return visitors.replacement_traverse(template.statements['page'], {}, rename).subquery(f"batch_{slot}")
+
+def union_template(table, members):
+    """
+    Plantilla del UNION ALL para una secuencia de formas de filtro; members son (forma, plantilla,
+    parámetros) por hueco, en orden. Se construye una vez por combinación de formas (STATEMENT_CACHE).
+    """
+    key = ('batch', table) + tuple(shape for shape, _, _ in members)
+    template = STATEMENT_CACHE.get(key)
+    if template is None:
+        pages = [_slot_page(page_template, slot, set(params)) for slot, (_, page_template, params) in enumerate(members)]
+        parts = [select(literal(slot).label('batch_slot'), *page.c) for slot, page in enumerate(pages)]
+        template = StatementTemplate({'page': parts[0] if len(parts) == 1 else union_all(*parts)}, [])
+        STATEMENT_CACHE.put(key, template)
+    return template
+
+def run_select_group(db_session, table, members):
+    """
+    Primera página de varios SELECT de la misma tabla en UN statement:
+    SELECT n AS batch_slot, t.* FROM (SELECT ... WHERE predicado_n ORDER BY pk LIMIT página + 1) t UNION ALL ...
+    Cada subconsulta es la sentencia 'page' de la plantilla de su forma (la misma que ejecuta la
+    consulta suelta), con los valores enlazados. Los predicados repetidos comparten subconsulta.
+    """
+    Model, projection = MODEL_MAP[table], PROJECTION_MAP[table]
+    slots, pages, failed = {}, {}, {}
+    for item in members:
+        item['predicate'], value_corrections = REFERENCE_CACHE.resolve_predicate(db_session, table, item['predicate'])
+        item['corrections'] = item['corrections'] + value_corrections
+        FILTER_USAGE.record(table, item['predicate'])
+        key = result_cache_key(item['predicate'], None, SELECT_PAGE_SIZE, [])
+        item['cache_key'] = key
+        if key in slots or key in pages or key in failed:
+            continue
+        cached = RESULT_CACHE.get(table, key) if RESULT_CACHE is not None else None
+        if cached is not None:
+            pages[key] = cached
+            continue
+        try:
+            # Un filtro inválido (p. ej. una fecha mal escrita) solo descarta su consulta del UNION
+            template, params = select_template(Model, table, item['predicate'])
+            depends_on = select_dependencies(Model, table, item['predicate'])
+        except Exception as e:
+            failed[key] = {'agent_text': f"❌ Error al consultar la BD: {e}", 'type': 'error', 'conversation_state': {}}
+            continue
+        shape = shape_key(parameterize_predicate(item['predicate'], [])) if item['predicate'] else None
+        slots[key] = (len(slots), (shape, template, params), depends_on)
+
+    if slots:
+        union = union_template(table, [member for _, member, _ in slots.values()])
+        params = {f"b{slot}_{name}": value for slot, (_, _, member_params), _ in slots.values() for name, value in member_params.items()}
+        rows_by_slot = defaultdict(list)
+        for row in db_session.execute(union.statements['page'], params):
+            rows_by_slot[row[0]].append(row[1:])
+        for key, (slot, _, depends_on) in slots.items():
+            # UNION ALL no garantiza el orden entre subconsultas: se reordena por clave primaria
+            rows = sorted(rows_by_slot[slot], key=lambda row: row[projection.pk_index])
+            pages[key] = [projection.rows_to_dicts(rows), [row[projection.pk_index] for row in rows]]
+            if RESULT_CACHE is not None:
+                RESULT_CACHE.set(table, key, pages[key], depends_on)
+
+    responses = {}
+    for item in members:
+        if item['cache_key'] in failed:
+            responses[item['index']] = dict(failed[item['cache_key']])
+            continue
+        data_list, keys = pages[item['cache_key']]
+        # Vista previa: la sentencia de la consulta por separado (la subconsulta que ocupa en el UNION ALL)
+        template, params = select_template(Model, table, item['predicate'])
+        sql_statement = sql_preview(db_session, template, 'page', params)
+        response = select_page_response(table, item['predicate'], [], list(data_list), keys, sql_statement)
+        responses[item['index']] = with_corrections(response, item['corrections'])
+    return responses
+
+# --- 3. Ejecución ---
+def _collect(size, outputs):
+    results = [None] * size
+    for output in outputs:
+        for index, response in output.items():
+            results[index] = response
+    return results
+
+def answer_batch(queries, session_scope, max_workers=BATCH_MAX_WORKERS):
+    """
+    Versión síncrona: session_scope() es un context manager que entrega una sesión propia
+    (en Flask, un app context por worker). Devuelve las respuestas en el orden de queries.
+    """
+    def run(task):
+        with session_scope() as db_session:
+            return task(db_session)
+
+    run = measured(run) # Tiempos, consultas y filas de cada worker en los de la petición
+    outputs = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for tasks in plan_batch(queries):
+            outputs += list(pool.map(run, tasks)) if len(tasks) > 1 else [run(tasks[0])]
+    return _collect(len(queries), outputs)
+
+async def answer_batch_async(queries, session_factory, max_concurrency=BATCH_MAX_WORKERS):
+    """Versión asyncio: cada tarea en su AsyncSession (run_sync), como máximo max_concurrency a la vez."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(task):
+        async with semaphore:
+            async with session_factory() as session:
+                return await session.run_sync(measured(task))
+
+    outputs = []
+    for tasks in plan_batch(queries):
+        outputs += await asyncio.gather(*(run(task) for task in tasks))
+    return _collect(len(queries), outputs)
+
+def batch_summary(results):
+    errors = sum(1 for response in results if response.get('type') == 'error')
+    text = f"Respondidas {len(results)} consultas"
+    return text + (f" ({errors} con error)." if errors else ".")
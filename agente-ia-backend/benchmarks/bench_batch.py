@@ -0,0 +1,73 @@
+# benchmarks/bench_batch.py
+"""
+Un script de informes con N preguntas: N peticiones a /ask-agent una detrás de otra frente a
+una sola petición a /ask-agent/batch (SELECT agrupados por tabla en UNION ALL y lecturas en paralelo).
+Reporta tiempo total y sentencias SQL ejecutadas en cada caso.
+
+Uso: python benchmarks/bench_batch.py [--db-url ...] [--size 40] [--repeat 10]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from load_test import seed_if_empty  # también añade BACKEND_DIR a sys.path
+
+REPORT_QUERIES = [
+    "listar empleados del departamento 50",
+    "listar empleados del departamento 20",
+    "listar empleados con salario mayor a 10000",
+    "listar empleados de la ciudad Seattle",
+    "listar empleados con fecha de contratación mayor a 2004-01-01",
+    "listar departamentos",
+    "listar departamentos de la región Europe",
+    "ver regiones",
+    "cuantos empleados por departamento",
+    "salario promedio por puesto",
+    "subordinados directos de 100",
+    "listar empleados con su departamento y jefe",
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    default_db = 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'hr_loadtest.sqlite')
+    parser.add_argument('--db-url', default=os.environ.get('DATABASE_URL', default_db))
+    parser.add_argument('--size', type=int, default=len(REPORT_QUERIES), help="Preguntas por informe")
+    parser.add_argument('--repeat', type=int, default=10)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    os.environ['DATABASE_URL'] = args.db_url
+    import api
+    from query_counter import QueryCounter
+
+    seed_if_empty(api)
+    client = api.app.test_client()
+    queries = [REPORT_QUERIES[i % len(REPORT_QUERIES)] for i in range(args.size)]
+
+    def one_by_one():
+        return [client.post('/ask-agent', json={'query': query}).get_json() for query in queries]
+
+    def batched():
+        return client.post('/ask-agent/batch', json={'queries': queries}).get_json()['results']
+
+    print(f"--- Informe de {args.size} preguntas ({args.db_url}) ---")
+    with api.app.app_context():
+        engine = api.db.engine
+        for label, run in (("una a una", one_by_one), ("lote", batched)):
+            run()
+            with QueryCounter(engine) as counter:
+                results = run()
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                run()
+            elapsed_ms = (time.perf_counter() - start) / args.repeat * 1000
+            errors = sum(1 for response in results if response.get('type') == 'error')
+            print(f"  {label:<10} {elapsed_ms:8.2f} ms   {counter.count:>3} sentencias SQL   {errors} errores")
+
+
+if __name__ == '__main__':
+    main()
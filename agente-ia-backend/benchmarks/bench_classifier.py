@@ -0,0 +1,148 @@
+# benchmarks/bench_classifier.py
+"""
+Precisión y throughput: clasificador por índice invertido vs. los escaneos secuenciales de subcadenas.
+Usa un corpus etiquetado de consultas en español (intención y tabla esperadas).
+
+Uso: python benchmarks/bench_classifier.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classifier import KeywordIndex, tokenize
+from config import INTENT_KEYWORDS
+from parsing import classify_intent, extract_entities
+
+# (consulta, intención, tabla)
+CORPUS = [
+    ("listar empleados", "SELECT", "employees"),
+    ("Muéstrame las regiones", "SELECT", "regions"),
+    ("mostrar empleados con salario mayor a 5000", "SELECT", "employees"),
+    ("dame los departamentos", "SELECT", "departments"),
+    ("ver puestos con salario minimo mayor a 4000", "SELECT", "jobs"),
+    ("cuántos empleados hay en el departamento 50", "AGGREGATE", "employees"),
+    ("salario promedio de los empleados", "AGGREGATE", "employees"),
+    ("total de departamentos", "AGGREGATE", "departments"),
+    ("quiénes trabajan en el departamento 90", "SELECT", "departments"),
+    ("listar países de la región 2", "SELECT", "countries"),
+    ("listar ubicaciones", "SELECT", "locations"),
+    ("consultar empleados del departamento 60", "SELECT", "employees"),
+    ("buscar empleados con jefe es 100", "SELECT", "employees"),
+    ("lista de puestos", "SELECT", "jobs"),
+    ("ver regiones", "SELECT", "regions"),
+    ("mostrar oficinas", "SELECT", "locations"),
+    ("dame los cargos con salario maximo menor que 9000", "SELECT", "jobs"),
+    ("listar empleados nuevos", "SELECT", "employees"),
+    ("ver empleados para actualizar", "UPDATE", "employees"),
+    ("ver departamentos para eliminar", "DELETE", "departments"),
+    ("insertar empleado", "INSERT", "employees"),
+    ("agregar un nuevo departamento", "INSERT", "departments"),
+    ("crear región", "INSERT", "regions"),
+    ("añadir país", "INSERT", "countries"),
+    ("registrar un trabajador", "INSERT", "employees"),
+    ("dar de alta un empleado", "INSERT", "employees"),
+    ("ingresar puesto", "INSERT", "jobs"),
+    ("nueva ubicación", "INSERT", "locations"),
+    ("eliminar empleado donde id es 206", "DELETE", "employees"),
+    ("borrar el departamento 270", "DELETE", "departments"),
+    ("dar de baja al empleado 207", "DELETE", "employees"),
+    ("quitar la región 5", "DELETE", "regions"),
+    ("despedir al empleado 150", "DELETE", "employees"),
+    ("borra las ubicaciones de la ciudad Roma", "DELETE", "locations"),
+    ("actualizar salario a 25000 donde id es 205", "UPDATE", None),
+    ("modificar el nombre del departamento 10", "UPDATE", "departments"),
+    ("cambiar el puesto del empleado 120", "UPDATE", "employees"),
+    ("aumentar salario 10% a empleados del departamento 50", "UPDATE", "employees"),
+    ("reducir el sueldo en 500 a todos los empleados", "UPDATE", "employees"),
+    ("subir el salario mínimo de los puestos", "UPDATE", "jobs"),
+    ("editar la ubicación 1700", "UPDATE", "locations"),
+    ("actualiza el país AR", "UPDATE", "countries"),
+    ("verificar la conexión", "UNKNOWN", None),
+    ("hola", "UNKNOWN", None),
+    ("conversar sobre el clima", "UNKNOWN", None),
+    ("listar trabajadores del área de ventas", "SELECT", "employees"),
+    ("mostrar empleados del departamento 50 y su ubicación", "SELECT", "employees"),
+    ("listar departamentos de la ubicación 1700", "SELECT", "departments"),
+]
+
+
+def legacy_classify_intent(text):
+    """Implementación original: listas recorridas en orden, subcadenas sin tokenizar."""
+    text_lower = text.lower()
+    if any(k in text_lower for k in ["listar", "dame", "mostrar", "quienes", "cuantos", "lista", "ver"]):
+        return "SELECT"
+    if any(k in text_lower for k in ["insertar", "agregar", "crear", "nuevo", "ingresar"]):
+        return "INSERT"
+    if any(k in text_lower for k in ["eliminar", "borrar", "quitar", "dar de baja"]):
+        return "DELETE"
+    if any(k in text_lower for k in ["actualizar", "modificar", "cambiar", "revisar",
+                                      "aumentar", "incrementar", "subir", "reducir", "disminuir", "bajar"]):
+        return "UPDATE"
+    return "UNKNOWN"
+
+
+def legacy_extract_table(text):
+    text_lower = text.lower()
+    for keywords, table in [(("empleado", "employees"), 'employees'), (("departamento", "departments"), 'departments'),
+                            (("puesto", "jobs"), 'jobs'), (("region", "regions"), 'regions'),
+                            (("pais", "countries"), 'countries'), (("ubicacion", "locations"), 'locations')]:
+        if any(k in text_lower for k in keywords):
+            return table
+    return None
+
+
+def accuracy(classify, extract):
+    intent_hits = sum(classify(q) == intent for q, intent, _ in CORPUS)
+    table_hits = sum(extract(q) == table for q, _, table in CORPUS)
+    return intent_hits / len(CORPUS), table_hits / len(CORPUS)
+
+
+def throughput(classify, extract, clear=None, number=20):
+    def run():
+        if clear:
+            clear()  # Sin caché de tokens: se mide la clasificación completa
+        for query, _, _ in CORPUS:
+            classify(query)
+            extract(query)
+    seconds = min(timeit.repeat(run, repeat=5, number=number))
+    return len(CORPUS) * number / seconds
+
+
+def scaling(extra_keywords):
+    """Coste por consulta con palabras clave sintéticas añadidas: lineal (legacy) vs. constante (índice)."""
+    synthetic = [f"sintetico{i}" for i in range(extra_keywords)]
+    legacy_keywords = list(INTENT_KEYWORDS['SELECT']) + synthetic
+    index = KeywordIndex({**INTENT_KEYWORDS, 'SELECT': {**INTENT_KEYWORDS['SELECT'], **dict.fromkeys(synthetic, 1)}})
+    query = "insertar empleado con salario 5000"
+    legacy_us = min(timeit.repeat(lambda: any(k in query for k in legacy_keywords), repeat=5, number=2000)) / 2000 * 1e6
+    index_us = min(timeit.repeat(lambda: index.best(query), repeat=5, number=2000)) / 2000 * 1e6
+    return legacy_us, index_us
+
+
+def main():
+    new_extract = lambda q: extract_entities(q).get('table')
+    print(f"--- Clasificador ({len(CORPUS)} consultas etiquetadas) ---")
+    for label, classify, extract, clear in [
+        ("legacy", legacy_classify_intent, legacy_extract_table, None),
+        ("índice", classify_intent, new_extract, tokenize.cache_clear),
+    ]:
+        intent_acc, table_acc = accuracy(classify, extract)
+        qps = throughput(classify, extract, clear)
+        print(f"{label:>7}: intención {intent_acc:6.1%}  tabla {table_acc:6.1%}  {qps:>10.0f} consultas/s")
+
+    print("--- Escalado con palabras clave sintéticas (µs por consulta) ---")
+    for extra in (0, 100, 1000, 10000):
+        legacy_us, index_us = scaling(extra)
+        print(f"{extra:>6} extra: legacy {legacy_us:8.2f} µs   índice {index_us:6.2f} µs")
+
+    print("--- Fallos del índice ---")
+    for query, intent, table in CORPUS:
+        got = (classify_intent(query), new_extract(query))
+        if got != (intent, table):
+            print(f"  '{query}': {got} (esperado {(intent, table)})")
+
+
+if __name__ == '__main__':
+    main()
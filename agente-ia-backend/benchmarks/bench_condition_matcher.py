@@ -0,0 +1,85 @@
+# benchmarks/bench_condition_matcher.py
+"""
+Microbenchmark del análisis de condiciones: el antiguo bucle de regex por operador frente al
+camino que usa la app, el matcher precompilado (una pasada) y extract_predicate_tree encima.
+Muestra que el coste crece con la longitud de la consulta y no con el número de alias.
+
+Uso: python benchmarks/bench_condition_matcher.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import FIELD_MAP, OPERATOR_MAP
+from matcher import ConditionMatcher
+from parsing import extract_predicate_tree
+
+CORPUS = [
+    ("listar empleados con salario mayor a 5000", 'salary'),
+    ("empleados donde departamento es 50", 'department_id'),
+    ("mostrar empleados con sueldo menor que 3,000", 'salary'),
+    ("dame empleados cuyo jefe no es 100", 'manager_id'),
+    ("empleados con id de empleado igual a 206", 'employee_id'),
+    ("empleados que ganan más de $7000.50", None),
+    ("listar empleados", None),
+]
+
+
+def legacy_match(text, field_map, operator_map):
+    """Implementación original (regex nueva por operador y petición; solo la primera condición)."""
+    for es_op in operator_map:
+        pattern = rf'\b({"|".join(field_map.keys())})\b.*?{re.escape(es_op)}.*?\s+([a-zA-Z0-9.,]+)'
+        match = re.search(pattern, text)
+        if match:
+            return match.group(1), es_op, match.group(2)
+    return None
+
+
+def synthetic_field_map(extra_aliases):
+    """FIELD_MAP real ampliado con alias sintéticos que no aparecen en las consultas."""
+    field_map = dict(FIELD_MAP)
+    for i in range(extra_aliases):
+        field_map[f'alias sintetico {i}'] = 'salary'
+    return field_map
+
+
+def time_call(func, repeat=5, number=200):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1e6
+
+
+def check_corpus():
+    """El árbol encuentra la condición que encontraba el bucle antiguo (mismo campo)."""
+    for query, field in CORPUS:
+        tree = extract_predicate_tree(query, 'employees')
+        got = tree['field'] if tree and 'field' in tree else None
+        assert got == field, f"'{query}': {got} != {field}"
+
+
+def main():
+    check_corpus()
+    base_query = "listar empleados con salario mayor a 5000"
+    filler = " y mostrar sus datos completos"
+
+    print("--- Escalado con el número de alias (consulta fija): pasada del matcher ---")
+    print(f"{'alias':>8} {'legacy (us)':>14} {'scan (us)':>14}")
+    for extra in (0, 100, 500, 2000):
+        field_map = synthetic_field_map(extra)
+        matcher = ConditionMatcher(field_map, OPERATOR_MAP)
+        legacy = time_call(lambda: legacy_match(base_query, field_map, OPERATOR_MAP), number=20)
+        fast = time_call(lambda: matcher.scan(base_query))
+        print(f"{len(field_map):>8} {legacy:>14.1f} {fast:>14.1f}")
+
+    print("\n--- Escalado con la longitud de la consulta (alias fijos): extract_predicate_tree ---")
+    print(f"{'chars':>8} {'legacy (us)':>14} {'árbol (us)':>14}")
+    for repetitions in (0, 4, 16, 64):
+        query = base_query + filler * repetitions
+        legacy = time_call(lambda: legacy_match(query, FIELD_MAP, OPERATOR_MAP), number=20)
+        fast = time_call(lambda: extract_predicate_tree(query, 'employees'))
+        print(f"{len(query):>8} {legacy:>14.1f} {fast:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_eager_loading.py
+"""
+Consultas por petición con datos relacionados: carga perezosa (lazy=True de models.py,
+una consulta por fila y relación) frente a los perfiles de eager loading del agente.
+Termina con código 1 si algún perfil supera su presupuesto de consultas (regresión N+1),
+así que puede ejecutarse en CI.
+
+Uso: python benchmarks/bench_eager_loading.py [--db-url ...]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from load_test import seed_if_empty  # también añade BACKEND_DIR a sys.path
+
+# (consulta, relaciones, presupuesto de consultas del perfil: 1 + una por colección)
+CASES = [
+    ("listar empleados con su departamento y jefe", 'employees', ['department', 'manager'], 1),
+    ("mostrar empleados del departamento 50 y su ubicación", 'employees', ['department.location'], 1),
+    ("listar empleados incluyendo su puesto y su equipo", 'employees', ['job', 'subordinates'], 2),
+    ("listar departamentos con sus empleados", 'departments', ['employees'], 2),
+    ("listar ubicaciones con su país", 'locations', ['country'], 1),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    default_db = 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'hr_loadtest.sqlite')
+    parser.add_argument('--db-url', default=os.environ.get('DATABASE_URL', default_db))
+    parser.add_argument('--repeat', type=int, default=20)
+    return parser.parse_args()
+
+
+def lazy_page(db_agent, session, table, relations):
+    """Lo que haría el código sin perfiles: SELECT de la página y acceso perezoso a cada relación."""
+    from eager_loading import relation_value
+    Model = db_agent.MODEL_MAP[table]
+    pk_column = getattr(Model, db_agent.DB_SCHEMA[table]['fields'][0])
+    items = session.query(Model).order_by(pk_column).limit(db_agent.SELECT_PAGE_SIZE).all()
+    return [[relation_value(item, path) for path in relations] for item in items]
+
+
+def main():
+    args = parse_args()
+    os.environ['DATABASE_URL'] = args.db_url
+    import api
+    import db_agent
+    from query_counter import QueryCounter
+
+    seed_if_empty(api)
+    client = api.app.test_client()
+    failures = []
+    print(f"--- Consultas por petición con relaciones ({args.db_url}) ---")
+    with api.app.app_context():
+        engine = api.db.engine
+        for query, table, relations, budget in CASES:
+            with QueryCounter(engine) as lazy_counter:
+                lazy_page(db_agent, api.db.session, table, relations)
+            api.db.session.expunge_all()
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                lazy_page(db_agent, api.db.session, table, relations)
+                api.db.session.expunge_all()
+            lazy_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+            with QueryCounter(engine) as profile_counter:
+                response = client.post('/ask-agent', json={'query': query}).get_json()
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                client.post('/ask-agent', json={'query': query})
+            profile_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+            status = "ok" if profile_counter.count <= budget and response.get('type') == 'query_result' else "FALLO"
+            if status != "ok":
+                failures.append(query)
+            print(f"  {query}\n    lazy {lazy_counter.count:>3} consultas {lazy_ms:7.2f} ms   "
+                  f"perfil {profile_counter.count:>3} consultas {profile_ms:7.2f} ms (máx. {budget}) {status}")
+    if failures:
+        print(f"Regresión N+1 en: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/bench_fuzzy.py
+"""
+Corrección de typos y tildes con el índice de trigramas de fuzzy.py: aciertos sobre un corpus
+de consultas mal escritas, falsos positivos sobre consultas correctas y latencia por consulta
+frente a comparar la palabra con todo el vocabulario (distancia de edición sin índice).
+
+Uso: python benchmarks/bench_fuzzy.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fuzzy import FieldResolver, NgramIndex, edit_distance, max_distance
+from parsing import correct_query
+
+# (consulta mal escrita, consulta esperada tras la corrección)
+TYPOS = [
+    ("listar empleados con salrio mayor a 10000", "listar empleados con salario mayor a 10000"),
+    ("listar empelados con salario mayor a 15000", "listar empleados con salario mayor a 15000"),
+    ("listar empleados con sueldo menor a 3000 y apelido es King", "listar empleados con sueldo menor a 3000 y apellido es King"),
+    ("listar empleados con nombe es Steven", "listar empleados con nombre es Steven"),
+    ("listar empleados con telfono es 515.123.4567", "listar empleados con telefono es 515.123.4567"),
+    ("listar empleados con número de teléfono es 515.123.4567", "listar empleados con numero de telefono es 515.123.4567"),
+    ("aumentar comisión 10% a empleados del departamento 80", "aumentar comision 10% a empleados del departamento 80"),
+    ("listar empleados del departmento 50", "listar empleados del departamento 50"),
+    ("listar empleados de la cuidad Seattle", "listar empleados de la ciudad Seattle"),
+    ("listar empleados con salary mayor a 15000", "listar empleados con salario mayor a 15000"),
+    ("listar ubicaciones con codigo potal es 98199", "listar ubicaciones con codigo postal es 98199"),
+    ("listar empleados con fecha de contratacoin mayor a 2004-01-01", "listar empleados con fecha de contratacion mayor a 2004-01-01"),
+]
+CORRECT = [
+    "listar empleados",
+    "listar empleados con salario mayor a 10000",
+    "listar empleados de la ciudad Seattle",
+    "listar empleados que trabajan en Seattle",
+    "listar empleados con apellido es King",
+    "cuantos empleados por departamento",
+    "subordinados directos de 100",
+    "listar departamentos con sus empleados",
+    "mostrar oficinas",
+    "dar de baja al empleado 207",
+]
+
+
+def brute_force(vocabulary, word):
+    """Referencia sin índice: distancia de edición contra cada palabra del vocabulario."""
+    limit = max_distance(len(word))
+    distances = [(edit_distance(word, term, limit), term) for term in vocabulary]
+    best = min(distances)
+    return best[1] if best[0] <= limit else None
+
+
+def main():
+    build_ms = timeit.timeit(FieldResolver, number=20) / 20 * 1000
+    resolver = FieldResolver()
+    fixed = sum(resolver.correct(query)[0] == expected for query, expected in TYPOS)
+    false_positives = [query for query in CORRECT if resolver.correct(query)[1]]
+
+    print(f"--- Resolución aproximada ({len(resolver.index)} términos, construido en {build_ms:.2f} ms) ---")
+    print(f"  corregidas {fixed}/{len(TYPOS)}   falsos positivos {len(false_positives)}/{len(CORRECT)} {false_positives or ''}")
+
+    number = 2000
+    for label, queries in (("con typos", [q for q, _ in TYPOS]), ("correctas", CORRECT)):
+        seconds = timeit.timeit(lambda: [correct_query(query) for query in queries], number=number)
+        print(f"  consultas {label:<10} {seconds / (number * len(queries)) * 1e6:8.1f} µs/consulta")
+
+    words = [word for query, _ in TYPOS for word in query.split() if word not in resolver.known and word.islower() and word.isalpha()]
+    vocabulary = list(resolver.index._terms)
+    index = NgramIndex()
+    for term in vocabulary:
+        index.add(term, term)
+    for label, lookup in (("trigramas", index.lookup), ("fuerza bruta", lambda word: brute_force(vocabulary, word))):
+        seconds = timeit.timeit(lambda: [lookup(word) for word in words], number=number // 4)
+        print(f"  palabra {label:<13} {seconds / (number // 4 * len(words)) * 1e6:8.1f} µs/palabra")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_reference_cache.py
+"""
+Filtros por nombre ('departamento Shipping', 'ciudad Seattle', 'región Europe') con JOIN hasta
+la tabla de referencia frente a la caché de reference_cache.py, que los reescribe como filtro
+por clave (department_id IN (...)) sin JOIN. Reporta latencia media, sentencias SQL por
+consulta y si ambas versiones devuelven las mismas filas.
+
+Uso: python benchmarks/bench_reference_cache.py [--db-url ...] [--employees 100000] [--repeat 20]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from load_test import BACKEND_DIR  # también añade BACKEND_DIR a sys.path
+import datagen
+
+QUERIES = [
+    "listar empleados del departamento Shipping",
+    "listar empleados de la ciudad Seattle",
+    "listar empleados de la región Europe",
+    "listar empleados del puesto Programmer",
+    "cuantos empleados de la región Americas",
+    "salario promedio por puesto del departamento Sales",
+    "listar departamentos de la región Europe",
+]
+MODES = [("JOIN", False), ("caché de referencia", True)]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    default_db = 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'hr_bench.sqlite')
+    parser.add_argument('--db-url', default=os.environ.get('DATABASE_URL', default_db))
+    parser.add_argument('--employees', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    os.environ['DATABASE_URL'] = args.db_url
+    import api
+    import db_agent
+    from query_counter import QueryCounter
+    from startup import has_rows
+
+    with api.app.app_context():
+        api.db.create_all()
+        if api.db.session.query(api.Employee).count() != args.employees or not has_rows(api.db.session, api.Employee):
+            datagen.generate(api.db.engine, args.employees, log=None)
+        api.db.session.remove()
+
+        print(f"--- Filtros por nombre ({args.db_url}, {args.employees} empleados, {args.repeat} repeticiones) ---")
+        print(f"{'consulta':<52}" + "".join(f"{label:>22}" for label, _ in MODES))
+        answers = {}
+        for query in QUERIES:
+            cells = []
+            for label, lookups in MODES:
+                db_agent.REFERENCE_CACHE.lookups = lookups
+                run = lambda: db_agent.process_query(query, db_session=api.db.session)
+                answers[(query, lookups)] = run().get('data') # Calentamiento: planes y carga de la caché
+                with QueryCounter(api.db.engine) as counter:
+                    run()
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    run()
+                elapsed_ms = (time.perf_counter() - start) / args.repeat * 1000
+                cells.append(f"{elapsed_ms:9.2f} ms {counter.count:>2} SQL")
+            same = "" if answers[(query, False)] == answers[(query, True)] else "  ¡resultados distintos!"
+            print(f"{query:<52}" + "".join(f"{cell:>22}" for cell in cells) + same)
+            api.db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
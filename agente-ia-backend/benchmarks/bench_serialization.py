@@ -0,0 +1,80 @@
+# benchmarks/bench_serialization.py
+"""
+Compara el SELECT por ORM + map_to_dict_dynamic con el camino rápido de Core + ModelProjection.
+Mide tiempo y memoria pico (tracemalloc) por fila sobre una base SQLite en memoria.
+
+Uso: python benchmarks/bench_serialization.py [filas]
+"""
+import datetime
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import select
+
+from extensions import db
+from models import Employee, Department, Job, Region, Country, Location
+from utils import map_to_dict_dynamic, ModelProjection
+from db_agent import MODEL_MAP
+
+
+def seed(rows):
+    db.session.add(Region(region_id=1, region_name='Europe'))
+    db.session.add(Country(country_id='IT', country_name='Italy', region_id=1))
+    db.session.add(Location(location_id=1000, city='Rome', country_id='IT'))
+    db.session.add(Job(job_id='IT_PROG', job_title='Programmer', min_salary=4000, max_salary=10000))
+    db.session.add(Department(department_id=10, department_name='IT', location_id=1000))
+    db.session.execute(Employee.__table__.insert(), [
+        {
+            'employee_id': i, 'first_name': f'Nombre{i}', 'last_name': f'Apellido{i}',
+            'email': f'E{i}', 'phone_number': '515.123.4567', 'hire_date': datetime.date(2020, 1, 1),
+            'salary': 4000 + i % 5000, 'job_id': 'IT_PROG', 'department_id': 10,
+        }
+        for i in range(1, rows + 1)
+    ])
+    db.session.commit()
+
+
+def measure(label, func, rows):
+    db.session.expunge_all()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(result) == rows
+    print(f"{label:<28} {elapsed * 1000:>10.1f} ms {elapsed / rows * 1e6:>8.2f} us/fila {peak / 1024:>10.0f} KiB pico")
+    return result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        seed(rows)
+        projection = ModelProjection(Employee)
+
+        def orm_path():
+            items = db.session.execute(select(Employee)).scalars().all()
+            return [map_to_dict_dynamic(item, MODEL_MAP) for item in items]
+
+        def core_path():
+            return projection.rows_to_dicts(db.session.execute(select(*projection.columns)).all())
+
+        print(f"--- {rows} filas de employees ---")
+        orm_result = measure("ORM + map_to_dict_dynamic", orm_path, rows)
+        core_result = measure("Core + ModelProjection", core_path, rows)
+        assert orm_result == core_result, "Los dos caminos deben producir los mismos diccionarios"
+
+
+if __name__ == '__main__':
+    main()
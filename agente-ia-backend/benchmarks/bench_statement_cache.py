@@ -0,0 +1,82 @@
+# benchmarks/bench_statement_cache.py
+"""
+SELECT con la misma forma de filtro y valores distintos ('salario mayor a 5000', '... a 5100'):
+sentencia construida en cada consulta y vista previa compilada con literal_binds, frente a la
+plantilla de statement_cache.py (sentencia construida una vez, valores enlazados y vista previa
+compilada una vez por dialecto). Reporta latencia media y aciertos de la caché compilada.
+
+Uso: python benchmarks/bench_statement_cache.py [--db-url ...] [--employees 100000] [--repeat 200]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from load_test import BACKEND_DIR  # también añade BACKEND_DIR a sys.path
+import datagen
+
+PREDICATES = [
+    ("salary > x", lambda n: {'field': 'salary', 'op': '>', 'value': 5000 + n % 100 * 50}),
+    ("department = x AND salary > y", lambda n: {'logic': 'AND', 'conditions': [
+        {'field': 'department_id', 'op': '==', 'value': 10 + n % 11 * 10},
+        {'field': 'salary', 'op': '>', 'value': 3000 + n % 40 * 100}]}),
+    ("department IN (1..6 valores)", lambda n: {'field': 'department_id', 'op': 'in', 'value': [10 * (1 + i) for i in range(1 + n % 6)]}),
+    ("last_name = x", lambda n: {'field': 'last_name', 'op': '==', 'value': f"Apellido{n}"}),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    default_db = 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'hr_bench.sqlite')
+    parser.add_argument('--db-url', default=os.environ.get('DATABASE_URL', default_db))
+    parser.add_argument('--employees', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=200)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    os.environ['DATABASE_URL'] = args.db_url
+    import api
+    import db_agent
+    from statement_cache import COMPILED_CACHE_METRICS
+    from startup import has_rows
+
+    Model = api.Employee
+
+    def per_query(db_session, predicate):
+        stmt = db_agent.prepare_select(Model, 'employees', predicate)['page']
+        rows = db_session.execute(stmt).all()
+        preview = str(stmt.compile(dialect=db_session.get_bind().dialect, compile_kwargs={'literal_binds': True}))
+        return rows, preview
+
+    def templated(db_session, predicate):
+        template, params = db_agent.select_template(Model, 'employees', predicate)
+        rows = db_session.execute(template.statements['page'], params).all()
+        return rows, db_agent.sql_preview(db_session, template, 'page', params)
+
+    with api.app.app_context():
+        api.db.create_all()
+        if api.db.session.query(api.Employee).count() != args.employees or not has_rows(api.db.session, api.Employee):
+            datagen.generate(api.db.engine, args.employees, log=None)
+        api.db.session.remove()
+        db_session = api.db.session
+
+        print(f"--- Plantillas de sentencias ({args.db_url}, {args.employees} empleados, {args.repeat} consultas por forma) ---")
+        print(f"{'forma del filtro':<32}{'por consulta':>16}{'plantilla':>16}{'aciertos compilada':>22}")
+        for label, make in PREDICATES:
+            cells = []
+            for run in (per_query, templated):
+                run(db_session, make(0)) # Calentamiento
+                COMPILED_CACHE_METRICS.reset()
+                start = time.perf_counter()
+                for n in range(args.repeat):
+                    run(db_session, make(n))
+                cells.append((time.perf_counter() - start) / args.repeat * 1000)
+            hit_rate = COMPILED_CACHE_METRICS.snapshot()['hit_rate']
+            print(f"{label:<32}{cells[0]:>13.3f} ms{cells[1]:>13.3f} ms{hit_rate:>21.0%}")
+        db_session.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# classifier.py
+import re
+import unicodedata
+from functools import lru_cache
+
+# --- 1. Normalización y Tokenización ---
+_TOKEN_RE = re.compile(r"\w+")
+
+def fold_accents(text):
+    """'Muéstrame regiones' -> 'muestrame regiones' (minúsculas y sin tildes ni diéresis)."""
+    text = text.lower()
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+@lru_cache(maxsize=1024)
+def tokenize(text):
+    """Tokens normalizados de la consulta; cacheado porque intención y tabla se clasifican sobre el mismo texto."""
+    return tuple(_TOKEN_RE.findall(fold_accents(text)))
+
+
+# --- 2. Índice Invertido con Pesos ---
+class KeywordIndex:
+    """
+    Índice token -> [(frase, etiqueta, peso)] construido una sola vez.
+    Clasifica en una pasada sobre los tokens de la consulta, sin recorrer listas de palabras clave.
+    """
+
+    def __init__(self, keywords_by_label, decay=1.0):
+        self.labels = list(keywords_by_label)
+        self.decay = decay
+        self._index = {}
+        for label, keywords in keywords_by_label.items():
+            for phrase, weight in keywords.items():
+                tokens = tokenize(phrase)
+                self._index.setdefault(tokens[0], []).append((tokens, label, weight))
+        self._vocabulary = {token for entries in self._index.values() for tokens, _, _ in entries for token in tokens}
+
+    def _canonical(self, token):
+        """Plural -> singular solo si la forma reducida está en el vocabulario ('paises' -> 'pais')."""
+        if token in self._vocabulary:
+            return token
+        for suffix in ('es', 's'):
+            if token.endswith(suffix) and token[:-len(suffix)] in self._vocabulary:
+                return token[:-len(suffix)]
+        return token
+
+    def scores(self, text):
+        """Devuelve {etiqueta: (puntuación, posición_primera_mención)}."""
+        tokens = [self._canonical(token) for token in tokenize(text)]
+        results = {}
+        mentions = 0
+        for position, token in enumerate(tokens):
+            for phrase, label, weight in self._index.get(token, ()):
+                if tuple(tokens[position:position + len(phrase)]) != phrase:
+                    continue
+                score, first = results.get(label, (0.0, position))
+                results[label] = (score + weight * self.decay ** mentions, first)
+                mentions += 1
+        return results
+
+    def best(self, text, default=None):
+        """Etiqueta con más puntuación; empate -> primera mención y después orden de declaración."""
+        results = self.scores(text)
+        if not results:
+            return default
+        return min(results, key=lambda label: (-results[label][0], results[label][1], self.labels.index(label)))
@@ -1,34 +1,47 @@
 # db_agent.py
+import copy
+import operator
+from decimal import Decimal
+from itertools import islice
 from sqlalchemy.orm import Session
-from sqlalchemy import inspect, func # func para max_id en INSERT
+from sqlalchemy import inspect, func, and_, or_, select, bindparam, insert, update, delete, Integer, Numeric # func para agregaciones, and_/or_ para predicados
 
 # Importar modelos, utilidades y lógica de parsing
 from models import Employee, Department, Job, Region, Country, Location 
-from config import DB_SCHEMA 
-from utils import translate_term, map_to_dict_dynamic, requires_auto_id
+from config import (
+    DB_SCHEMA, SELECT_PAGE_SIZE, STREAM_BATCH_SIZE, SELECT_FAST_PATH, PLAN_CACHE_SIZE,
+    RESULT_CACHE_BACKEND, RESULT_CACHE_TTL, RESULT_CACHE_SIZE, RESULT_CACHE_PATH,
+    HIERARCHY_MAX_DEPTH, ORG_CLOSURE_TABLE, AGGREGATE_LABELS, AGGREGATE_NAMES,
+    FUZZY_MATCHING, REFERENCE_TABLES, REFERENCE_LOOKUPS
+)
+from utils import translate_term, map_to_dict_dynamic, requires_auto_id, encode_cursor, decode_cursor, ModelProjection, coerce_column_value, coerce_record, precompute_coercers
 from parsing import (
     classify_intent, 
     extract_entities, 
     simple_data_extractor, 
-    extract_conditions, 
-    extract_update_params
+    extract_update_params,
+    extract_predicate_tree,
+    extract_bulk_update,
+    extract_bulk_rows,
+    extract_hierarchy_request,
+    extract_aggregation,
+    extract_output_relations,
+    is_next_page_request,
+    correct_query
 )
-# 1. Importar Modelos (Ahora desde models.py, que es la fuente correcta)
-try:
-    from models import Employee, Department, Job, Region, Country, Location 
-except ImportError as e:
-    # Si la importación falla, imprime el error de depuración real.
-    print(f"Error de Importación Crítico: {e}")
-    # Nota: Si models.py no está en el mismo directorio, la importación fallará.
-    # Para fines de este proyecto, asumiremos que models.py está en el mismo nivel o es accesible.
-    exit()
-
-# 2. Importar Constantes y Utilidades (Ahora desde config.py y utils.py)
-from config import DB_SCHEMA 
-from parsing import classify_intent, extract_entities, simple_data_extractor, extract_conditions, extract_update_params
-from utils import translate_term, map_to_dict_dynamic, requires_auto_id
-
-# 3. Definir el Mapa de Modelos
+from id_allocation import allocate_ids
+from org_chart import hierarchy_statement, refresh_closure
+from eager_loading import loader_options, relation_tables, relation_value, relation_key
+from index_advisor import FILTER_USAGE
+from metrics import timed_stage, set_request_labels, add_rows
+from join_planner import SCHEMA_TABLES, qualify_predicate, build_join_source, joined_tables
+from plan_cache import LRUCache, normalize_query, placeholder_index, bind_literals
+from statement_cache import STATEMENT_CACHE, StatementTemplate, parameterize_predicate, shape_key
+from result_cache import create_result_cache, result_cache_key
+from fuzzy import with_corrections
+from reference_cache import ReferenceCache
+
+# Definir el Mapa de Modelos
 MODEL_MAP = {
     'employees': Employee, 
     'departments': Department, 
@@ -39,19 +52,425 @@ MODEL_MAP = {
 }
 # Definimos el MODEL_MAP aquí para que esté disponible globalmente en este módulo
 
+# Proyecciones precalculadas por tabla para el SELECT sin ORM (columnas, claves y conversores)
+PROJECTION_MAP = {table: ModelProjection(Model) for table, Model in MODEL_MAP.items()}
+
+# Conversores de valores por columna (tipos de models.py), para filtros y escrituras
+precompute_coercers(SCHEMA_TABLES.values())
+
+# Caché de planes: plantilla normalizada -> intención, tabla y predicados
+PLAN_CACHE = LRUCache(maxsize=PLAN_CACHE_SIZE)
+
+# Caché de resultados del SELECT (opcional); INSERT/UPDATE/DELETE la invalidan por tabla
+RESULT_CACHE = create_result_cache(RESULT_CACHE_BACKEND, maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL, path=RESULT_CACHE_PATH)
+
+# Tablas de referencia en memoria: nombres -> claves sin JOIN y corrección de nombres ('Shiping')
+REFERENCE_CACHE = ReferenceCache(SCHEMA_TABLES, REFERENCE_TABLES, resolve_names=FUZZY_MATCHING, lookups=REFERENCE_LOOKUPS)
+
 # -----------------------------------------------------------------
-# --- 5. Función Principal del Agente (CON db_session) ---
+# --- 4. Compilación del Árbol de Predicados a SQLAlchemy ---
 # -----------------------------------------------------------------
-def process_query(user_query, db_session: Session = None, conversation_state={}):
+COMPARISON_OPERATORS = {
+    '>': operator.gt,
+    '<': operator.lt,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+SQL_DISPLAY_OPERATORS = {'==': '=', '!=': '<>'}
+
+def _placeholder_to_bindparam(column, value, expanding=False):
+    index = placeholder_index(value)
+    return value if index is None else bindparam(f"lit{index}", type_=column.type, expanding=expanding)
+
+def predicate_column(Model, table, field):
+    """Columna de una hoja del árbol: de la propia tabla o, cualificada ('tabla.campo'), de otra."""
+    if '.' in field:
+        # Campo de otra tabla ya cualificado por qualify_predicate (se une en el FROM)
+        other, name = field.split('.', 1)
+        column = SCHEMA_TABLES[other].c.get(name) if other in SCHEMA_TABLES else None
+    else:
+        column = getattr(Model, field, None)
+    if column is None:
+        raise Exception(f"Campo '{field}' no válido para la tabla '{table}'")
+    return column
+
+def build_filter_expression(Model, predicate, table, bind_placeholders=False):
+    """
+    Compila el árbol de extract_predicate_tree en UNA expresión de filtro (un solo round trip).
+    Con bind_placeholders, los marcadores '__N__' de una forma (statement_cache.parameterize_predicate)
+    se convierten en bindparam('litN') con el tipo de su columna.
+    """
+    if 'logic' in predicate:
+        clauses = [build_filter_expression(Model, child, table, bind_placeholders) for child in predicate['conditions']]
+        return and_(*clauses) if predicate['logic'] == 'and' else or_(*clauses)
+
+    column = predicate_column(Model, table, predicate['field'])
+    op = predicate['op']
+    value = predicate['value']
+    if bind_placeholders:
+        # La lista de un 'in' es un solo marcador: parámetro expandible (la forma no depende de su longitud)
+        value = [_placeholder_to_bindparam(column, v) for v in value] if isinstance(value, list) else _placeholder_to_bindparam(column, value, expanding=op == 'in')
+    value = coerce_column_value(column, value)
+    if op == 'between':
+        return column.between(value[0], value[1])
+    if op == 'in':
+        return column.in_(value)
+    return COMPARISON_OPERATORS[op](column, value)
+
+def _display_literal(value):
+    return repr(value) if isinstance(value, str) else str(value)
+
+def render_predicate(predicate):
+    """Genera el texto WHERE (solo visualización) de un árbol de predicados."""
+    if 'logic' in predicate:
+        joiner = f" {predicate['logic'].upper()} "
+        parts = [render_predicate(child) for child in predicate['conditions']]
+        return joiner.join(f"({part})" if 'logic' in child else part for part, child in zip(parts, predicate['conditions']))
+
+    field, op, value = predicate['field'], predicate['op'], predicate['value']
+    if op == 'between':
+        return f"{field} BETWEEN {_display_literal(value[0])} AND {_display_literal(value[1])}"
+    if op == 'in':
+        return f"{field} IN ({', '.join(_display_literal(v) for v in value)})"
+    return f"{field} {SQL_DISPLAY_OPERATORS.get(op, op)} {_display_literal(value)}"
+
+def build_select_statement(Model, projection):
+    """select() de Core sobre las columnas proyectadas o, sin camino rápido, select() del modelo ORM."""
+    return select(*projection.columns) if SELECT_FAST_PATH else select(Model)
+
+def build_scoped_filter(Model, table, predicate, bind_placeholders=False):
+    """
+    Filtro para UPDATE/DELETE/agregaciones. Si el árbol usa campos de otras tablas se
+    aplica como 'pk IN (SELECT pk ... JOIN ...)': sigue siendo un solo statement, es
+    portable (sin UPDATE ... FROM) y no repite filas en las uniones uno a muchos.
+    """
+    expression = build_filter_expression(Model, predicate, table, bind_placeholders)
+    source, joined, _ = build_join_source(table, predicate)
+    if not joined:
+        return expression
+    pk_column = getattr(Model, DB_SCHEMA[table]['fields'][0])
+    return pk_column.in_(select(pk_column).select_from(source).where(expression))
+
+def prepare_select(Model, table, predicate, after_key=None, bind_placeholders=False, relations=()):
+    """
+    Construye los statements del SELECT: 'page' (LIMIT página + 1) y 'stream' (sin límite).
+    Con relations ('department', 'manager'...) se usa el modelo ORM con su perfil de eager loading.
+    """
+    pk_column = getattr(Model, DB_SCHEMA[table]['fields'][0])
+    if relations:
+        stmt = select(Model).options(*loader_options(Model, relations))
+    else:
+        stmt = build_select_statement(Model, PROJECTION_MAP[table])
+    if predicate:
+        # Campos de otras tablas: los JOIN de la ruta más corta del grafo de claves foráneas
+        source, joined, fan_out = build_join_source(table, predicate)
+        if joined:
+            stmt = stmt.select_from(source)
+            if fan_out:
+                stmt = stmt.distinct()
+        stmt = stmt.where(build_filter_expression(Model, predicate, table, bind_placeholders))
+    # Paginación keyset (seek) sobre la clave primaria: sin OFFSET, coste constante por página
+    if after_key is not None:
+        stmt = stmt.where(pk_column > coerce_column_value(pk_column, after_key))
+    stmt = stmt.order_by(pk_column)
+    return {'page': stmt.limit(SELECT_PAGE_SIZE + 1), 'stream': stmt}
+
+# --- Plantillas de Sentencias (una por forma del filtro, ver statement_cache.py) ---
+def _placeholder_columns(Model, table, shape, columns):
+    if 'logic' in shape:
+        for child in shape['conditions']:
+            _placeholder_columns(Model, table, child, columns)
+        return
+    column = predicate_column(Model, table, shape['field'])
+    for marker in shape['value'] if isinstance(shape['value'], list) else [shape['value']]:
+        columns[placeholder_index(marker)] = column
+
+def get_statement_template(kind, Model, table, predicate, build, variant=()):
+    """
+    (plantilla, parámetros). Las sentencias se construyen con build(forma) solo la primera vez que
+    aparece una forma de filtro (por tipo de sentencia, tabla y variante); después solo se enlazan
+    los valores, cada uno convertido al tipo de su columna. Un valor inválido lanza ValueError aquí.
+    """
+    values = []
+    shape = parameterize_predicate(predicate, values) if predicate else None
+    key = (kind, table, shape_key(shape)) + tuple(variant)
+    template = STATEMENT_CACHE.get(key)
+    if template is None:
+        columns = [None] * len(values)
+        if shape:
+            _placeholder_columns(Model, table, shape, columns)
+        template = StatementTemplate(build(shape), columns)
+        STATEMENT_CACHE.put(key, template)
+    params = {f"lit{index}": coerce_column_value(column, value) for index, (column, value) in enumerate(zip(template.columns, values))}
+    return template, params
+
+def select_template(Model, table, predicate, after_key=None, relations=()):
+    """(plantilla con 'page' y 'stream', parámetros) del SELECT; la página siguiente enlaza 'after_key'."""
+    pk_column = getattr(Model, DB_SCHEMA[table]['fields'][0])
+
+    def build(shape):
+        after = bindparam('after_key', type_=pk_column.type) if after_key is not None else None
+        return prepare_select(Model, table, shape, after_key=after, bind_placeholders=True, relations=relations)
+
+    template, params = get_statement_template('select', Model, table, predicate, build, (tuple(relations), after_key is not None))
+    if after_key is not None:
+        params['after_key'] = coerce_column_value(pk_column, after_key)
+    return template, params
+
+def select_dependencies(Model, table, predicate, relations=()):
+    """
+    Otras tablas que lee el SELECT (las unidas por el filtro y las de las relaciones cargadas):
+    escribir en ellas invalida su página cacheada.
+    """
+    tables = set(joined_tables(table, predicate)) if predicate else set()
+    return sorted(tables.union(relation_tables(Model, relations)) - {table})
+
+def sql_preview(db_session, template, name, params):
+    """Texto de la sentencia 'name' de la plantilla con sus valores (la misma SQL que se ejecuta)."""
+    return template.preview(name, db_session.get_bind().dialect, params)
+
+def select_page_response(table, predicate, relations, data_list, keys, sql_statement):
+    """
+    Respuesta de una página del SELECT a partir de sus filas (pedidas con una fila extra para
+    saber si hay más páginas sin hacer un COUNT); con más filas, el cursor de la siguiente.
+    """
+    has_more = len(data_list) > SELECT_PAGE_SIZE
+    data_list = data_list[:SELECT_PAGE_SIZE]
+    add_rows(len(data_list))
+
+    agent_text = f"Mostrando {len(data_list)} registros de **{table}** encontrados."
+    next_state = {}
+    if has_more:
+        next_state = {
+            'intent': 'SELECT',
+            'table': table,
+            'cursor': encode_cursor({'predicate': predicate, 'after': keys[SELECT_PAGE_SIZE - 1], 'relations': relations})
+        }
+        agent_text += " Escribe **siguiente** para ver más."
+
+    return {
+        'agent_text': agent_text,
+        'sql_statement': sql_statement,
+        'type': 'query_result',
+        'data': data_list,
+        'conversation_state': next_state
+    }
+
+def build_query_plan(text, is_template=True):
+    """Parsea una plantilla normalizada (intención, tabla, árbol de predicados y relaciones)."""
+    intent = classify_intent(text)
+    table = extract_entities(text).get('table')
+    if not table and intent in ["UPDATE", "DELETE", "HIERARCHY"]:
+        table = 'employees'
+    predicate = qualify_predicate(table, extract_predicate_tree(text, table)) if intent == "SELECT" and table else None
+    relations = extract_output_relations(text, table) if intent == "SELECT" and table else []
+    return {'intent': intent, 'table': table, 'predicate': predicate, 'relations': relations, 'is_template': is_template}
+
+def get_query_plan(user_query):
+    """Devuelve (plan, literales) usando la caché LRU de planes por plantilla normalizada."""
+    with timed_stage('parse'):
+        template, literals = normalize_query(user_query)
+        if template is None:
+            return build_query_plan(user_query, is_template=False), []
+        plan = PLAN_CACHE.get(template)
+        if plan is None:
+            plan = build_query_plan(template)
+            PLAN_CACHE.put(template, plan)
+        return plan, literals
+
+def get_plan_cache_stats():
+    return PLAN_CACHE.stats()
+
+def invalidate_cached_results(table, db_session=None):
+    """Write-through: descarta los resultados cacheados de la tabla tras un commit."""
+    if RESULT_CACHE is not None:
+        RESULT_CACHE.invalidate_table(table)
+    REFERENCE_CACHE.mark_stale(table) # Si es una tabla de referencia, se recarga al siguiente uso
+    # La tabla de cierre del organigrama (si está activada) se reconstruye tras escribir en employees
+    if ORG_CLOSURE_TABLE and table == 'employees' and db_session is not None:
+        refresh_closure(db_session, HIERARCHY_MAX_DEPTH)
+        db_session.commit()
+
+AGGREGATE_FUNCTIONS = {'count': func.count, 'sum': func.sum, 'avg': func.avg, 'max': func.max, 'min': func.min}
+
+def build_aggregate_statement(Model, aggregation, bind_placeholders=False):
+    """SELECT grupo..., FUNC(col) ... WHERE ... GROUP BY grupo... ORDER BY grupo... (calculado en la BD)."""
+    table = aggregation['table']
+    group_columns = [getattr(Model, field) for field in aggregation['group_by']]
+    if aggregation['func'] == 'count':
+        value = func.count()
+    else:
+        column = getattr(Model, aggregation['field'])
+        if aggregation['func'] in ('sum', 'avg') and not isinstance(column.type, (Integer, Numeric)):
+            raise Exception(f"No se puede calcular {AGGREGATE_NAMES[aggregation['func']]} de '{aggregation['field']}' (no es numérico)")
+        value = AGGREGATE_FUNCTIONS[aggregation['func']](column)
+    stmt = select(*group_columns, value.label('value')).select_from(Model)
+    if aggregation['where']:
+        stmt = stmt.where(build_scoped_filter(Model, table, aggregation['where'], bind_placeholders))
+    if group_columns:
+        stmt = stmt.group_by(*group_columns).order_by(*group_columns)
+    return stmt
+
+def hierarchy_template(direction):
+    """(plantilla con 'query', parámetros) del organigrama: el empleado raíz y la profundidad se enlazan al ejecutar."""
+    def build(shape):
+        root_id, max_depth = bindparam('root_id', type_=Integer), bindparam('max_depth', type_=Integer)
+        return {'query': hierarchy_statement(PROJECTION_MAP['employees'], root_id, direction, max_depth, use_closure=ORG_CLOSURE_TABLE)}
+    return get_statement_template('hierarchy', Employee, 'employees', None, build, (direction, ORG_CLOSURE_TABLE))
+
+def aggregate_template(Model, aggregation):
+    """(plantilla con 'query', parámetros) de la agregación: una sentencia por función, campo, grupos y forma del filtro."""
+    def build(shape):
+        return {'query': build_aggregate_statement(Model, {**aggregation, 'where': shape}, bind_placeholders=True)}
+    variant = (aggregation['func'], aggregation['field'], tuple(aggregation['group_by']))
+    return get_statement_template('aggregate', Model, aggregation['table'], aggregation['where'], build, variant)
+
+def aggregate_label(aggregation):
+    label = AGGREGATE_LABELS[aggregation['func']]
+    return f"{label}_{aggregation['field'].upper()}" if aggregation['field'] else label
+
+def _aggregate_value(value, func_name):
+    if value is None or isinstance(value, str):
+        return value
+    if func_name == 'count':
+        return int(value)
+    return round(float(value), 2) if func_name == 'avg' else float(value)
+
+def item_to_dict(item, relations=()):
+    """Fila ORM a diccionario, con los nombres de las relaciones pedidas (ya cargadas, sin consultas)."""
+    data = map_to_dict_dynamic(item, MODEL_MAP)
+    for path in relations:
+        data[relation_key(path)] = relation_value(item, path)
+    return data
+
+def fetch_select_rows(db_session, stmt, projection, params=None, relations=()):
+    """Ejecuta el SELECT y devuelve (filas_dict, claves_primarias) en el mismo orden."""
+    if SELECT_FAST_PATH and not relations:
+        with timed_stage('sql'):
+            rows = db_session.execute(stmt, params).all()
+        with timed_stage('hydrate'):
+            return projection.rows_to_dicts(rows), [row[projection.pk_index] for row in rows]
+    with timed_stage('sql'):
+        items = db_session.execute(stmt, params).scalars().all()
+    pk_key = projection.keys[projection.pk_index]
+    with timed_stage('hydrate'):
+        return [item_to_dict(item, relations) for item in items], [getattr(item, pk_key) for item in items]
+
+def stream_query_rows(db_session, stmt, projection, params=None, relations=()):
+    """Genera las filas de un SELECT por lotes (yield_per) para exportar en memoria constante."""
+    result = db_session.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE), params)
+    if SELECT_FAST_PATH and not relations:
+        for row in result:
+            yield projection.row_to_dict(row)
+    else:
+        for item in result.scalars():
+            yield item_to_dict(item, relations)
+
+# -----------------------------------------------------------------
+# --- 5. Escrituras por Conjuntos (un solo statement por orden) ---
+# -----------------------------------------------------------------
+BULK_ARITHMETIC = {'*': operator.mul, '+': operator.add}
+BULK_INSERT_PREVIEW_ROWS = 5
+
+def execute_bulk_update(db_session, Model, table, bulk):
+    """UPDATE ... SET col = col * k (o col + k) WHERE ... en un solo statement. Devuelve (filas, sql)."""
+    column = getattr(Model, bulk['field'], None)
+    if column is None:
+        raise Exception(f"Campo '{bulk['field']}' no válido para la tabla '{table}'")
+    # Un incremento fijo tiene el tipo de la columna; un porcentaje es un factor exacto (Decimal, no float)
+    amount_type = column.type if bulk['op'] == '+' else Numeric()
+
+    def build(shape):
+        stmt = update(Model).values({column: BULK_ARITHMETIC[bulk['op']](column, bindparam('amount', type_=amount_type))})
+        return {'query': stmt.where(build_scoped_filter(Model, table, shape, bind_placeholders=True)) if shape else stmt}
+
+    template, params = get_statement_template('bulk_update', Model, table, bulk['where'], build, (bulk['field'], bulk['op']))
+    params['amount'] = coerce_column_value(column, bulk['amount'], write=True) if bulk['op'] == '+' else Decimal(repr(bulk['amount']))
+    result = db_session.execute(template.statements['query'], params, execution_options={'synchronize_session': False})
+    return result.rowcount, sql_preview(db_session, template, 'query', params)
+
+def execute_bulk_delete(db_session, Model, table, predicate):
+    """DELETE ... WHERE <árbol de predicados> en un solo statement. Devuelve (filas, sql)."""
+    def build(shape):
+        return {'query': delete(Model).where(build_scoped_filter(Model, table, shape, bind_placeholders=True))}
+
+    template, params = get_statement_template('delete', Model, table, predicate, build)
+    result = db_session.execute(template.statements['query'], params, execution_options={'synchronize_session': False})
+    return result.rowcount, sql_preview(db_session, template, 'query', params)
+
+def insert_template(Model, table, columns):
+    """Plantilla ('query') del INSERT de esas columnas: el valor de cada una es el parámetro 'v_<columna>'."""
+    def build(shape):
+        table_object = Model.__table__ # INSERT de Core: la lista de parámetros se ejecuta como executemany
+        return {'query': insert(table_object).values({name: bindparam(f"v_{name}", type_=table_object.c[name].type) for name in columns})}
+
+    template, _ = get_statement_template('insert', Model, table, None, build, tuple(columns))
+    return template
+
+def insert_params(record):
+    return {f"v_{name}": value for name, value in record.items()}
+
+def execute_bulk_insert(db_session, Model, table, columns, rows):
+    """
+    INSERT de varias filas con executemany (un statement). En tablas con ID autogenerado
+    el bloque de claves se reserva de una vez con allocate_ids. Devuelve (filas, sql).
+    """
+    # Nombres en columnas de clave foránea ('Shipping' en department_id) -> su ID, desde la caché
+    records = [REFERENCE_CACHE.resolve_record(db_session, table, dict(zip(columns, row))) for row in rows]
+    if requires_auto_id(table):
+        pk_column_name = DB_SCHEMA[table]['fields'][0]
+        ids = allocate_ids(db_session, Model, table, len(records))
+        for index, record in enumerate(records):
+            record.pop(pk_column_name, None)
+            if ids is not None:
+                record[pk_column_name] = ids[index]
+    params = [insert_params(coerce_record(Model, record)) for record in records]
+    template = insert_template(Model, table, list(records[0].keys()))
+    db_session.execute(template.statements['query'], params)
+
+    previews = [sql_preview(db_session, template, 'query', row) for row in params[:BULK_INSERT_PREVIEW_ROWS]]
+    if len(records) > BULK_INSERT_PREVIEW_ROWS:
+        previews.append(f"-- {len(records) - BULK_INSERT_PREVIEW_ROWS} filas más")
+    return len(records), "\n".join(previews)
+
+# -----------------------------------------------------------------
+# --- 6. Función Principal del Agente (CON db_session) ---
+# -----------------------------------------------------------------
+def starts_conversation(user_query, conversation_state):
+    """True si la consulta no continúa un diálogo (ni la siguiente página de un SELECT)."""
+    if not conversation_state or not user_query.strip():
+        return True
+    return conversation_state.get('intent') == 'SELECT' and not is_next_page_request(user_query)
+
+def process_query(user_query, db_session: Session = None, conversation_state=None, stream=False):
+    """
+    Responde una consulta. Si empieza una conversación, antes se corrigen los typos de campos y
+    tablas ('salrio' -> 'salario') y la respuesta indica cómo se interpretó; las respuestas a un
+    diálogo (valores de un INSERT) se usan tal cual.
+    """
+    corrections = []
+    if starts_conversation(user_query, conversation_state):
+        with timed_stage('parse'):
+            user_query, corrections = correct_query(user_query)
+    return with_corrections(answer_query(user_query, db_session, conversation_state, stream), corrections)
+
+def answer_query(user_query, db_session: Session = None, conversation_state=None, stream=False):
     
     if not db_session:
          return {'agent_text': f"Error crítico: No hay conexión a la base de datos.", 'type': 'error', 'conversation_state': {}}
 
     user_query = user_query.strip()
+    # Copia propia por llamada: ni un default mutable compartido ni modificar el estado del llamador
+    conversation_state = copy.deepcopy(conversation_state) if conversation_state else {}
+
+    # Un SELECT paginado solo continúa si el usuario pide la siguiente página; si no, es una consulta nueva
+    if conversation_state.get('intent') == 'SELECT' and not is_next_page_request(user_query):
+        conversation_state = {}
     
     # Inicialización de variables para el flujo
     intent = conversation_state.get('intent', 'UNKNOWN')
     table = conversation_state.get('table')
+    plan, literals = None, []
     
     # --- A) MANEJO DE ESTADO DE CONVERSACIÓN (Diálogo Activo) ---
     if conversation_state and user_query:
@@ -68,16 +487,15 @@ def process_query(user_query, db_session: Session = None, conversation_state={})
         
     # --- B) INICIO DE NUEVA CONVERSACIÓN (o primer paso de una acción) ---
     else:
-        intent = classify_intent(user_query)
-        entities = extract_entities(user_query)
-        table = entities.get('table')
+        # Intención, tabla y predicados salen de la caché de planes (solo se reenlazan los literales)
+        plan, literals = get_query_plan(user_query)
+        intent = plan['intent']
+        table = plan['table']
         
-        initial_data = simple_data_extractor(user_query)
+        with timed_stage('parse'):
+            initial_data = simple_data_extractor(user_query)
         if intent == "UNKNOWN":
              initial_data.pop('value', None)
-        
-        if not table and intent in ["UPDATE", "DELETE"]:
-            table = 'employees'
             
         conversation_state = {
             'intent': intent,
@@ -87,6 +505,8 @@ def process_query(user_query, db_session: Session = None, conversation_state={})
             'last_asked_field': None
         }
 
+    set_request_labels(intent, table)
+
     # =========================================================================
     # --- LÓGICA DE EJECUCIÓN/DIÁLOGO ---
     # =========================================================================
@@ -97,6 +517,33 @@ def process_query(user_query, db_session: Session = None, conversation_state={})
         if not schema:
               return {'agent_text': f"Error: No tengo un esquema definido para la tabla '{table}'.", 'type': 'error', 'conversation_state': {}}
 
+        # Varias filas en la misma orden (estilo CSV): un solo INSERT, sin diálogo
+        with timed_stage('parse'):
+            bulk_rows = None if conversation_state.get('last_asked_field') else extract_bulk_rows(user_query, table)
+        if bulk_rows:
+            missing = [translate_term(f) for f in schema['required'] if f not in bulk_rows['columns']]
+            if bulk_rows['unknown'] or missing:
+                problems = [f"columnas desconocidas: {', '.join(bulk_rows['unknown'])}"] if bulk_rows['unknown'] else []
+                problems += [f"faltan columnas obligatorias: {', '.join(missing)}"] if missing else []
+                return {'agent_text': f"❌ No puedo insertar las filas ({'; '.join(problems)}).", 'type': 'error', 'conversation_state': {}}
+            bad_rows = [n for n, row in enumerate(bulk_rows['rows'], start=1) if len(row) != len(bulk_rows['columns'])]
+            if bad_rows:
+                return {'agent_text': f"❌ Las filas {', '.join(map(str, bad_rows))} no tienen {len(bulk_rows['columns'])} valores.", 'type': 'error', 'conversation_state': {}}
+            try:
+                with timed_stage('sql'):
+                    num_rows_inserted, sql_display = execute_bulk_insert(db_session, MODEL_MAP[table], table, bulk_rows['columns'], bulk_rows['rows'])
+                    db_session.commit()
+                invalidate_cached_results(table, db_session)
+                return {
+                    'agent_text': f"✅ ¡Inserción masiva realizada! Se insertaron **{num_rows_inserted}** registros en **{table}**.",
+                    'sql_statement': sql_display,
+                    'type': 'query_success',
+                    'conversation_state': {}
+                }
+            except Exception as e:
+                db_session.rollback()
+                return {'agent_text': f"❌ Error en la inserción masiva (no se insertó ninguna fila): {e}", 'sql_statement': "N/A", 'type': 'error', 'conversation_state': {}}
+
         all_required = schema['required']
         current_data = conversation_state['data_collected']
         missing = [field for field in all_required if field not in current_data]
@@ -123,20 +570,21 @@ def process_query(user_query, db_session: Session = None, conversation_state={})
                 if Model:
                     data_to_insert = {k: v for k, v in current_data.items() if k in schema['fields']}
                     if requires_auto_id(table):
-                         pk_column_name = schema['fields'][0] 
-                         PkColumn = getattr(Model, pk_column_name)
-                         max_id_result = db_session.query(PkColumn).order_by(PkColumn.desc()).first()
-                         if table == 'regions': base_id = 1
-                         elif table == 'locations': base_id = 1001
-                         elif table == 'departments': base_id = 100 
-                         else: base_id = 300
-                         current_max_id = max_id_result[0] if max_id_result else base_id
-                         data_to_insert[pk_column_name] = current_max_id + 1
+                         # La clave la asigna la secuencia de la BD en el propio INSERT: sin escanear
+                         # el máximo y sin colisiones entre peticiones concurrentes
+                         pk_column_name = schema['fields'][0]
+                         data_to_insert.pop(pk_column_name, None)
                     
-                    new_record = Model(**data_to_insert)
-                    db_session.add(new_record)
-                    db_session.commit()
-                    sql_display = f"INSERT INTO {table} ({', '.join(data_to_insert.keys())}) VALUES ({', '.join([f'{v!r}' for v in data_to_insert.values()])});"
+                    data_to_insert = REFERENCE_CACHE.resolve_record(db_session, table, data_to_insert)
+                    new_record = Model(**coerce_record(Model, data_to_insert))
+                    with timed_stage('sql'):
+                        db_session.add(new_record)
+                        db_session.flush() # Obtiene la clave generada sin un SELECT extra tras el commit
+                        if requires_auto_id(table):
+                             data_to_insert = {pk_column_name: getattr(new_record, pk_column_name), **data_to_insert}
+                        db_session.commit()
+                    invalidate_cached_results(table, db_session)
+                    sql_display = sql_preview(db_session, insert_template(Model, table, list(data_to_insert)), 'query', insert_params(coerce_record(Model, data_to_insert)))
                     return {
                         'agent_text': f"✅ ¡Inserción realizada con éxito en **{table}**!",
                         'sql_statement': sql_display,
@@ -163,37 +611,128 @@ def process_query(user_query, db_session: Session = None, conversation_state={})
             if not Model:
                 return {'agent_text': f"No se encontró el modelo para {table}.", 'type': 'error', 'conversation_state': {}}
 
-            conditions = extract_conditions(user_query, table)
-            query = db_session.query(Model)
-            sql_display_condition = ""
-
-            if conditions:
-                condition = conditions[0]
-                field = condition['field']
-                value = condition['value']
-                op = condition['op']
-                column = getattr(Model, field, None)
-                if column is None:
-                     raise Exception(f"Campo '{field}' no válido para la tabla '{table}'")
-
-                if op == '>': query = query.filter(column > value)
-                elif op == '<': query = query.filter(column < value)
-                elif op == '==': query = query.filter(column == value)
-                elif op == '!=': query = query.filter(column != value)
-                sql_display_condition = f" WHERE {field} {op} {value}"
-            
-            results = query.limit(10).all() 
-            data_list = [map_to_dict_dynamic(item, MODEL_MAP) for item in results]
-            
+            # Si venimos de una página anterior, el cursor trae el filtro y la última clave vista
+            cursor = conversation_state.get('cursor')
+            if cursor:
+                cursor_data = decode_cursor(cursor)
+                predicate = cursor_data.get('predicate')
+                after_key = cursor_data.get('after')
+                relations = cursor_data.get('relations') or []
+                value_corrections = []
+            else:
+                if plan is None:
+                    plan, literals = get_query_plan(user_query)
+                predicate = bind_literals(plan['predicate'], literals) if plan['is_template'] else plan['predicate']
+                relations = plan['relations']
+                after_key = None
+                # Nombres de tablas de referencia: corregidos ('Shiping' -> 'Shipping') y traducidos a
+                # claves (department_id = 50, sin JOIN)
+                predicate, value_corrections = REFERENCE_CACHE.resolve_predicate(db_session, table, predicate)
+
+            # Sentencia preparada por forma del filtro: aquí solo se enlazan los valores
+            template, params = select_template(Model, table, predicate, after_key, relations)
+            FILTER_USAGE.record(table, predicate)
+            projection = PROJECTION_MAP[table]
+
+            if stream:
+                return {
+                    'agent_text': f"Exportando los registros de **{table}** en streaming (NDJSON).",
+                    'sql_statement': sql_preview(db_session, template, 'stream', params),
+                    'type': 'query_stream',
+                    'stream': stream_query_rows(db_session, template.statements['stream'], projection, params, relations),
+                    'conversation_state': {}
+                }
+
+            # Pedimos una fila extra para saber si hay más páginas sin hacer un COUNT
+            cached = None
+            if RESULT_CACHE is not None:
+                cache_key = result_cache_key(predicate, after_key, SELECT_PAGE_SIZE, relations)
+                cached = RESULT_CACHE.get(table, cache_key)
+            if cached is not None:
+                data_list, keys = cached
+            else:
+                data_list, keys = fetch_select_rows(db_session, template.statements['page'], projection, params, relations)
+                if RESULT_CACHE is not None:
+                    RESULT_CACHE.set(table, cache_key, [data_list, keys], select_dependencies(Model, table, predicate, relations))
+            sql_statement = sql_preview(db_session, template, 'page', params)
+            return with_corrections(select_page_response(table, predicate, relations, data_list, keys, sql_statement), value_corrections)
+        except Exception as e:
+            return {'agent_text': f"❌ Error al consultar la BD: {e}", 'type': 'error', 'conversation_state': {}}
+
+    # --- D1) LÓGICA DE AGREGACIONES (COUNT/SUM/AVG/MIN/MAX con GROUP BY en la BD) ---
+    elif intent == "AGGREGATE":
+        with timed_stage('parse'):
+            aggregation = extract_aggregation(user_query)
+        if not aggregation or (aggregation['func'] != 'count' and not aggregation['field']):
+            return {'agent_text': "Indica qué calcular y sobre qué campo (ej. 'salario promedio por departamento' o 'cuántos empleados hay').", 'type': 'dialog_needed', 'conversation_state': {}}
+        try:
+            table = aggregation['table']
+            set_request_labels(intent, table)
+            Model = MODEL_MAP[table]
+            aggregation['where'], value_corrections = REFERENCE_CACHE.resolve_predicate(db_session, table, qualify_predicate(table, aggregation['where']))
+            FILTER_USAGE.record(table, aggregation['where'])
+            template, params = aggregate_template(Model, aggregation)
+            with timed_stage('sql'):
+                rows = db_session.execute(template.statements['query'], params).all()
+
+            label = aggregate_label(aggregation)
+            group_keys = [field.upper() for field in aggregation['group_by']]
+            with timed_stage('hydrate'):
+                data_list = [
+                    {**dict(zip(group_keys, row[:-1])), label: _aggregate_value(row[-1], aggregation['func'])}
+                    for row in rows
+                ]
+            add_rows(len(data_list))
+            description = translate_term(aggregation['field']) if aggregation['field'] else "registros"
+            func_text = AGGREGATE_NAMES[aggregation['func']]
+            summary = f"Calculé **{func_text}** de **{description}** en **{translate_term(table)}**"
+            if group_keys:
+                groups_text = ', '.join(translate_term(field) for field in aggregation['group_by'])
+                agent_text = f"{summary} por **{groups_text}** ({len(data_list)} grupos)."
+            else:
+                agent_text = f"{summary}: **{data_list[0][label] if data_list else 0}**."
+            return with_corrections({
+                'agent_text': agent_text,
+                'sql_statement': sql_preview(db_session, template, 'query', params),
+                'type': 'query_result',
+                'data': data_list,
+                'conversation_state': {}
+            }, value_corrections)
+        except Exception as e:
+            return {'agent_text': f"❌ Error al calcular la agregación: {e}", 'type': 'error', 'conversation_state': {}}
+
+    # --- D2) LÓGICA ORGANIGRAMA (WITH RECURSIVE en un solo round trip) ---
+    elif intent == "HIERARCHY":
+        with timed_stage('parse'):
+            request = extract_hierarchy_request(user_query)
+        if not request:
+            return {'agent_text': "Indica el **ID del empleado** (ej. 'subordinados de 100' o 'cadena de mando de 206').", 'type': 'dialog_needed', 'conversation_state': {}}
+        try:
+            projection = PROJECTION_MAP['employees']
+            template, params = hierarchy_template(request['direction'])
+            params.update(root_id=request['root_id'], max_depth=request['max_depth'])
+            with timed_stage('sql'):
+                rows = db_session.execute(template.statements['query'], params).all()
+            with timed_stage('hydrate'):
+                data_list = [{**projection.row_to_dict(row), 'NIVEL': row[-1]} for row in rows]
+            add_rows(len(data_list))
+
+            label = "subordinados" if request['direction'] == 'down' else "superiores en la cadena de mando"
+            depth_text = ""
+            if request['max_depth'] < HIERARCHY_MAX_DEPTH:
+                depth_text = f" (hasta {request['max_depth']} {'nivel' if request['max_depth'] == 1 else 'niveles'})"
+            agent_text = f"Se encontraron **{len(data_list)}** {label} del empleado **{request['root_id']}**{depth_text}."
+            if not data_list:
+                agent_text = f"⚠️ El empleado **{request['root_id']}** no tiene {label} (o no existe)."
             return {
-                'agent_text': f"Mostrando los primeros {len(data_list)} registros de **{table}** encontrados.",
-                'sql_statement': f"SELECT * FROM {table}{sql_display_condition} LIMIT 10;",
+                'agent_text': agent_text,
+                'sql_statement': sql_preview(db_session, template, 'query', params),
                 'type': 'query_result',
                 'data': data_list,
                 'conversation_state': {}
             }
         except Exception as e:
-            return {'agent_text': f"❌ Error al consultar la BD: {e}", 'type': 'error', 'conversation_state': {}}
+            return {'agent_text': f"❌ Error al consultar el organigrama: {e}", 'type': 'error', 'conversation_state': {}}
 
     # --- E) LÓGICA UPDATE, DELETE y ERRORES ---
     elif intent == "UPDATE" and table:
@@ -202,8 +741,24 @@ def process_query(user_query, db_session: Session = None, conversation_state={})
             if not Model:
                 raise Exception(f"Modelo no encontrado para la tabla {table}.")
 
+            # 0. Actualización aritmética por conjuntos ('aumentar salario 10% a empleados del departamento 50')
+            with timed_stage('parse'):
+                bulk = extract_bulk_update(user_query, table)
+            if bulk:
+                # Como en el SELECT: nombres corregidos y traducidos a claves de la propia tabla
+                bulk['where'], value_corrections = REFERENCE_CACHE.resolve_predicate(db_session, table, qualify_predicate(table, bulk['where']))
+                FILTER_USAGE.record(table, bulk['where'])
+                if not bulk['where'] and not bulk['all_rows']:
+                    return {'agent_text': "Para actualizar en bloque necesito la condición **WHERE** (ej. 'del departamento 50') o que indiques **todos**.", 'type': 'dialog_needed', 'conversation_state': {}}
+                with timed_stage('sql'):
+                    num_rows_updated, sql_statement = execute_bulk_update(db_session, Model, table, bulk)
+                    db_session.commit()
+                invalidate_cached_results(table, db_session)
+                return with_corrections({'agent_text': f"✅ Actualización masiva exitosa! Se modificaron **{num_rows_updated}** registros.", 'sql_statement': sql_statement, 'type': 'query_success' if num_rows_updated else 'status', 'conversation_state': {}}, value_corrections)
+
             # 1. Intentar extraer el SET y WHERE de una sola frase (usa parsing.py)
-            update_params = extract_update_params(user_query)
+            with timed_stage('parse'):
+                update_params = extract_update_params(user_query)
 
             if not update_params:
                  return {'agent_text': "Para actualizar, necesito la condición **SET** (ej. 'salario a 25000') Y la condición **WHERE** (ej. 'donde ID es 100').", 'type': 'dialog_needed', 'conversation_state': {}}
@@ -212,49 +767,34 @@ def process_query(user_query, db_session: Session = None, conversation_state={})
             set_cond = update_params['set_cond']
             where_cond = update_params['where_cond']
             
-            # 2. Conversión de Tipos (Manejo de IDs, Salarios, etc.)
-            
-            # Para el valor SET (el nuevo valor a asignar)
+            # 2. Obtener Columnas y Convertir los Valores a su Tipo (Integer, Numeric, String, Date)
             set_value_raw = set_cond['value']
-            try:
-                # Intentamos convertir a numérico (útil para salary, commission_pct)
-                set_value_typed = float(set_value_raw)
-            except ValueError:
-                # Si no es numérico, lo dejamos como string (nombre, apellido, email)
-                set_value_typed = set_value_raw
-
-            # Para la condición WHERE (clave de búsqueda)
             where_value_raw = where_cond['value']
-            try:
-                # Intentamos convertir a entero (útil para todos los IDs)
-                where_value_typed = int(where_value_raw) 
-            except ValueError:
-                # Si no es entero, lo dejamos como string (apellido, nombre del depto, etc.)
-                where_value_typed = where_value_raw
-
-            
-            # 3. Obtener Columnas y Preparar Data
             where_column = getattr(Model, where_cond['field'], None)
             set_column = getattr(Model, set_cond['field'], None)
 
             if where_column is None or set_column is None:
                  raise Exception(f"Uno de los campos (SET: {set_cond['field']} o WHERE: {where_cond['field']}) no es válido.")
-                
-            update_data = {set_column: set_value_typed}
-            
-            # 4. Ejecución del UPDATE con SQLAlchemy
-            # Filtramos por la condición WHERE y ejecutamos el UPDATE con los datos SET
-            num_rows_updated = db_session.query(Model).filter(
-                where_column == where_value_typed 
-            ).update(update_data, synchronize_session=False) 
+            # Un valor imposible ('abc' para el salario, un nombre demasiado largo) se rechaza aquí, sin ir a la BD
+            set_value_typed = coerce_column_value(set_column, set_value_raw, write=True)
+            where_value_typed = coerce_column_value(where_column, where_value_raw)
 
-            db_session.commit()
-            
-            # 5. Generación del SQL para visualización
-            # Usamos los valores sin tipado para que se vean como el usuario los escribió
-            sql_statement = f"UPDATE {table} SET {set_cond['field']} = '{set_value_raw}' WHERE {where_cond['field']} = '{where_value_raw}';"
-            
-            # 6. Retorno de Respuesta
+            # 3. Ejecución del UPDATE con la plantilla (SET y WHERE como parámetros enlazados)
+            def build(shape):
+                stmt = update(Model).where(where_column == bindparam('where_value', type_=where_column.type))
+                return {'query': stmt.values({set_column: bindparam('set_value', type_=set_column.type)})}
+
+            template, params = get_statement_template('update', Model, table, None, build, (set_cond['field'], where_cond['field']))
+            params.update(set_value=set_value_typed, where_value=where_value_typed)
+            with timed_stage('sql'):
+                num_rows_updated = db_session.execute(template.statements['query'], params, execution_options={'synchronize_session': False}).rowcount
+                db_session.commit()
+            invalidate_cached_results(table, db_session)
+
+            # 4. SQL para visualización: la misma sentencia, con los valores ya tipados
+            sql_statement = sql_preview(db_session, template, 'query', params)
+
+            # 5. Retorno de Respuesta
             if num_rows_updated > 0:
                 return {'agent_text': f"✅ Actualización exitosa! Se modificaron **{num_rows_updated}** registros.", 'sql_statement': sql_statement, 'type': 'query_success', 'conversation_state': {}}
             else:
@@ -272,44 +812,28 @@ def process_query(user_query, db_session: Session = None, conversation_state={})
                 raise Exception(f"Modelo no encontrado para la tabla {table}.")
 
             # 1. Extracción de la Condición WHERE (quién o qué eliminar)
-            # Reutilizamos extract_conditions para el filtro
-            where_conditions = extract_conditions(user_query, table)
+            # El árbol de predicados admite varias condiciones (y/o, entre, en) y respeta el operador
+            with timed_stage('parse'):
+                where_predicate = qualify_predicate(table, extract_predicate_tree(user_query, table))
 
-            if not where_conditions:
+            if not where_predicate:
                  return {'agent_text': "Para eliminar, necesito la condición **WHERE** (ej. 'donde ID es 206').", 'type': 'dialog_needed', 'conversation_state': {}}
-                 
-            # --- PREPARACIÓN ---
-            where_cond = where_conditions[0]
-            where_value_raw = where_cond['value']
-
-            # Conversión de Tipos (Aseguramos el tipo correcto, ej. entero para IDs)
-            try:
-                # Intentamos convertir a entero para IDs
-                where_value_typed = int(where_value_raw) 
-            except ValueError:
-                # Si no es entero, lo dejamos como string
-                where_value_typed = where_value_raw
-            
-            where_column = getattr(Model, where_cond['field'], None)
 
-            if where_column is None:
-                 raise Exception(f"El campo WHERE '{where_cond['field']}' no es válido.")
-            
-            # 2. Ejecución del DELETE con SQLAlchemy
-            num_rows_deleted = db_session.query(Model).filter(
-                where_column == where_value_typed 
-            ).delete(synchronize_session=False) # Usamos synchronize_session=False para una operación rápida
-            
-            db_session.commit()
-            
-            # 3. Generación del SQL para visualización
-            sql_statement = f"DELETE FROM {table} WHERE {where_cond['field']} = '{where_value_raw}';"
+            # Como en el SELECT: nombres corregidos y traducidos a claves de la propia tabla
+            where_predicate, value_corrections = REFERENCE_CACHE.resolve_predicate(db_session, table, where_predicate)
+            FILTER_USAGE.record(table, where_predicate)
+            # 2. Ejecución del DELETE con un solo statement
+            with timed_stage('sql'):
+                num_rows_deleted, sql_statement = execute_bulk_delete(db_session, Model, table, where_predicate)
+                db_session.commit()
+            invalidate_cached_results(table, db_session)
             
-            # 4. Retorno de Respuesta
+            # 3. Retorno de Respuesta
             if num_rows_deleted > 0:
-                return {'agent_text': f"✅ Eliminación exitosa! Se borraron **{num_rows_deleted}** registros.", 'sql_statement': sql_statement, 'type': 'query_success', 'conversation_state': {}}
+                response = {'agent_text': f"✅ Eliminación exitosa! Se borraron **{num_rows_deleted}** registros.", 'sql_statement': sql_statement, 'type': 'query_success', 'conversation_state': {}}
             else:
-                return {'agent_text': f"⚠️ No se encontró ningún registro para eliminar con la condición {where_cond['field']} = {where_value_raw}.", 'sql_statement': sql_statement, 'type': 'status', 'conversation_state': {}}
+                response = {'agent_text': f"⚠️ No se encontró ningún registro para eliminar con la condición {render_predicate(where_predicate)}.", 'sql_statement': sql_statement, 'type': 'status', 'conversation_state': {}}
+            return with_corrections(response, value_corrections)
             
         except Exception as e:
             db_session.rollback()
@@ -326,4 +850,30 @@ def process_query(user_query, db_session: Session = None, conversation_state={})
         'agent_text': f"Entendí la intención: **{intent}**. Pero aún no tengo la lógica para ejecutar esta acción.",
         'type': 'status', 
         'conversation_state': {}
-    }
\ No newline at end of file
+    }
+
+# -----------------------------------------------------------------
+# --- 7. Contraparte Asíncrona (SQLAlchemy asyncio) ---
+# -----------------------------------------------------------------
+async def process_query_async(user_query, async_session, conversation_state=None, stream=False):
+    """
+    Versión async de process_query sobre una AsyncSession (asyncpg / aiosqlite).
+    La lógica del agente se ejecuta con run_sync: el mismo código síncrono, pero cada
+    round trip a la BD cede el event loop, así que un solo proceso atiende cientos de
+    conversaciones sin un hilo por petición.
+    """
+    response = await async_session.run_sync(
+        lambda session: process_query(user_query, db_session=session, conversation_state=conversation_state, stream=stream)
+    )
+    if 'stream' in response:
+        response['stream'] = _stream_rows_async(async_session, response['stream'])
+    return response
+
+async def _stream_rows_async(async_session, rows):
+    """Consume el generador síncrono por lotes, cada lote dentro de run_sync."""
+    while True:
+        batch = await async_session.run_sync(lambda session: list(islice(rows, STREAM_BATCH_SIZE)))
+        if not batch:
+            return
+        for row in batch:
+            yield row
@@ -0,0 +1,171 @@
+# db_pool.py
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+from config import (
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS, DB_COMPILED_CACHE_SIZE, DB_PREPARED_STATEMENT_CACHE_SIZE
+)
+
+# --- 1. Métricas del Pool ---
+class PoolMetrics:
+    """Contadores del pool de conexiones para dimensionarlo con carga real."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.soft_invalidations = 0
+            self.timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+            self.overflow_peak = 0
+            self._pool = None
+
+    def record_checkout(self, pool, wait_seconds):
+        with self._lock:
+            self._pool = pool
+            self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+            self.overflow_peak = max(self.overflow_peak, pool.overflow(), 0)
+
+    def record_timeout(self, wait_seconds):
+        with self._lock:
+            self.timeouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def increment(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            pool = self._pool
+            return {
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+                'soft_invalidations': self.soft_invalidations,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_avg': round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+                'overflow_peak': self.overflow_peak,
+                'pool_size': pool.size() if pool else DB_POOL_SIZE,
+                'checked_out': pool.checkedout() if pool else 0,
+                'overflow': max(pool.overflow(), 0) if pool else 0, # Negativo = conexiones aún no abiertas
+            }
+
+POOL_METRICS = PoolMetrics()
+
+
+# --- 2. Pool Instrumentado ---
+class _InstrumentedPoolMixin:
+    """Mide cuánto espera cada petición para obtener una conexión."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            POOL_METRICS.record_timeout(time.perf_counter() - start)
+            raise
+        POOL_METRICS.record_checkout(self, time.perf_counter() - start)
+        return connection
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """QueuePool (engine síncrono de Flask) con métricas."""
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool (engine asyncio) con las mismas métricas."""
+
+def _on_connect(dbapi_connection, connection_record):
+    POOL_METRICS.increment('connects')
+
+def _on_checkin(dbapi_connection, connection_record):
+    POOL_METRICS.increment('checkins')
+
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    POOL_METRICS.increment('invalidations')
+
+def _on_soft_invalidate(dbapi_connection, connection_record, exception):
+    POOL_METRICS.increment('soft_invalidations')
+
+POOL_LISTENERS = {
+    'connect': _on_connect,
+    'checkin': _on_checkin,
+    'invalidate': _on_invalidate,
+    'soft_invalidate': _on_soft_invalidate,
+}
+
+def instrument_pool(target):
+    """Registra los contadores de conexión en una clase de pool o en un pool concreto."""
+    for identifier, listener in POOL_LISTENERS.items():
+        event.listen(target, identifier, listener)
+
+instrument_pool(InstrumentedQueuePool)
+# El pool async no admite listeners a nivel de clase: se instrumenta la instancia (ver api_async.py)
+
+
+# --- 3. Opciones del Engine ---
+def build_engine_options(db_url):
+    """Opciones de create_engine para SQLALCHEMY_ENGINE_OPTIONS según el tipo de base de datos."""
+    # query_cache_size: la caché de sentencias compiladas debe abarcar todas las plantillas en uso
+    options = {'pool_pre_ping': DB_POOL_PRE_PING, 'pool_recycle': DB_POOL_RECYCLE, 'query_cache_size': DB_COMPILED_CACHE_SIZE}
+    if db_url.startswith('sqlite') and (':memory:' in db_url or db_url.rstrip('/') == 'sqlite:'):
+        # SQLite en memoria usa su propio pool de una sola conexión
+        return options
+    options.update({
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+    })
+    if db_url.startswith('postgresql'):
+        options['connect_args'] = {'options': f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}'}
+    return options
+
+
+# --- 4. Engine Asíncrono (asyncpg / aiosqlite) ---
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+def to_async_url(db_url):
+    """Traduce la URL síncrona al driver asyncio equivalente ('postgresql://' -> 'postgresql+asyncpg://')."""
+    scheme, rest = db_url.split('://', 1)
+    async_url = f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+    if async_url.startswith('postgresql+asyncpg') and 'prepared_statement_cache_size' not in rest:
+        # asyncpg prepara cada sentencia en el servidor: una caché por conexión evita repetir el PREPARE
+        async_url += f"{'&' if '?' in rest else '?'}prepared_statement_cache_size={DB_PREPARED_STATEMENT_CACHE_SIZE}"
+    return async_url
+
+def build_async_engine_options(async_db_url):
+    """Opciones de create_async_engine: mismo dimensionado de pool que el engine síncrono."""
+    options = {'pool_pre_ping': DB_POOL_PRE_PING, 'pool_recycle': DB_POOL_RECYCLE, 'query_cache_size': DB_COMPILED_CACHE_SIZE}
+    if ':memory:' in async_db_url:
+        return options
+    options.update({
+        'poolclass': InstrumentedAsyncQueuePool,
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+    })
+    if async_db_url.startswith('postgresql+asyncpg'):
+        # asyncpg no acepta 'options': el timeout va como parámetro de servidor
+        options['connect_args'] = {'server_settings': {'statement_timeout': str(DB_STATEMENT_TIMEOUT_MS)}}
+    return options
@@ -0,0 +1,70 @@
+# eager_loading.py
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+
+from config import NAME_COLUMNS, LOADING_PROFILES
+
+# Perfiles con nombre -> opción de carga de SQLAlchemy
+LOADER_STRATEGIES = {'joined': joinedload, 'selectin': selectinload}
+
+# --- 1. Opciones de Carga por Ruta de Relaciones ---
+def relation_profile(attribute):
+    """Perfil de una relación según su tipo: 'joined' (muchos-a-uno) o 'selectin' (colección)."""
+    kind = 'one_to_many' if attribute.property.uselist else 'many_to_one'
+    return LOADING_PROFILES[kind]
+
+def loader_option(Model, path):
+    """
+    Opción encadenada para una ruta 'department.location': cada tramo con el perfil de su tipo,
+    así la página entera se resuelve en un número fijo de consultas (no una por fila).
+    """
+    option, current = None, Model
+    for name in path.split('.'):
+        # inspect() configura los mappers: las relaciones creadas por backref ('department') ya existen
+        if name not in inspect(current).relationships:
+            raise Exception(f"Relación '{path}' no válida para {Model.__tablename__}")
+        attribute = getattr(current, name)
+        strategy = LOADER_STRATEGIES[relation_profile(attribute)]
+        option = strategy(attribute) if option is None else getattr(option, strategy.__name__)(attribute)
+        current = attribute.property.mapper.class_
+    return option
+
+def loader_options(Model, relations):
+    return [loader_option(Model, path) for path in relations]
+
+def relation_tables(Model, relations):
+    """Tablas que recorren las rutas de relaciones ('department.location' -> departments, locations)."""
+    tables = []
+    for path in relations:
+        current = Model
+        for name in path.split('.'):
+            current = getattr(current, name).property.mapper.class_
+            tables.append(current.__tablename__)
+    return list(dict.fromkeys(tables))
+
+# --- 2. Valores de las Relaciones para la Salida ---
+def display_name(item):
+    """Nombre legible de un registro relacionado (NAME_COLUMNS o 'nombre apellido' en employees)."""
+    if item is None:
+        return None
+    table = item.__tablename__
+    if table in NAME_COLUMNS:
+        return getattr(item, NAME_COLUMNS[table])
+    if table == 'employees':
+        return f"{item.first_name} {item.last_name}"
+    return str(item)
+
+def relation_value(item, path):
+    """Sigue la ruta ya cargada; una colección se devuelve como lista de nombres."""
+    value = item
+    for name in path.split('.'):
+        if value is None:
+            return None
+        value = getattr(value, name)
+    if isinstance(value, list):
+        return [display_name(related) for related in value]
+    return display_name(value)
+
+def relation_key(path):
+    """'department.location' -> 'DEPARTMENT_LOCATION' (mismo estilo que las columnas)."""
+    return path.replace('.', '_').upper()
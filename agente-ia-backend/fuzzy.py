@@ -0,0 +1,190 @@
+# fuzzy.py
+"""
+Resolución aproximada (typos y tildes) de términos de la consulta.
+- Campos y tablas: un índice de trigramas sobre el vocabulario de FIELD_MAP, TRANSLATION_MAP y
+  DB_SCHEMA, construido una sola vez; los candidatos que comparten trigramas se confirman con
+  una distancia de edición acotada ('salrio' -> 'salario', 'phone_number' -> 'telefono').
+- Valores: reference_cache.py usa NgramIndex sobre los nombres de las tablas de referencia
+  ('departamento Shiping' -> 'Shipping').
+"""
+import re
+from collections import Counter, defaultdict
+
+from config import (
+    FIELD_MAP, TRANSLATION_MAP, DB_SCHEMA, OPERATOR_MAP, LOGIC_CONNECTORS, BETWEEN_KEYWORDS, IN_KEYWORDS,
+    NEXT_PAGE_KEYWORDS, INCREASE_KEYWORDS, DECREASE_KEYWORDS, ALL_ROWS_KEYWORDS, INTENT_KEYWORDS,
+    TABLE_KEYWORDS, DOWN_KEYWORDS, UP_KEYWORDS, DIRECT_KEYWORDS, AGGREGATE_KEYWORDS, RELATION_KEYWORDS,
+    FUZZY_NGRAM_SIZE, FUZZY_MIN_TERM_LENGTH, FUZZY_STOP_WORDS
+)
+from classifier import fold_accents, tokenize
+
+_WORD_RE = re.compile(r"\w+")
+
+# --- 1. Distancia de Edición e Índice de N-gramas ---
+def max_distance(length):
+    """Errores admitidos según la longitud del término: ninguno en palabras cortas."""
+    if length < FUZZY_MIN_TERM_LENGTH:
+        return 0
+    return 1 if length < 9 else 2
+
+def edit_distance(a, b, limit):
+    """
+    Distancia de Damerau-Levenshtein (transposiciones adyacentes incluidas) acotada:
+    devuelve limit + 1 en cuanto la distancia no puede quedar por debajo del límite.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if before is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                value = min(value, before[j - 2] + 1)
+            current[j] = value
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+class NgramIndex:
+    """
+    Índice invertido trigrama -> términos. lookup() solo calcula la distancia de edición de los
+    pocos términos que más trigramas comparten con el buscado, no de todo el vocabulario.
+    """
+
+    def __init__(self, n=FUZZY_NGRAM_SIZE, candidates=8):
+        self.n = n
+        self.candidates = candidates
+        self._terms = {}
+        self._postings = defaultdict(set)
+
+    def __len__(self):
+        return len(self._terms)
+
+    def _grams(self, term):
+        padded = f" {term} "
+        return {padded[i:i + self.n] for i in range(len(padded) - self.n + 1)}
+
+    def add(self, term, payload):
+        if term in self._terms:
+            return
+        self._terms[term] = payload
+        for gram in self._grams(term):
+            self._postings[gram].add(term)
+
+    def get(self, term):
+        return self._terms.get(term)
+
+    def lookup(self, term):
+        """
+        (término, payload, distancia) del más parecido: menor distancia; a igual distancia, más
+        trigramas en común y antes un término que se corrige a sí mismo (palabra del vocabulario en
+        español) que un nombre de la BD. None si no hay ninguno o si el empate persiste.
+        """
+        if term in self._terms:
+            return term, self._terms[term], 0
+        limit = max_distance(len(term))
+        if not limit:
+            return None
+        overlap = Counter()
+        for gram in self._grams(term):
+            overlap.update(self._postings.get(gram, ()))
+        best, payloads = None, set()
+        for candidate, shared in overlap.most_common(self.candidates):
+            distance = edit_distance(term, candidate, limit)
+            if distance > limit:
+                continue
+            rank = (distance, -shared, self._terms[candidate] != candidate)
+            if best is None or rank < best[0]:
+                best, payloads = (rank, candidate), {self._terms[candidate]}
+            elif rank == best[0]:
+                payloads.add(self._terms[candidate])
+        if best is None or len(payloads) > 1:
+            return None # Ambiguo: mejor no adivinar
+        return best[1], self._terms[best[1]], best[0][0]
+
+
+# --- 2. Corrección de Campos y Tablas en la Consulta ---
+def _words(phrases):
+    return {token for phrase in phrases for token in tokenize(phrase)}
+
+def _canonical_aliases():
+    """Columna o tabla de DB_SCHEMA -> alias en español que entiende el parser."""
+    aliases = {}
+    for alias, column in FIELD_MAP.items():
+        aliases.setdefault(column, alias) # El primer alias de cada columna en FIELD_MAP
+    for name, translation in TRANSLATION_MAP.items():
+        aliases.setdefault(name, fold_accents(translation))
+    return aliases
+
+class FieldResolver:
+    """
+    Corrige las palabras desconocidas de una consulta hacia el vocabulario de campos y tablas.
+    Las palabras clave (intenciones, operadores, conectores...) y los nombres propios en
+    mayúscula (valores como 'Seattle' o 'King') nunca se tocan.
+    """
+
+    def __init__(self):
+        self.index = NgramIndex()
+        vocabulary = _words(list(FIELD_MAP) + list(TRANSLATION_MAP.values()))
+        for word in vocabulary:
+            self.index.add(word, word)
+        # Nombres de la BD ('salary', 'phone_number', 'employees') -> su alias en español
+        canonical = _canonical_aliases()
+        for table, schema in DB_SCHEMA.items():
+            for name in [table] + schema['fields']:
+                if name in canonical:
+                    self.index.add(name, canonical[name])
+        keywords = [OPERATOR_MAP, LOGIC_CONNECTORS, BETWEEN_KEYWORDS, IN_KEYWORDS, NEXT_PAGE_KEYWORDS,
+                    INCREASE_KEYWORDS, DECREASE_KEYWORDS, ALL_ROWS_KEYWORDS, DOWN_KEYWORDS, UP_KEYWORDS,
+                    DIRECT_KEYWORDS, FUZZY_STOP_WORDS]
+        keywords += list(INTENT_KEYWORDS.values()) + list(TABLE_KEYWORDS.values())
+        keywords += list(AGGREGATE_KEYWORDS.values()) + list(RELATION_KEYWORDS.values())
+        self.vocabulary = vocabulary
+        self.known = vocabulary | {word for phrases in keywords for word in _words(phrases)}
+
+    def correct(self, text):
+        """
+        Devuelve (texto corregido, [(término original, corrección)]). Las palabras con tilde del
+        vocabulario se escriben sin ella ('comisión' -> 'comision') sin contarlas como corrección.
+        """
+        folded = fold_accents(text)
+        if len(folded) != len(text):
+            return text, [] # Sin correspondencia de posiciones con el original
+        pieces, corrections, position = [], [], 0
+        for match in _WORD_RE.finditer(folded):
+            word, start, end = match.group(), match.start(), match.end()
+            original = text[start:end]
+            if word in self.known:
+                if original.lower() != word and word in self.vocabulary:
+                    pieces += [text[position:start], word]
+                    position = end
+                continue
+            # Nombres propios y literales con dígitos (incluidos los marcadores '__N__') son valores
+            if original[0].isupper() or any(char.isdigit() for char in word):
+                continue
+            found = self.index.lookup(word)
+            if found is None:
+                continue
+            replacement = found[1]
+            pieces += [text[position:start], replacement]
+            position = end
+            corrections.append((original, replacement))
+        if position == 0:
+            return text, []
+        pieces.append(text[position:])
+        return "".join(pieces), corrections
+
+
+# --- 3. Aviso al Usuario ---
+def with_corrections(response, corrections):
+    """Añade a la respuesta las correcciones aplicadas, para que el usuario vea cómo se interpretó."""
+    if not corrections:
+        return response
+    notes = ", ".join(f"'{original}' como '{replacement}'" for original, replacement in corrections)
+    response['agent_text'] = f"{response['agent_text']} (Interpreté {notes}.)"
+    response['corrections'] = response.get('corrections', []) + [
+        {'original': original, 'corrected': replacement} for original, replacement in corrections
+    ]
+    return response
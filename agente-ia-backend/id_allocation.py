@@ -0,0 +1,28 @@
+# id_allocation.py
+from sqlalchemy import Sequence, select, text
+
+from config import DB_SCHEMA
+
+# --- Asignación de IDs con Secuencias de la BD ---
+def get_id_sequence(Model, table):
+    """Devuelve la Sequence declarada en la clave primaria del modelo (o None)."""
+    pk_column = Model.__table__.c[DB_SCHEMA[table]['fields'][0]]
+    return pk_column.default if isinstance(pk_column.default, Sequence) else None
+
+def allocate_ids(db_session, Model, table, count):
+    """
+    Reserva un bloque de `count` IDs en UN solo round trip (nextval sobre generate_series).
+    Los valores son únicos entre peticiones concurrentes. Devuelve None si el motor no usa
+    secuencias (ej. SQLite): en ese caso se omite la clave y la asigna la propia BD.
+    """
+    sequence = get_id_sequence(Model, table)
+    dialect = db_session.get_bind().dialect
+    if sequence is None or not dialect.supports_sequences:
+        return None
+    if dialect.name == 'postgresql':
+        result = db_session.execute(
+            text("SELECT nextval(:sequence) FROM generate_series(1, :count)"),
+            {'sequence': sequence.name, 'count': count}
+        )
+        return [row[0] for row in result]
+    return [db_session.execute(select(sequence.next_value())).scalar() for _ in range(count)]
@@ -0,0 +1,160 @@
+# index_advisor.py
+import threading
+from collections import Counter
+
+from sqlalchemy import inspect, text
+
+from config import INDEX_ADVICE_MIN_USES
+from join_planner import SCHEMA_TABLES, join_plan
+
+RANGE_OPERATORS = {'>', '<', 'between'}
+INDEXABLE_OPERATORS = {'==', 'in', '>', '<', 'between'} # '!=' no aprovecha un índice B-tree
+
+# --- 1. Registro de los Filtros Ejecutados ---
+def _leaf_column(table, field):
+    """'salary' -> ('employees', 'salary'); 'locations.city' (cualificado por el join planner) -> ('locations', 'city')."""
+    return tuple(field.split('.', 1)) if '.' in field else (table, field)
+
+def _collect(table, predicate, leaves, pairs):
+    if 'logic' in predicate:
+        for child in predicate['conditions']:
+            _collect(table, child, leaves, pairs)
+        if predicate['logic'] == 'and':
+            # Igualdad + rango sobre la misma tabla en un AND: candidato a índice compuesto (igualdad primero)
+            direct = [(*_leaf_column(table, child['field']), child['op']) for child in predicate['conditions'] if 'logic' not in child]
+            for eq_table, eq_field, eq_op in direct:
+                for range_table, range_field, range_op in direct:
+                    if eq_op in ('==', 'in') and range_op in RANGE_OPERATORS and eq_table == range_table and eq_field != range_field:
+                        pairs.append((eq_table, eq_field, range_field))
+        return
+    leaves.append((*_leaf_column(table, predicate['field']), predicate['op']))
+
+class FilterUsage:
+    """Contadores en el proceso de los filtros que ejecuta el agente (como POOL_METRICS para el pool)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.filters = Counter()    # (tabla, campo, op)
+            self.composites = Counter() # (tabla, campo_igualdad, campo_rango)
+            self.joins = Counter()      # (tabla, columna) usadas en los ON del join planner
+
+    def record(self, table, predicate):
+        if not table or not predicate:
+            return
+        leaves, pairs = [], []
+        _collect(table, predicate, leaves, pairs)
+        edges, _ = join_plan(table, predicate)
+        with self._lock:
+            self.filters.update(leaves)
+            self.composites.update(pairs)
+            for _, local, remote, _ in edges:
+                self.joins[(local.table.name, local.name)] += 1
+                self.joins[(remote.table.name, remote.name)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'filters': [{'table': t, 'field': f, 'op': op, 'uses': n} for (t, f, op), n in self.filters.most_common()],
+                'composites': [{'table': t, 'columns': [eq, rng], 'uses': n} for (t, eq, rng), n in self.composites.most_common()],
+                'joins': [{'table': t, 'field': f, 'uses': n} for (t, f), n in self.joins.most_common()],
+            }
+
+FILTER_USAGE = FilterUsage()
+
+# --- 2. Índices Existentes y Recomendaciones ---
+def existing_indexes(bind=None):
+    """
+    Tuplas de columnas ya indexadas por tabla (índices, UNIQUE y clave primaria).
+    Con bind se leen de la BD real (que puede no tener los índices de models.py); sin él, de los modelos.
+    """
+    indexed = {}
+    if bind is not None:
+        inspector = inspect(bind)
+        for table in SCHEMA_TABLES:
+            if not inspector.has_table(table):
+                continue
+            columns = {tuple(ix['column_names']) for ix in inspector.get_indexes(table)}
+            columns |= {tuple(uc['column_names']) for uc in inspector.get_unique_constraints(table)}
+            columns.add(tuple(inspector.get_pk_constraint(table)['constrained_columns']))
+            indexed[table] = columns
+        return indexed
+    for name, table in SCHEMA_TABLES.items():
+        columns = {tuple(column.name for column in ix.columns) for ix in table.indexes}
+        columns |= {(column.name,) for column in table.columns if column.unique}
+        columns.add(tuple(column.name for column in table.primary_key.columns))
+        indexed[name] = columns
+    return indexed
+
+def _is_covered(columns, indexed):
+    """Un índice sirve si las columnas pedidas son su prefijo."""
+    return any(index[:len(columns)] == columns for index in indexed)
+
+def index_name(table, columns):
+    return f"ix_{table}_{'_'.join(columns)}"
+
+def recommend_indexes(snapshot, indexed, min_uses=INDEX_ADVICE_MIN_USES):
+    """Índices que faltan para los filtros usados al menos min_uses veces (compuestos primero)."""
+    recommendations = []
+    planned = {}
+    for entry in snapshot['composites']:
+        table, columns = entry['table'], tuple(entry['columns'])
+        if entry['uses'] >= min_uses and not _is_covered(columns, indexed.get(table, ())):
+            recommendations.append({'table': table, 'columns': list(columns), 'uses': entry['uses'],
+                                    'reason': f"igualdad en {columns[0]} + rango en {columns[1]} en el mismo filtro"})
+            planned.setdefault(table, set()).add(columns)
+
+    uses, operators = Counter(), {}
+    for entry in snapshot['filters']:
+        if entry['op'] in INDEXABLE_OPERATORS:
+            uses[(entry['table'], entry['field'])] += entry['uses']
+            operators.setdefault((entry['table'], entry['field']), set()).add(entry['op'])
+    for entry in snapshot['joins']:
+        uses[(entry['table'], entry['field'])] += entry['uses']
+        operators.setdefault((entry['table'], entry['field']), set()).add('join')
+    for (table, field), count in uses.most_common():
+        existing = indexed.get(table, set()) | planned.get(table, set())
+        if count < min_uses or _is_covered((field,), existing):
+            continue
+        recommendations.append({'table': table, 'columns': [field], 'uses': count,
+                                'reason': f"filtro {', '.join(sorted(operators[(table, field)]))}"})
+    for recommendation in recommendations:
+        recommendation['name'] = index_name(recommendation['table'], recommendation['columns'])
+    return recommendations
+
+# --- 3. Script de Migración ---
+def migration_sql(recommendations, dialect_name='postgresql'):
+    """
+    Script con un CREATE INDEX ... IF NOT EXISTS por recomendación. En PostgreSQL usa
+    CONCURRENTLY (no bloquea escrituras; ejecutar con psql, fuera de una transacción).
+    """
+    concurrently = " CONCURRENTLY" if dialect_name == 'postgresql' else ""
+    lines = ["-- Índices recomendados por index_advisor.py según los filtros ejecutados por el agente"]
+    for recommendation in recommendations:
+        lines.append(f"-- {recommendation['reason']} ({recommendation['uses']} usos)")
+        lines.append(f"CREATE INDEX{concurrently} IF NOT EXISTS {recommendation['name']} "
+                     f"ON {recommendation['table']} ({', '.join(recommendation['columns'])});")
+    return "\n".join(lines) + "\n"
+
+def apply_recommendations(bind, recommendations):
+    """Crea los índices recomendados (sin CONCURRENTLY: dentro de una transacción normal)."""
+    with bind.begin() as connection:
+        for statement in migration_sql(recommendations, dialect_name='').splitlines():
+            if statement.startswith("CREATE INDEX"):
+                connection.execute(text(statement))
+    return len(recommendations)
+
+def index_advice(bind=None, min_uses=INDEX_ADVICE_MIN_USES):
+    """Uso observado, recomendaciones y el script de migración para el dialecto de la BD."""
+    snapshot = FILTER_USAGE.snapshot()
+    recommendations = recommend_indexes(snapshot, existing_indexes(bind), min_uses)
+    dialect_name = bind.dialect.name if bind is not None else 'postgresql'
+    return {
+        'usage': snapshot,
+        'min_uses': min_uses,
+        'recommendations': recommendations,
+        'migration_sql': migration_sql(recommendations, dialect_name),
+    }
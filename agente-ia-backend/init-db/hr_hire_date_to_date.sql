@@ -0,0 +1,14 @@
+-- hr_hire_date_to_date.sql
+-- Convierte employees.hire_date a DATE en bases creadas con db.create_all() cuando models.py
+-- lo declaraba como VARCHAR(10): con texto, 'hire_date > ...' no es un rango de fechas indexable.
+-- En una base creada por hr_full_setup.sql ya es DATE y el script no hace nada.
+--   psql -U agente_user -d hr_database -f init-db/hr_hire_date_to_date.sql
+-- (SQLite no necesita migración: guarda la fecha como texto ISO, que ordena igual que la fecha.)
+
+DO $$
+BEGIN
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'employees' AND column_name = 'hire_date') <> 'date' THEN
+        ALTER TABLE employees ALTER COLUMN hire_date TYPE DATE USING NULLIF(TRIM(hire_date), '')::date;
+    END IF;
+END $$;
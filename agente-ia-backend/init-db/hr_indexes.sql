@@ -0,0 +1,15 @@
+-- hr_indexes.sql
+-- Índices secundarios para las columnas por las que filtra el agente (salario, fechas, apellido,
+-- departamento, puesto y jefe). Los nombres coinciden con los de index=True en models.py.
+-- Docker lo ejecuta después de hr_full_setup.sql (orden alfabético). En una base ya creada:
+--   psql -U agente_user -d hr_database -f init-db/hr_indexes.sql
+-- Para índices adicionales según el uso real, ver GET /index-advice (index_advisor.py).
+
+CREATE INDEX IF NOT EXISTS ix_employees_salary ON employees (salary);
+CREATE INDEX IF NOT EXISTS ix_employees_hire_date ON employees (hire_date);
+CREATE INDEX IF NOT EXISTS ix_employees_last_name ON employees (last_name);
+CREATE INDEX IF NOT EXISTS ix_employees_department_id ON employees (department_id);
+CREATE INDEX IF NOT EXISTS ix_employees_job_id ON employees (job_id);
+CREATE INDEX IF NOT EXISTS ix_employees_manager_id ON employees (manager_id);
+
+ANALYZE employees;
@@ -0,0 +1,22 @@
+-- hr_sequences.sql
+-- Secuencias para las claves primarias autogeneradas (regions, locations, departments, employees).
+-- Docker lo ejecuta después de hr_full_setup.sql (orden alfabético). En una base ya creada:
+--   psql -U agente_user -d hr_database -f init-db/hr_sequences.sql
+-- setval() deja la secuencia en el máximo actual (o en la base histórica si la tabla está vacía),
+-- así el siguiente nextval() continúa la numeración que calculaba el agente con MAX(id) + 1.
+
+CREATE SEQUENCE IF NOT EXISTS regions_region_id_seq OWNED BY regions.region_id;
+SELECT setval('regions_region_id_seq', COALESCE((SELECT MAX(region_id) FROM regions), 1));
+ALTER TABLE regions ALTER COLUMN region_id SET DEFAULT nextval('regions_region_id_seq');
+
+CREATE SEQUENCE IF NOT EXISTS locations_location_id_seq OWNED BY locations.location_id;
+SELECT setval('locations_location_id_seq', COALESCE((SELECT MAX(location_id) FROM locations), 1001));
+ALTER TABLE locations ALTER COLUMN location_id SET DEFAULT nextval('locations_location_id_seq');
+
+CREATE SEQUENCE IF NOT EXISTS departments_department_id_seq OWNED BY departments.department_id;
+SELECT setval('departments_department_id_seq', COALESCE((SELECT MAX(department_id) FROM departments), 100));
+ALTER TABLE departments ALTER COLUMN department_id SET DEFAULT nextval('departments_department_id_seq');
+
+CREATE SEQUENCE IF NOT EXISTS employees_employee_id_seq OWNED BY employees.employee_id;
+SELECT setval('employees_employee_id_seq', COALESCE((SELECT MAX(employee_id) FROM employees), 300));
+ALTER TABLE employees ALTER COLUMN employee_id SET DEFAULT nextval('employees_employee_id_seq');
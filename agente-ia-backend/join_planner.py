@@ -0,0 +1,142 @@
+# join_planner.py
+from collections import deque
+from functools import lru_cache
+
+from sqlalchemy import Integer, String
+
+from config import DB_SCHEMA, NAME_COLUMNS
+from models import Employee, Department, Job, Region, Country, Location
+from plan_cache import placeholder_index
+
+SCHEMA_TABLES = {Model.__tablename__: Model.__table__ for Model in (Employee, Department, Job, Region, Country, Location)}
+
+# --- 1. Grafo de Claves Foráneas ---
+def build_schema_graph(tables):
+    """
+    Grafo no dirigido tabla -> [(vecina, columna_local, columna_vecina, fan_out)].
+    fan_out indica que la arista va de la tabla referenciada a la que la referencia
+    (uno a muchos): al unirla, una fila puede repetirse.
+    """
+    graph = {name: [] for name in tables}
+    for name, table in tables.items():
+        for fk in sorted(table.foreign_keys, key=lambda fk: fk.parent.name):
+            target = fk.column.table.name
+            if target == name or target not in tables: # manager_id (autorreferencia) no se usa para joins
+                continue
+            graph[name].append((target, fk.parent, fk.column, False))
+            graph[target].append((name, fk.column, fk.parent, True))
+    return graph
+
+SCHEMA_GRAPH = build_schema_graph(SCHEMA_TABLES)
+
+@lru_cache(maxsize=None)
+def join_path(source, target):
+    """Ruta de joins más corta (BFS) entre dos tablas, cacheada por par. None si no están conectadas."""
+    if source == target:
+        return ()
+    parents = {source: None}
+    queue = deque([source])
+    while queue:
+        current = queue.popleft()
+        for edge in SCHEMA_GRAPH[current]:
+            neighbour = edge[0]
+            if neighbour in parents:
+                continue
+            parents[neighbour] = (current, edge)
+            if neighbour == target:
+                path = []
+                while parents[neighbour] is not None:
+                    neighbour, edge = parents[neighbour]
+                    path.append(edge)
+                return tuple(reversed(path))
+            queue.append(neighbour)
+    return None
+
+# --- 2. Resolución de Campos de Otras Tablas ---
+@lru_cache(maxsize=None)
+def owner_table(field, table):
+    """Tabla dueña del campo: la propia si lo tiene; si no, la más cercana en el grafo que lo tenga."""
+    if field in DB_SCHEMA[table]['fields']:
+        return table
+    candidates = [(len(path), other) for other, path in ((t, join_path(table, t)) for t in DB_SCHEMA)
+                  if path is not None and field in DB_SCHEMA[other]['fields']]
+    return min(candidates)[1] if candidates else None
+
+def _is_name_value(column, value):
+    """Un texto que no puede ser la clave: 'Europe' contra un Integer o 'Canada' contra un String(2)."""
+    values = value if isinstance(value, list) else [value]
+    if not all(isinstance(v, str) and placeholder_index(v) is None for v in values):
+        return False
+    if isinstance(column.type, Integer):
+        return True
+    return isinstance(column.type, String) and column.type.length is not None and any(len(v) > column.type.length for v in values)
+
+def resolve_name_column(table, field, value):
+    """(tabla, columna_nombre) si el valor es un nombre para una clave (foránea o primaria); si no, None."""
+    column = SCHEMA_TABLES[table].c[field]
+    if not _is_name_value(column, value):
+        return None
+    for fk in column.foreign_keys:
+        referenced = fk.column.table.name
+        if referenced in NAME_COLUMNS:
+            return referenced, NAME_COLUMNS[referenced]
+    if column.primary_key and table in NAME_COLUMNS:
+        return table, NAME_COLUMNS[table]
+    return None
+
+def qualify_predicate(table, predicate):
+    """
+    Reescribe los campos del árbol que no son de la tabla como 'tabla.campo'
+    ('ciudad Seattle' en employees -> locations.city). Sin join necesario, el árbol no cambia.
+    """
+    if not predicate:
+        return predicate
+    if 'logic' in predicate:
+        return {**predicate, 'conditions': [qualify_predicate(table, child) for child in predicate['conditions']]}
+    field = predicate['field']
+    if '.' in field:
+        return predicate
+    owner = owner_table(field, table)
+    if owner is None:
+        return predicate # build_filter_expression informa del campo no válido
+    named = resolve_name_column(owner, field, predicate['value'])
+    if named:
+        owner, field = named
+    return {**predicate, 'field': field if owner == table else f"{owner}.{field}"}
+
+# --- 3. Plan de Joins de un Árbol Cualificado ---
+def _joined_tables(predicate, found):
+    if 'logic' in predicate:
+        for child in predicate['conditions']:
+            _joined_tables(child, found)
+    elif '.' in predicate['field']:
+        found.setdefault(predicate['field'].split('.', 1)[0], None)
+    return found
+
+def join_plan(table, predicate):
+    """
+    Aristas a unir (en orden y sin repetir tablas) para filtrar 'table' por los campos
+    cualificados del árbol, y si alguna es uno a muchos (el SELECT necesita DISTINCT).
+    """
+    edges, seen = [], {table}
+    for other in (_joined_tables(predicate, {}) if predicate else {}):
+        path = join_path(table, other)
+        if path is None:
+            raise Exception(f"No hay relación entre '{table}' y '{other}'")
+        for edge in path:
+            if edge[0] not in seen:
+                seen.add(edge[0])
+                edges.append(edge)
+    return edges, any(edge[3] for edge in edges)
+
+def joined_tables(table, predicate):
+    """Tablas que el filtro une a 'table' (incluidas las intermedias de cada ruta)."""
+    return [edge[0] for edge in join_plan(table, predicate)[0]]
+
+def build_join_source(table, predicate):
+    """FROM con los JOIN necesarios: (fuente, hay_joins, fan_out)."""
+    edges, fan_out = join_plan(table, predicate)
+    source = SCHEMA_TABLES[table]
+    for neighbour, local, remote, _ in edges:
+        source = source.join(SCHEMA_TABLES[neighbour], local == remote)
+    return source, bool(edges), fan_out
@@ -0,0 +1,150 @@
+# matcher.py
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import deque
+
+# --- 1. Autómata Aho-Corasick ---
+class AhoCorasick:
+    """Autómata de múltiples patrones: encuentra todas las apariciones en una sola pasada."""
+
+    def __init__(self, patterns):
+        # Cada nodo: transiciones, enlace de fallo y lista de (patrón, payload) que terminan aquí
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern, payload in patterns:
+            self._add(pattern, payload)
+        self._build_fail_links()
+
+    def _add(self, pattern, payload):
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = next_node
+        self._out[node].append((len(pattern), payload))
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                # Heredamos las salidas del enlace de fallo para no recorrerlo en búsqueda
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._build_dfa()
+
+    def _build_dfa(self):
+        """Completa las transiciones (DFA) para que la búsqueda no siga enlaces de fallo."""
+        self._delta = [dict(self._goto[0])]
+        self._delta.extend({} for _ in range(len(self._goto) - 1))
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            # El nodo de fallo es menos profundo, así que su tabla ya está completa
+            transitions = dict(self._delta[self._fail[node]])
+            transitions.update(self._goto[node])
+            self._delta[node] = transitions
+            queue.extend(self._goto[node].values())
+
+    def findall(self, text):
+        """Devuelve la lista de (inicio, fin, payload) de cada aparición de un patrón."""
+        delta, out = self._delta, self._out
+        matches = []
+        node = 0
+        for index, char in enumerate(text):
+            node = delta[node].get(char, 0)
+            if out[node]:
+                for length, payload in out[node]:
+                    matches.append((index + 1 - length, index + 1, payload))
+        return matches
+
+
+# --- 2. Matcher de Condiciones (campos y operadores) ---
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+class ConditionMatcher:
+    """
+    Se construye una sola vez sobre FIELD_MAP y OPERATOR_MAP y encuentra en una sola pasada
+    todas las apariciones de campos y operadores de la consulta, en lugar de una regex por
+    operador. extract_predicate_tree arma el árbol de condiciones a partir de ellas.
+    """
+
+    FIELD = 0
+    OPERATOR = 1
+
+    def __init__(self, field_map, operator_map):
+        self.field_map = field_map
+        self.operator_map = operator_map
+        # A igual posición, los campos se ordenan como en FIELD_MAP
+        self._field_priority = {alias: i for i, alias in enumerate(field_map)}
+        patterns = [(alias, (self.FIELD, alias)) for alias in field_map]
+        patterns += [(op, (self.OPERATOR, op)) for op in operator_map]
+        self._automaton = AhoCorasick(patterns)
+
+    def has_word_boundaries(self, text, start, end):
+        """Replica '\\b' a ambos lados de una aparición (campo u operador)."""
+        before = _is_word_char(text[start - 1]) if start > 0 else False
+        after = _is_word_char(text[end]) if end < len(text) else False
+        first = _is_word_char(text[start])
+        last = _is_word_char(text[end - 1])
+        return before != first and last != after
+
+    def scan(self, text):
+        """Una pasada: devuelve las apariciones de campos y de operadores encontradas."""
+        fields, operators = [], []
+        for start, end, (kind, key) in self._automaton.findall(text):
+            if kind == self.FIELD:
+                if self.has_word_boundaries(text, start, end):
+                    fields.append((start, self._field_priority[key], end, key))
+            else:
+                operators.append((start, end, key))
+        fields.sort()
+        return fields, operators
+
+
+# --- 3. Snapshot Precompilado de las Tablas del Matcher ---
+def snapshot_key(sources, code_files=()):
+    """Huella de la configuración y del código que construyen las tablas: si cambia, el snapshot no vale."""
+    digest = hashlib.sha256(repr(sources).encode('utf-8'))
+    for path in code_files:
+        with open(path, 'rb') as code_file:
+            digest.update(code_file.read())
+    return digest.hexdigest()
+
+def load_snapshot(path, key, build):
+    """
+    Devuelve las tablas guardadas en path si su clave coincide; si no (o sin path), las construye
+    con build(). Nunca escribe: el snapshot se genera aparte con save_snapshot (un paso explícito
+    al construir la imagen). Es un pickle: path debe estar en un directorio propio de la app, no
+    escribible por terceros.
+    """
+    if path is None:
+        return build()
+    try:
+        with open(path, 'rb') as snapshot_file:
+            if pickle.load(snapshot_file) == key:
+                return pickle.load(snapshot_file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        pass
+    return build()
+
+def save_snapshot(path, key, tables):
+    """Escribe el snapshot de forma atómica (archivo temporal en el mismo directorio + os.replace)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile('wb', dir=directory, delete=False) as snapshot_file:
+        pickle.dump(key, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(tables, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(snapshot_file.name, path)
@@ -0,0 +1,228 @@
+# metrics.py
+"""
+Tiempos por etapa de /ask-agent (parse, sql, hydrate, serialize) con histogramas por
+intención y tabla, consultas a la BD y filas devueltas, en formato de texto de Prometheus.
+Sin dependencias: un perf_counter por etapa y un ContextVar por petición (hilos y asyncio).
+"""
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import METRICS_ENABLED, LATENCY_BUCKETS
+
+STAGES = ('parse', 'sql', 'hydrate', 'serialize')
+
+# --- 1. Tiempos de una Petición ---
+class RequestTimings:
+    """Acumula segundos por etapa, consultas SQL y filas de UNA petición."""
+    __slots__ = ('start', 'stages', 'queries', 'rows', 'intent', 'table')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.queries = 0
+        self.rows = 0
+        self.intent = 'UNKNOWN'
+        self.table = None
+
+    def as_dict(self, total_seconds=None):
+        """Bloque 'timings' de la respuesta (milisegundos)."""
+        total = time.perf_counter() - self.start if total_seconds is None else total_seconds
+        block = {f"{stage}_ms": round(seconds * 1000, 3) for stage, seconds in self.stages.items()}
+        block.update({'total_ms': round(total * 1000, 3), 'db_queries': self.queries, 'rows': self.rows})
+        return block
+
+    def merge(self, other):
+        """Suma las etapas, consultas y filas de other (un worker de la misma petición)."""
+        for stage, seconds in other.stages.items():
+            self.stages[stage] += seconds
+        self.queries += other.queries
+        self.rows += other.rows
+
+_CURRENT = ContextVar('request_timings', default=None)
+
+def current_timings():
+    return _CURRENT.get()
+
+@contextmanager
+def timed_stage(stage):
+    """Suma la duración del bloque a la etapa de la petición en curso (sin petición, no hace nada)."""
+    timings = _CURRENT.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.stages[stage] += time.perf_counter() - start
+
+def set_request_labels(intent, table):
+    timings = _CURRENT.get()
+    if timings is not None:
+        timings.intent, timings.table = intent, table
+
+def add_rows(count):
+    timings = _CURRENT.get()
+    if timings is not None:
+        timings.rows += count
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    timings = _CURRENT.get()
+    if timings is not None:
+        timings.queries += 1
+
+# --- 2. Histogramas y Contadores (formato de texto de Prometheus) ---
+def _format_labels(names, values):
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+
+class Histogram:
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name, self.help_text, self.label_names, self.buckets = name, help_text, label_names, tuple(buckets)
+        self._series = {} # etiquetas -> [conteos por bucket..., +Inf, suma]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series_items = [(labels, list(series)) for labels, series in sorted(self._series.items())]
+        for labels, series in series_items:
+            base = _format_labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name, self.help_text, self.label_names = name, help_text, label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f"{self.name}{{{_format_labels(self.label_names, labels)}}} {value}" for labels, value in items]
+        return lines
+
+class AgentMetrics:
+    """Registro de las métricas del pipeline del agente."""
+
+    def __init__(self):
+        self.stage_seconds = Histogram('agent_stage_seconds', "Duración de cada etapa de /ask-agent", ('stage', 'intent', 'table'))
+        self.request_seconds = Histogram('agent_request_seconds', "Duración total de /ask-agent", ('intent', 'table'))
+        self.requests = Counter('agent_requests_total', "Peticiones atendidas por tipo de respuesta", ('intent', 'table', 'type'))
+        self.db_queries = Counter('agent_db_queries_total', "Sentencias SQL ejecutadas", ('intent', 'table'))
+        self.rows = Counter('agent_rows_returned_total', "Filas devueltas al cliente", ('intent', 'table'))
+
+    def record(self, timings, response_type, total_seconds):
+        labels = (timings.intent, timings.table or 'none')
+        for stage, seconds in timings.stages.items():
+            if seconds:
+                self.stage_seconds.observe((stage,) + labels, seconds)
+        self.request_seconds.observe(labels, total_seconds)
+        self.requests.inc(labels + (response_type or 'unknown',))
+        if timings.queries:
+            self.db_queries.inc(labels, timings.queries)
+        if timings.rows:
+            self.rows.inc(labels, timings.rows)
+
+    def render(self, extra_gauges=None):
+        lines = []
+        for metric in (self.stage_seconds, self.request_seconds, self.requests, self.db_queries, self.rows):
+            lines += metric.render()
+        for name, value in (extra_gauges or {}).items():
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+AGENT_METRICS = AgentMetrics()
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def pool_gauges(snapshot):
+    """Métricas del pool (POOL_METRICS.snapshot()) como gauges agent_db_pool_*."""
+    return {f"agent_db_pool_{key}": value for key, value in snapshot.items() if isinstance(value, (int, float))}
+
+# --- 3. Ciclo de Vida de la Petición ---
+@contextmanager
+def track_request():
+    """
+    Activa los tiempos para el bloque (una petición). Devuelve RequestTimings, o None si
+    METRICS_ENABLED está desactivado. Quien llama registra el resultado con finish_request.
+    """
+    if not METRICS_ENABLED:
+        yield None
+        return
+    timings = RequestTimings()
+    token = _CURRENT.set(timings)
+    try:
+        yield timings
+    finally:
+        _CURRENT.reset(token)
+
+_MERGE_LOCK = threading.Lock()
+
+def measured(func):
+    """
+    func envuelta para ejecutarse en un worker (hilo del pool o tarea asyncio) como parte de la
+    petición en curso. Los hilos de un pool empiezan con un contexto vacío, así que la petición
+    se captura aquí; el worker mide en un RequestTimings propio (sin carreras entre workers ni
+    cambiar las etiquetas de la petición) que se suma al de la petición al terminar. Con workers
+    en paralelo, la suma de las etapas puede superar el total de la petición.
+    """
+    parent = _CURRENT.get()
+    if parent is None:
+        return func
+
+    def run(*args):
+        timings = RequestTimings()
+        token = _CURRENT.set(timings)
+        try:
+            return func(*args)
+        finally:
+            _CURRENT.reset(token)
+            with _MERGE_LOCK:
+                parent.merge(timings)
+    return run
+
+def finish_request(timings, response_type):
+    if timings is None:
+        return
+    AGENT_METRICS.record(timings, response_type, time.perf_counter() - timings.start)
+
+def serialize_response(payload, timings=None, include_timings=False):
+    """
+    JSON de la respuesta midiendo la etapa 'serialize' y cerrando las métricas de la petición.
+    Con include_timings, el bloque 'timings' se añade al JSON ya serializado para que
+    incluya también el coste de serializar.
+    """
+    with timed_stage('serialize'):
+        body = json.dumps(payload, default=str)
+    finish_request(timings, payload.get('type'))
+    if include_timings and timings is not None and body.endswith('}'):
+        separator = ", " if len(body) > 2 else ""
+        body = f"{body[:-1]}{separator}\"timings\": {json.dumps(timings.as_dict())}}}"
+    return body
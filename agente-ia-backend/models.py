@@ -4,11 +4,13 @@ from sqlalchemy import Numeric, ForeignKey
 # (Puedes necesitar importar otros tipos de Columnas si los usas)
 
 # --- 2. DEFINICIÓN DE MODELOS (Esquema HR completo adaptado) ---
+# Las claves numéricas autogeneradas usan secuencias de la BD (ver init-db/hr_sequences.sql).
+# En SQLite la secuencia se ignora y la clave la asigna el propio INTEGER PRIMARY KEY.
 
 # Tabla 1: REGIONS
 class Region(db.Model):
     __tablename__ = 'regions'
-    region_id = db.Column(db.Integer, primary_key=True)
+    region_id = db.Column(db.Integer, db.Sequence('regions_region_id_seq'), primary_key=True)
     region_name = db.Column(db.String(25), nullable=False, unique=True)
     countries = db.relationship('Country', backref='region', lazy=True)
 
@@ -23,7 +25,7 @@ class Country(db.Model):
 # Tabla 3: LOCATIONS
 class Location(db.Model):
     __tablename__ = 'locations'
-    location_id = db.Column(db.Integer, primary_key=True)
+    location_id = db.Column(db.Integer, db.Sequence('locations_location_id_seq'), primary_key=True)
     street_address = db.Column(db.String(40), nullable=True)
     postal_code = db.Column(db.String(12), nullable=True)
     city = db.Column(db.String(30), nullable=False)
@@ -43,7 +45,7 @@ class Job(db.Model):
 # Tabla 5: DEPARTMENT (Departamentos)
 class Department(db.Model):
     __tablename__ = 'departments'
-    department_id = db.Column(db.Integer, primary_key=True)
+    department_id = db.Column(db.Integer, db.Sequence('departments_department_id_seq'), primary_key=True)
     department_name = db.Column(db.String(30), unique=True, nullable=False)
     manager_id = db.Column(db.Integer, nullable=True)
     location_id = db.Column(db.Integer, db.ForeignKey('locations.location_id'), nullable=True)
@@ -58,23 +60,25 @@ class Department(db.Model):
         }
 
 # Tabla 6: EMPLOYEE (Empleados - la tabla central)
+# Índices secundarios en las columnas por las que filtra el agente (ver init-db/hr_indexes.sql
+# para bases ya creadas e index_advisor.py para recomendaciones según el uso real)
 class Employee(db.Model):
     __tablename__ = 'employees'
-    employee_id = db.Column(db.Integer, primary_key=True)
+    employee_id = db.Column(db.Integer, db.Sequence('employees_employee_id_seq'), primary_key=True)
     first_name = db.Column(db.String(20), nullable=False)
-    last_name = db.Column(db.String(25), nullable=False)
+    last_name = db.Column(db.String(25), nullable=False, index=True)
     email = db.Column(db.String(25), unique=True, nullable=False)
     phone_number = db.Column(db.String(20), nullable=True)
-    hire_date = db.Column(db.String(10), nullable=True)
-    salary = db.Column(db.Numeric(8, 2), nullable=False)
+    hire_date = db.Column(db.Date, nullable=True, index=True) # DATE: los rangos de fechas usan el índice
+    salary = db.Column(db.Numeric(8, 2), nullable=False, index=True)
     commission_pct = db.Column(db.Numeric(2, 2), nullable=True)
     
     # Claves Foráneas
-    job_id = db.Column(db.String(10), db.ForeignKey('jobs.job_id'), nullable=True)
-    department_id = db.Column(db.Integer, db.ForeignKey('departments.department_id'), nullable=True)
+    job_id = db.Column(db.String(10), db.ForeignKey('jobs.job_id'), nullable=True, index=True)
+    department_id = db.Column(db.Integer, db.ForeignKey('departments.department_id'), nullable=True, index=True)
 
     # RELACIÓN JERÁRQUICA (Manager - Apunta a sí misma)
-    manager_id = db.Column(db.Integer, db.ForeignKey('employees.employee_id'), nullable=True)
+    manager_id = db.Column(db.Integer, db.ForeignKey('employees.employee_id'), nullable=True, index=True)
     manager = db.relationship(
         'Employee', 
         remote_side='Employee.employee_id', 
@@ -88,4 +92,17 @@ class Employee(db.Model):
             'id': self.employee_id,
             'nombre': f"{self.first_name} {self.last_name}",
             'salario': float(self.salary),
-        }
\ No newline at end of file
+        }
+# Tabla 7: EMPLOYEE_CLOSURE (Cierre transitivo del organigrama, opcional: ORG_CLOSURE_TABLE en config.py)
+# Una fila por par (jefe, subordinado) a cualquier distancia; se reconstruye tras escribir en employees.
+class EmployeeClosure(db.Model):
+    __tablename__ = 'employee_closure'
+    ancestor_id = db.Column(db.Integer, primary_key=True)
+    descendant_id = db.Column(db.Integer, primary_key=True, index=True)
+    depth = db.Column(db.Integer, nullable=False)
+
+# Tabla 8: AGENT_SCHEMA_VERSION (Marca de versión del esquema para el arranque rápido, ver startup.py)
+# Una sola fila con la huella de estos modelos; si coincide, el arranque no repite create_all().
+class SchemaVersion(db.Model):
+    __tablename__ = 'agent_schema_version'
+    version = db.Column(db.String(64), primary_key=True)
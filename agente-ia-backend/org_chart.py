@@ -0,0 +1,74 @@
+# org_chart.py
+from sqlalchemy import select, literal, cast, String, delete, insert
+
+from models import Employee, EmployeeClosure
+
+EMPLOYEES = Employee.__table__
+
+# --- 1. CTE Recursivo sobre Employee.manager_id ---
+def _path_item(column):
+    return literal(',') + cast(column, String) + literal(',')
+
+def build_hierarchy_cte(direction, max_depth, root_id=None):
+    """
+    WITH RECURSIVE que recorre el organigrama en UN solo round trip.
+    direction 'down' = subordinados (manager_id -> employee_id), 'up' = cadena de mando.
+    'path' (',100,101,') evita ciclos y 'depth' limita los niveles. Sin root_id parte de
+    todos los empleados (cierre completo, usado para materializar employee_closure).
+    """
+    base = select(
+        EMPLOYEES.c.employee_id.label('root_id'),
+        EMPLOYEES.c.employee_id,
+        EMPLOYEES.c.manager_id,
+        literal(0).label('depth'),
+        _path_item(EMPLOYEES.c.employee_id).label('path'),
+    )
+    if root_id is not None:
+        base = base.where(EMPLOYEES.c.employee_id == root_id)
+    tree = base.cte('org_tree', recursive=True)
+
+    if direction == 'down':
+        link = EMPLOYEES.c.manager_id == tree.c.employee_id
+    else:
+        link = EMPLOYEES.c.employee_id == tree.c.manager_id
+    step = select(
+        tree.c.root_id,
+        EMPLOYEES.c.employee_id,
+        EMPLOYEES.c.manager_id,
+        tree.c.depth + 1,
+        tree.c.path + cast(EMPLOYEES.c.employee_id, String) + literal(','),
+    ).select_from(tree.join(EMPLOYEES, link)).where(
+        tree.c.depth < max_depth,
+        ~tree.c.path.contains(_path_item(EMPLOYEES.c.employee_id)),
+    )
+    return tree.union_all(step)
+
+# --- 2. Consultas de Subordinados / Cadena de Mando ---
+def hierarchy_statement(projection, root_id, direction, max_depth, use_closure=False):
+    """SELECT de los empleados del subárbol (o de la cadena) con su nivel como última columna."""
+    if use_closure:
+        closure = EmployeeClosure.__table__
+        if direction == 'down':
+            link, anchor = closure.c.descendant_id, closure.c.ancestor_id
+        else:
+            link, anchor = closure.c.ancestor_id, closure.c.descendant_id
+        return select(*projection.columns, closure.c.depth).select_from(
+            EMPLOYEES.join(closure, link == EMPLOYEES.c.employee_id)
+        ).where(
+            anchor == root_id, closure.c.depth.between(1, max_depth)
+        ).order_by(closure.c.depth, EMPLOYEES.c.employee_id)
+
+    tree = build_hierarchy_cte(direction, max_depth, root_id)
+    return select(*projection.columns, tree.c.depth).select_from(
+        tree.join(EMPLOYEES, EMPLOYEES.c.employee_id == tree.c.employee_id)
+    ).where(tree.c.depth > 0).order_by(tree.c.depth, EMPLOYEES.c.employee_id)
+
+# --- 3. Tabla de Cierre Materializada (opcional, organigramas grandes) ---
+def refresh_closure(db_session, max_depth):
+    """Reconstruye employee_closure con un DELETE y un INSERT ... SELECT sobre el CTE completo."""
+    tree = build_hierarchy_cte('down', max_depth)
+    db_session.execute(delete(EmployeeClosure))
+    db_session.execute(insert(EmployeeClosure).from_select(
+        ['ancestor_id', 'descendant_id', 'depth'],
+        select(tree.c.root_id, tree.c.employee_id, tree.c.depth)
+    ))
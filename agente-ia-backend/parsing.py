@@ -1,46 +1,105 @@
 # parsing.py
+import csv
 import re
 # Importamos las constantes de configuración
-from config import FIELD_MAP, OPERATOR_MAP 
+from config import (
+    FIELD_MAP, OPERATOR_MAP, LOGIC_CONNECTORS, BETWEEN_KEYWORDS, IN_KEYWORDS, NEXT_PAGE_KEYWORDS,
+    DB_SCHEMA, INCREASE_KEYWORDS, DECREASE_KEYWORDS, ALL_ROWS_KEYWORDS,
+    INTENT_KEYWORDS, TABLE_KEYWORDS, TABLE_MENTION_DECAY,
+    HIERARCHY_MAX_DEPTH, DOWN_KEYWORDS, UP_KEYWORDS, DIRECT_KEYWORDS, AGGREGATE_KEYWORDS,
+    RELATION_KEYWORDS, FAST_START, MATCHER_SNAPSHOT_PATH, FUZZY_MATCHING, FUZZY_NGRAM_SIZE,
+    FUZZY_MIN_TERM_LENGTH, FUZZY_STOP_WORDS, TRANSLATION_MAP
+)
 # Importamos funciones auxiliares
 from utils import get_db_column_name
+import classifier
+import matcher
+import fuzzy
+from matcher import ConditionMatcher, snapshot_key, load_snapshot, save_snapshot
+from classifier import KeywordIndex, fold_accents, tokenize
+from fuzzy import FieldResolver
+
+def build_matcher_tables():
+    # Matcher compilado UNA sola vez al cargar la configuración (evita recompilar regex por petición)
+    condition_matcher = ConditionMatcher(FIELD_MAP, OPERATOR_MAP)
+    # Índices invertidos de intención y tabla, también compilados una sola vez
+    intent_index = KeywordIndex(INTENT_KEYWORDS)
+    table_index = KeywordIndex(TABLE_KEYWORDS, decay=TABLE_MENTION_DECAY)
+    # Índice de trigramas del vocabulario de campos y tablas (corrección de typos)
+    field_resolver = FieldResolver()
+    return condition_matcher, intent_index, table_index, field_resolver
+
+# Con FAST_START se cargan del snapshot precompilado (las regex de abajo no se pueden serializar)
+MATCHER_TABLES_KEY = snapshot_key(
+    (FIELD_MAP, OPERATOR_MAP, INTENT_KEYWORDS, TABLE_KEYWORDS, TABLE_MENTION_DECAY, TRANSLATION_MAP, DB_SCHEMA,
+     LOGIC_CONNECTORS, BETWEEN_KEYWORDS, IN_KEYWORDS, NEXT_PAGE_KEYWORDS, INCREASE_KEYWORDS, DECREASE_KEYWORDS,
+     ALL_ROWS_KEYWORDS, DOWN_KEYWORDS, UP_KEYWORDS, DIRECT_KEYWORDS, AGGREGATE_KEYWORDS, RELATION_KEYWORDS,
+     FUZZY_NGRAM_SIZE, FUZZY_MIN_TERM_LENGTH, FUZZY_STOP_WORDS),
+    code_files=(matcher.__file__, classifier.__file__, fuzzy.__file__)
+)
+CONDITION_MATCHER, INTENT_INDEX, TABLE_INDEX, FIELD_RESOLVER = load_snapshot(
+    MATCHER_SNAPSHOT_PATH if FAST_START else None, MATCHER_TABLES_KEY, build_matcher_tables
+)
+
+def save_matcher_snapshot(path=MATCHER_SNAPSHOT_PATH):
+    """Guarda las tablas ya construidas para los arranques con FAST_START (paso explícito, nunca al importar)."""
+    save_snapshot(path, MATCHER_TABLES_KEY, (CONDITION_MATCHER, INTENT_INDEX, TABLE_INDEX, FIELD_RESOLVER))
+
+# Patrones anclados (se aplican justo después de cada campo encontrado por el matcher)
+_LITERAL = r"[\w.,$@'\"\-]+"
+_LIST_ITEM = r"[\w.$@'\"\-]+"
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+_CONNECTOR_RE = re.compile(rf"\b({'|'.join(LOGIC_CONNECTORS)})\b")
+BETWEEN_TAIL_RE = re.compile(rf"\s+(?:esta\s+|está\s+)?(?:{'|'.join(BETWEEN_KEYWORDS)})\s+({_LITERAL})\s+y\s+({_LITERAL})")
+IN_TAIL_RE = re.compile(rf"\s+(?:es\s+|esta\s+|está\s+)?(?:{'|'.join(IN_KEYWORDS)})\s+\(?\s*({_LIST_ITEM}(?:\s*(?:,|\s(?:y|o)\s)\s*{_LIST_ITEM})+)\s*\)?")
+_LIST_SPLIT_RE = re.compile(r"\s*(?:,|\s(?:y|o)\s)\s*", re.IGNORECASE)
+_COMPARISON_VALUE_RE = re.compile(rf"\s+({_LITERAL})")
+# Igualdad implícita: el campo va seguido directamente de un valor con dígitos ('departamento 50')
+_IMPLICIT_VALUE_RE = re.compile(r"\s+(\$?[\w.\-]*\d[\w.\-]*)(?![\w%])")
+# ... o de un nombre propio en mayúscula ('ciudad Seattle', 'region Europe', 'ciudad South San Francisco')
+_IMPLICIT_NAME_RE = re.compile(r"\s+(?:de\s+)?([A-ZÁÉÍÓÚÑ][\w\-]*(?:\s+[A-ZÁÉÍÓÚÑ][\w\-]*)*)")
+BULK_UPDATE_RE = re.compile(
+    rf"\b(?P<verb>{'|'.join(INCREASE_KEYWORDS + DECREASE_KEYWORDS)})\s+(?:el\s+|la\s+)?(?P<field>[^\d%$]+?)"
+    r"\s+(?:en\s+|un\s+|por\s+)?(?P<amount>\$?\d+(?:\.\d+)?)\s*(?P<pct>%|por\s*ciento)?"
+)
+_BULK_ROW_SPLIT_RE = re.compile(r"[\n;]")
+# Lo que sigue a estas frases son datos relacionados para la salida ('con su jefe', 'incluyendo el puesto')
+_RELATION_MARKER_RE = re.compile(r"\b(?:(?:con|y|mas)\s+sus?|incluyendo|junto\s+con)\b")
+HIERARCHY_DEPTH_RE = re.compile(r"\b(?:hasta(?:\s+el)?|maximo|profundidad)\s+(?:nivel\s+)?(\d+)(?:\s+niveles?)?")
+_INTEGER_RE = re.compile(r"\b\d+\b")
+# Campo precedido de 'por', 'por cada' o 'cada' = columna de GROUP BY ('salario promedio por departamento')
+_GROUP_BY_PREFIX_RE = re.compile(r"\b(?:por(?:\s+cada)?|cada)\s+(?:el\s+|la\s+)?$")
+_GROUP_BY_JOIN_RE = re.compile(r"\s*(?:,|y)\s*(?:el\s+|la\s+)?") # 'por puesto y departamento'
+_AGGREGATE_FUNCTIONS = {keyword: func for func, keywords in AGGREGATE_KEYWORDS.items() for keyword in keywords}
+AGGREGATE_RE = re.compile(rf"\b({'|'.join(sorted(_AGGREGATE_FUNCTIONS, key=len, reverse=True))})\b")
 
 # --- 1. Clasificación de Intención ---
 def classify_intent(text):
-    text_lower = text.lower()
-    select_keywords = ["listar", "dame", "mostrar", "quienes", "cuantos", "lista", "ver"]
-    if any(keyword in text_lower for keyword in select_keywords):
-        return "SELECT"
-    insert_keywords = ["insertar", "agregar", "crear", "nuevo", "ingresar"]
-    if any(keyword in text_lower for keyword in insert_keywords):
-        return "INSERT"
-    delete_keywords = ["eliminar", "borrar", "quitar", "dar de baja"]
-    if any(keyword in text_lower for keyword in delete_keywords):
-        return "DELETE"
-    update_keywords = ["actualizar", "modificar", "cambiar", "revisar"]
-    if any(keyword in text_lower for keyword in update_keywords):
-        return "UPDATE"
-    return "UNKNOWN"
+    """Intención con más peso según el índice invertido (ver INTENT_KEYWORDS en config.py)."""
+    return INTENT_INDEX.best(text, default="UNKNOWN")
 
 # --- 2. Extracción de Entidades (Tablas) ---
 def extract_entities(text):
     """Extrae la tabla principal mencionada en la consulta."""
     entities = {}
-    text_lower = text.lower()
-    if "empleado" in text_lower or "employees" in text_lower:
-        entities['table'] = 'employees'
-    elif "departamento" in text_lower or "departments" in text_lower:
-        entities['table'] = 'departments'
-    elif "puesto" in text_lower or "jobs" in text_lower:
-        entities['table'] = 'jobs'
-    elif "region" in text_lower or "regions" in text_lower:
-        entities['table'] = 'regions'
-    elif "pais" in text_lower or "countries" in text_lower:
-        entities['table'] = 'countries'
-    elif "ubicacion" in text_lower or "locations" in text_lower:
-        entities['table'] = 'locations'
+    table = TABLE_INDEX.best(text)
+    if table:
+        entities['table'] = table
     return entities
 
+def correct_query(text):
+    """
+    Corrige typos de campos y tablas antes de interpretar la consulta ('listar empelados con
+    salrio mayor a 5000'). Devuelve (texto, [(original, corrección)]).
+    """
+    if not FUZZY_MATCHING:
+        return text, []
+    return FIELD_RESOLVER.correct(text)
+
+def is_next_page_request(text):
+    """Detecta si el usuario pide la siguiente página de un SELECT anterior (ej. 'siguiente')."""
+    return text.lower().strip(' .!?¿¡') in NEXT_PAGE_KEYWORDS
+
 def simple_data_extractor(text):
     """Intenta extraer nombres o un valor simple de la respuesta."""
     extracted = {}
@@ -52,47 +111,14 @@ def simple_data_extractor(text):
     extracted['value'] = text.strip() 
     return extracted
 
-def extract_conditions(text, table_name, for_set=False):
-    text_lower = text.lower()
-    conditions = []
-    
-    if for_set:
-        pattern = rf'({"|".join(FIELD_MAP.keys())})\s+(a|por|con)\s+([a-zA-Z0-9.@\s]+)' # Ajustado para capturar valores con espacios
-        match = re.search(pattern, text_lower)
-        if match:
-            es_field = match.group(1) 
-            value_str = match.group(3).replace('q', '').replace('$', '').replace(',', '').strip()
-            try:
-                value = float(value_str) if '.' in value_str or any(c.isdigit() for c in value_str) else value_str
-            except ValueError:
-                value = value_str
-            conditions.append({
-                'field': FIELD_MAP.get(es_field, es_field),
-                'op': '=', # Siempre '=' para SET
-                'value': value
-            })
-            return conditions
-    else:
-        for es_op, sql_op in OPERATOR_MAP.items():
-            # *** CÓDIGO CORREGIDO *** # El bloque 'else' estaba incompleto en tu archivo original.
-            pattern = rf'\b({"|".join(FIELD_MAP.keys())})\b.*?{re.escape(es_op)}.*?\s+([a-zA-Z0-9.,]+)'
-            match = re.search(pattern, text_lower)
-            
-            if match:
-                es_field = match.group(1) 
-                value_str = match.group(2).replace('q', '').replace('$', '').replace(',', '').strip()
-                try:
-                    value = float(value_str) if '.' in value_str or any(c.isdigit() for c in value_str) else value_str
-                except ValueError:
-                    value = value_str
-                    
-                conditions.append({
-                    'field': FIELD_MAP.get(es_field, es_field),
-                    'op': sql_op,
-                    'value': value
-                })
-                return conditions # Devolvemos la primera condición encontrada
-    return conditions # Devolvemos lista vacía si no hay match
+def _clean_condition_value(value_str):
+    """
+    Limpia símbolos de moneda y separadores de miles de un número ('$10,000' -> '10000'). El valor
+    queda como texto: el tipo lo pone su columna al compilar el filtro (utils.coerce_column_value).
+    """
+    value = value_str.strip()
+    numeric = value.lstrip('$qQ').replace(',', '')
+    return numeric if _NUMBER_RE.fullmatch(numeric) else value
 
 def extract_update_params(user_query):
     """
@@ -140,4 +166,271 @@ def extract_update_params(user_query):
     return {
         'set_cond': set_cond,
         'where_cond': where_cond
-    }
\ No newline at end of file
+    }
+
+# --- 3. Árbol de Predicados (Condiciones Múltiples) ---
+def parse_literal(raw):
+    """Convierte un literal de la consulta a número (float) o lo deja como texto limpio."""
+    value = raw.strip().strip('\'"').rstrip('.,')
+    numeric = value.lstrip('$qQ').replace(',', '')
+    if _NUMBER_RE.fullmatch(numeric):
+        return float(numeric)
+    return value
+
+def _longest_fields(fields):
+    """Se queda con el alias más largo en cada posición y descarta los que quedan dentro de otro."""
+    chosen = []
+    for start, _, end, alias in sorted(fields, key=lambda f: (f[0], -f[2])):
+        if chosen and start < chosen[-1][1]:
+            continue
+        chosen.append((start, end, alias))
+    return chosen
+
+def _parse_clause(text_lower, source, alias, field_end, limit, operators):
+    """Interpreta lo que sigue a un campo: BETWEEN, IN o comparación simple. Devuelve (hoja, fin)."""
+    field = FIELD_MAP[alias]
+
+    match = BETWEEN_TAIL_RE.match(text_lower, field_end)
+    if match:
+        low = parse_literal(source[match.start(1):match.end(1)])
+        high = parse_literal(source[match.start(2):match.end(2)])
+        return {'field': field, 'op': 'between', 'value': [low, high]}, match.end()
+
+    match = IN_TAIL_RE.match(text_lower, field_end, limit)
+    if match:
+        items = _LIST_SPLIT_RE.split(source[match.start(1):match.end(1)])
+        return {'field': field, 'op': 'in', 'value': [parse_literal(item) for item in items]}, match.end()
+
+    # El operador debe aparecer antes del siguiente campo (leftmost-longest)
+    for op_start, op_end, es_op in operators:
+        if op_start < field_end:
+            continue
+        if op_start >= limit:
+            break
+        value_match = _COMPARISON_VALUE_RE.match(text_lower, op_end)
+        if value_match:
+            value = parse_literal(source[value_match.start(1):value_match.end(1)])
+            return {'field': field, 'op': OPERATOR_MAP[es_op], 'value': value}, value_match.end()
+        break
+
+    match = _IMPLICIT_VALUE_RE.match(text_lower, field_end, limit)
+    if match:
+        return {'field': field, 'op': '==', 'value': parse_literal(source[match.start(1):match.end(1)])}, match.end()
+    match = _IMPLICIT_NAME_RE.match(source, field_end, limit)
+    if match:
+        return {'field': field, 'op': '==', 'value': match.group(1)}, match.end()
+    return None, field_end
+
+def extract_predicate_tree(text, table_name):
+    """
+    Extrae TODAS las condiciones de la consulta como un árbol de predicados.
+    Hojas: {'field', 'op', 'value'} con op en '>', '<', '==', '!=', 'between' o 'in'.
+    Nodos: {'logic': 'and'|'or', 'conditions': [...]} (AND tiene precedencia sobre OR).
+    Devuelve None si no se encontró ninguna condición.
+    """
+    # Se busca sobre el texto sin tildes ('región' = 'region'); los valores se toman del original
+    # para conservar mayúsculas y tildes (ej. 'IT_PROG', 'Perú')
+    text_lower = fold_accents(text)
+    source = text if len(text) == len(text_lower) else text_lower
+
+    fields, operators = CONDITION_MATCHER.scan(text_lower)
+    fields = _longest_fields(fields)
+    operators = sorted(
+        (o for o in operators if CONDITION_MATCHER.has_word_boundaries(text_lower, o[0], o[1])),
+        key=lambda o: (o[0], o[0] - o[1]) # Más a la izquierda y, a igual inicio, el más largo
+    )
+
+    or_groups = [[]]
+    consumed = None
+    for index, (start, end, alias) in enumerate(fields):
+        if consumed is not None and start < consumed:
+            continue # El campo forma parte del valor de la condición anterior
+        limit = fields[index + 1][0] if index + 1 < len(fields) else len(text_lower)
+        leaf, leaf_end = _parse_clause(text_lower, source, alias, end, limit, operators)
+        if leaf is None:
+            continue
+        if consumed is not None:
+            connector = _CONNECTOR_RE.search(text_lower, consumed, start)
+            if connector and LOGIC_CONNECTORS[connector.group(1)] == 'or':
+                or_groups.append([])
+        or_groups[-1].append(leaf)
+        consumed = leaf_end
+
+    and_nodes = [group[0] if len(group) == 1 else {'logic': 'and', 'conditions': group} for group in or_groups if group]
+    if not and_nodes:
+        return None
+    return and_nodes[0] if len(and_nodes) == 1 else {'logic': 'or', 'conditions': and_nodes}
+
+
+# --- 4. Operaciones Masivas (UPDATE aritmético e INSERT de varias filas) ---
+def extract_bulk_update(text, table_name):
+    """
+    Interpreta 'aumentar salario 10% a empleados del departamento 50' como un UPDATE por conjuntos.
+    Devuelve {'field', 'op': '*'|'+', 'amount', 'where', 'all_rows'} o None si no aplica.
+    """
+    text_lower = text.lower()
+    match = BULK_UPDATE_RE.search(text_lower)
+    if not match:
+        return None
+    field = get_db_column_name(match.group('field').strip())
+    if not field:
+        return None
+
+    amount = float(match.group('amount').lstrip('$'))
+    sign = 1 if match.group('verb') in INCREASE_KEYWORDS else -1
+    if match.group('pct'):
+        op, amount = '*', round(1 + sign * amount / 100, 6)
+    else:
+        op, amount = '+', sign * amount
+
+    # El WHERE se extrae del resto de la frase (la parte SET se tapa conservando las posiciones)
+    masked = text[:match.start()] + ' ' * (match.end() - match.start()) + text[match.end():]
+    return {
+        'field': field,
+        'op': op,
+        'amount': amount,
+        'where': extract_predicate_tree(masked, table_name),
+        'all_rows': any(re.search(rf"\b{keyword}\b", text_lower) for keyword in ALL_ROWS_KEYWORDS),
+    }
+
+# Alias de FIELD_MAP normalizados igual que el texto ('Salário' y 'salario' resuelven a la misma columna)
+BULK_COLUMN_ALIASES = {fold_accents(alias): field for alias, field in FIELD_MAP.items()}
+
+def _resolve_bulk_column(header, table_name):
+    name = fold_accents(header.strip())
+    column = BULK_COLUMN_ALIASES.get(name, name)
+    return column if column in DB_SCHEMA[table_name]['fields'] else None
+
+def extract_bulk_rows(text, table_name):
+    """
+    Filas estilo CSV tras ':' ('insertar empleados: nombre, apellido, ...; Juan, Perez, ...').
+    Filas separadas por salto de línea o ';'. Devuelve {'columns', 'unknown', 'rows'} o None.
+    """
+    if ':' not in text or table_name not in DB_SCHEMA:
+        return None
+    lines = [line.strip() for line in _BULK_ROW_SPLIT_RE.split(text.split(':', 1)[1]) if line.strip()]
+    if len(lines) < 2:
+        return None
+    header, *rows = list(csv.reader(lines, skipinitialspace=True))
+    columns = [_resolve_bulk_column(h, table_name) for h in header]
+    return {
+        'columns': columns,
+        'unknown': [h.strip() for h, column in zip(header, columns) if column is None],
+        'rows': [[value.strip() for value in row] for row in rows],
+    }
+
+
+# --- 5. Organigrama (subordinados / cadena de mando) ---
+def extract_hierarchy_request(text):
+    """
+    'subordinados de 100 hasta nivel 2' -> {'direction': 'down', 'root_id': 100, 'max_depth': 2}
+    'cadena de mando de 206' -> {'direction': 'up', 'root_id': 206, 'max_depth': HIERARCHY_MAX_DEPTH}
+    Devuelve None si falta la dirección o el empleado.
+    """
+    text_folded = fold_accents(text)
+    if any(keyword in text_folded for keyword in UP_KEYWORDS):
+        direction = 'up'
+    elif any(keyword in text_folded for keyword in DOWN_KEYWORDS):
+        direction = 'down'
+    else:
+        return None
+
+    max_depth = HIERARCHY_MAX_DEPTH
+    depth_match = HIERARCHY_DEPTH_RE.search(text_folded)
+    if depth_match:
+        max_depth = min(int(depth_match.group(1)), HIERARCHY_MAX_DEPTH)
+        text_folded = text_folded[:depth_match.start()] + text_folded[depth_match.end():]
+    elif any(re.search(rf"\b{keyword}\b", text_folded) for keyword in DIRECT_KEYWORDS):
+        max_depth = 1
+
+    root_match = _INTEGER_RE.search(text_folded)
+    if not root_match or max_depth < 1:
+        return None
+    return {'direction': direction, 'root_id': int(root_match.group()), 'max_depth': max_depth}
+
+
+# --- 6. Agregaciones (COUNT / SUM / AVG / MIN / MAX con GROUP BY) ---
+def _mask(text, spans):
+    for start, end in spans:
+        text = text[:start] + ' ' * (end - start) + text[end:]
+    return text
+
+def extract_aggregation(text):
+    """
+    'salario promedio por departamento' -> {'func': 'avg', 'field': 'salary', 'group_by': ['department_id'],
+    'table': 'employees', 'where': None}. La tabla se decide sin contar los campos del GROUP BY
+    (si no se nombra ninguna, employees) y solo valen los alias de columnas de esa tabla:
+    'salario maximo' es max_salary en jobs, pero MAX(salary) en employees. Las condiciones
+    sobre campos de otras tablas se resuelven después con joins. None si no hay función.
+    """
+    text_folded = fold_accents(text)
+    source = text if len(text) == len(text_folded) else text_folded
+    fields, operators = CONDITION_MATCHER.scan(text_folded)
+    operators = sorted(
+        (o for o in operators if CONDITION_MATCHER.has_word_boundaries(text_folded, o[0], o[1])),
+        key=lambda o: (o[0], o[0] - o[1])
+    )
+    longest = _longest_fields(fields)
+    group_starts, condition_starts, group_end = set(), set(), None
+    for index, (start, end, alias) in enumerate(longest):
+        limit = longest[index + 1][0] if index + 1 < len(longest) else len(text_folded)
+        chained = group_end is not None and _GROUP_BY_JOIN_RE.fullmatch(text_folded, group_end, start)
+        is_group = chained or _GROUP_BY_PREFIX_RE.search(text_folded, max(0, start - 20), start)
+        # Un campo con operador o valor es una condición, no una columna de agrupación
+        is_condition = _parse_clause(text_folded, source, alias, end, limit, operators)[0] is not None
+        if is_condition:
+            condition_starts.add(start)
+        if is_group and not is_condition:
+            group_starts.add(start)
+            group_end = end
+        else:
+            group_end = None
+    # Ni los campos del GROUP BY ni los de las condiciones ('de la región Europe', que puede
+    # ser de otra tabla vía join) deciden la tabla
+    table_spans = [(start, end) for start, _, end, _ in fields if start in group_starts | condition_starts]
+    table = TABLE_INDEX.best(_mask(text_folded, table_spans)) or 'employees'
+
+    columns = DB_SCHEMA[table]['fields']
+    chosen = _longest_fields([field for field in fields if FIELD_MAP[field[3]] in columns])
+    group_by = [FIELD_MAP[alias] for start, _, alias in chosen if start in group_starts]
+    measures = [FIELD_MAP[alias] for start, _, alias in chosen if start not in group_starts]
+
+    # La función se busca fuera de los alias válidos ('numero de telefono' no es un COUNT)
+    match = AGGREGATE_RE.search(_mask(text_folded, [(start, end) for start, end, _ in chosen]))
+    if not match:
+        return None
+    func = _AGGREGATE_FUNCTIONS[match.group(1)]
+    field = measures[0] if measures else None
+    if func == 'sum' and field is None:
+        func = 'count' # 'total de empleados'
+    if func == 'count':
+        field = None
+
+    group_spans_original = [(start, end) for start, end, _ in chosen if start in group_starts]
+    return {
+        'func': func,
+        'field': field,
+        'group_by': list(dict.fromkeys(group_by)),
+        'table': table,
+        'where': extract_predicate_tree(_mask(text, group_spans_original), table),
+    }
+
+
+# --- 7. Datos Relacionados en la Salida ---
+def extract_output_relations(text, table_name):
+    """
+    'listar empleados con su departamento y jefe' -> ['department', 'manager'] (rutas de
+    RELATION_KEYWORDS). Solo cuenta lo que sigue a 'con su(s)', 'y su(s)', 'incluyendo' o
+    'junto con': 'empleados del departamento 50' filtra, no pide el departamento.
+    """
+    aliases = RELATION_KEYWORDS.get(table_name)
+    text_folded = fold_accents(text)
+    marker = _RELATION_MARKER_RE.search(text_folded)
+    if not aliases or not marker:
+        return []
+    relations = []
+    for token in tokenize(text_folded[marker.end():]):
+        path = aliases.get(token) or (aliases.get(token[:-1]) if token.endswith('s') else None)
+        if path and path not in relations:
+            relations.append(path)
+    return relations
@@ -0,0 +1,97 @@
+# plan_cache.py
+import re
+import threading
+from collections import OrderedDict
+
+from parsing import parse_literal
+
+# --- 1. Caché LRU con Contadores ---
+class LRUCache:
+    """Caché LRU acotada y segura entre hilos, con contadores de aciertos y fallos."""
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+# --- 2. Normalización de Consultas a Plantillas ---
+# Solo los números delimitados por espacios se sustituyen: el parser los trata como un token de valor
+# igual que al marcador '__N__', así que la plantilla se interpreta exactamente igual que la consulta.
+_LITERAL_RE = re.compile(r'(?<!\S)\$?\d+(?:\.\d+)?(?!\S)')
+_PLACEHOLDER_RE = re.compile(r'__(\d+)__')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def normalize_query(text):
+    """
+    Devuelve (plantilla, literales). La plantilla es la clave de la caché de planes.
+    Si la consulta ya contiene algo parecido a un marcador, devuelve (None, []) y no se cachea.
+    """
+    text = _WHITESPACE_RE.sub(' ', text.strip())
+    if '__' in text:
+        return None, []
+    literals = []
+
+    def replace(match):
+        literals.append(match.group(0))
+        return f"__{len(literals) - 1}__"
+
+    return _LITERAL_RE.sub(replace, text), literals
+
+def placeholder_index(value):
+    """Índice del literal si el valor es un marcador '__N__'; None en otro caso."""
+    if isinstance(value, str):
+        match = _PLACEHOLDER_RE.fullmatch(value)
+        if match:
+            return int(match.group(1))
+    return None
+
+def _bind_value(value, literals):
+    index = placeholder_index(value)
+    return value if index is None else parse_literal(literals[index])
+
+def bind_literals(predicate, literals):
+    """Sustituye los marcadores del árbol de predicados de la plantilla por los valores reales."""
+    if predicate is None:
+        return None
+    if 'logic' in predicate:
+        return {'logic': predicate['logic'], 'conditions': [bind_literals(c, literals) for c in predicate['conditions']]}
+    value = predicate['value']
+    if isinstance(value, list):
+        value = [_bind_value(v, literals) for v in value]
+    else:
+        value = _bind_value(value, literals)
+    return {'field': predicate['field'], 'op': predicate['op'], 'value': value}
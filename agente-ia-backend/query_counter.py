@@ -0,0 +1,50 @@
+# query_counter.py
+"""
+Cuenta las sentencias SQL que llegan a la BD durante un bloque o una petición.
+Sirve para que una regresión N+1 (una consulta por fila) haga fallar una prueba o CI:
+
+    with assert_max_queries(db.engine, 2):
+        client.post('/ask-agent', json={'query': 'listar empleados con su departamento y jefe'})
+"""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+# --- 1. Contador de Sentencias ---
+class QueryCounter:
+    """Escucha before_cursor_execute del engine mientras está activo (un executemany cuenta como una)."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+
+# --- 2. Aserciones ---
+@contextmanager
+def assert_max_queries(engine, limit):
+    """Lanza AssertionError (con las sentencias ejecutadas) si el bloque hace más de 'limit' consultas."""
+    with QueryCounter(engine) as counter:
+        yield counter
+    if counter.count > limit:
+        listing = "\n".join(f"  {index}. {' '.join(statement.split())}" for index, statement in enumerate(counter.statements, 1))
+        raise AssertionError(f"Se esperaban como máximo {limit} consultas y se ejecutaron {counter.count}:\n{listing}")
+
+def assert_request_queries(client, engine, payload, limit, path='/ask-agent'):
+    """Hace la petición con el cliente de pruebas de Flask y comprueba su número de consultas."""
+    with assert_max_queries(engine, limit) as counter:
+        response = client.post(path, json=payload)
+    return response, counter
@@ -0,0 +1,283 @@
+# reference_cache.py
+"""
+Caché en memoria de las tablas de referencia pequeñas (regions, countries, locations,
+departments, jobs): clave, nombre y claves foráneas de cada fila.
+- Nombres -> IDs: 'departamento Shipping' o 'ciudad Seattle' se reescriben como
+  department_id = 50 / department_id IN (...), sin JOIN ni consultas extra; los valores de un
+  INSERT ('Shipping' para department_id) se traducen a su clave.
+- Nombres mal escritos: un NgramIndex de los nombres corrige 'Shiping' -> 'Shipping'.
+Cada tabla se carga al primer uso y se recarga tras una escritura del agente en ella (o al
+vencer REFERENCE_CACHE_TTL); entre recargas, un nombre desconocido solo lee las filas nuevas.
+"""
+import threading
+import time
+
+from sqlalchemy import select, Integer
+
+from config import REFERENCE_CACHE_TTL, REFERENCE_CACHE_MAX_ROWS, REFERENCE_LOOKUP_MAX_KEYS
+from classifier import fold_accents
+from fuzzy import NgramIndex
+from join_planner import join_path
+
+# --- 1. Una Tabla de Referencia ---
+class ReferenceTable:
+    """Filas (como diccionarios) de una tabla de referencia, indexadas por nombre."""
+
+    def __init__(self, table_object, name_column):
+        self.name = table_object.name
+        self.pk_column = table_object.primary_key.columns[0]
+        self.name_column = table_object.c[name_column]
+        foreign_keys = [fk.parent for fk in sorted(table_object.foreign_keys, key=lambda fk: fk.parent.name)]
+        self.columns = list(dict.fromkeys([self.pk_column, self.name_column] + foreign_keys))
+        self.incremental = isinstance(self.pk_column.type, Integer)
+        self._lock = threading.Lock()
+        self._rows = None # None: sin cargar o demasiado grande para cachear
+        self._keys = set()
+        self._missing = set() # Nombres ya buscados sin éxito desde la última carga completa
+        self._by_name = {}
+        self._names = NgramIndex()
+        self._last_key = None
+        self._loaded_at = 0.0
+        self._stale = True
+        self._writes = 0 # Escrituras marcadas (mark_stale)
+        self._version = 0 # Cargas completas
+
+    def mark_stale(self):
+        with self._lock:
+            self._stale = True
+            self._writes += 1
+
+    def _add(self, row):
+        row = dict(row._mapping)
+        if row[self.pk_column.name] in self._keys:
+            return # Ya leída por otra petición
+        self._rows.append(row)
+        self._keys.add(row[self.pk_column.name])
+        name = row[self.name_column.name]
+        if name is not None:
+            self._by_name.setdefault(name, []).append(row)
+            self._names.add(fold_accents(name), name)
+        if self.incremental:
+            self._last_key = row[self.pk_column.name] if self._last_key is None else max(self._last_key, row[self.pk_column.name])
+
+    def _read_rows(self, db_session, after_key=None):
+        """Filas de la BD: todas (hasta el límite) o solo las de clave mayor que after_key."""
+        stmt = select(*self.columns)
+        stmt = stmt.limit(REFERENCE_CACHE_MAX_ROWS + 1) if after_key is None else stmt.where(self.pk_column > after_key)
+        return db_session.execute(stmt).all()
+
+    def _replace(self, rows, writes):
+        """Sustituye las filas en memoria por rows; sigue vencida si hubo una escritura durante la lectura."""
+        self._rows, self._keys, self._missing, self._by_name, self._names = [], set(), set(), {}, NgramIndex()
+        self._last_key = None
+        for row in rows:
+            self._add(row)
+        if len(rows) > REFERENCE_CACHE_MAX_ROWS:
+            self._rows = None # Ya no es una tabla pequeña: los filtros vuelven a usar JOIN
+        self._loaded_at, self._stale = time.monotonic(), self._writes != writes
+        self._version += 1
+
+    def _extend(self, rows, version):
+        """Añade filas nuevas, salvo que otra petición haya recargado la tabla entre medias."""
+        if self._version != version or self._rows is None:
+            return
+        for row in rows:
+            self._add(row)
+        if len(self._rows) > REFERENCE_CACHE_MAX_ROWS:
+            self._rows = None
+
+    def _refresh(self, db_session, names=()):
+        """
+        Carga o recarga si hace falta; con nombres que no están, busca antes filas nuevas (una
+        sola vez por nombre hasta la siguiente carga completa). La BD se lee SIN el candado, que
+        solo protege las estructuras en memoria: en modo async cada lectura cede el event loop
+        (run_sync) y otra petición que esperase el candado lo bloquearía.
+        """
+        with self._lock:
+            writes, version, after_key = self._writes, self._version, self._last_key
+            reload = self._stale or time.monotonic() - self._loaded_at > REFERENCE_CACHE_TTL
+            unknown = []
+            if not reload and self._rows is not None:
+                unknown = [name for name in names if name not in self._by_name and name not in self._keys and name not in self._missing]
+                self._missing.update(unknown)
+        if reload or (unknown and (not self.incremental or after_key is None)):
+            rows = self._read_rows(db_session)
+            with self._lock:
+                self._replace(rows, writes)
+        elif unknown:
+            rows = self._read_rows(db_session, after_key)
+            with self._lock:
+                self._extend(rows, version)
+
+    def resolve_name(self, db_session, value):
+        """(nombre tal como está en la BD, distancia) del más parecido a value; None si no hay."""
+        self._refresh(db_session, [value])
+        with self._lock:
+            if self._rows is None:
+                return None
+            found = self._names.lookup(fold_accents(value))
+        return (found[1], found[2]) if found else None
+
+    def rows_matching(self, db_session, op, value):
+        """Filas cuyo nombre cumple '==', '!=' o 'in' con value; None si la tabla no está cacheada."""
+        names = value if isinstance(value, list) else [value]
+        self._refresh(db_session, names)
+        with self._lock:
+            if self._rows is None:
+                return None
+            if op == '!=':
+                return [row for row in self._rows if row[self.name_column.name] not in (None, value)]
+            return [row for name in dict.fromkeys(names) for row in self._by_name.get(name, ())]
+
+    def key_for(self, db_session, value):
+        """
+        Clave de la fila: value si ya es una clave; si es un nombre de una sola fila, su clave
+        ('Programmer' -> 'IT_PROG'). None si no está cacheada, no existe o el nombre se repite.
+        """
+        self._refresh(db_session, [value])
+        with self._lock:
+            if self._rows is None:
+                return None
+            if value in self._keys:
+                return value
+            rows = self._by_name.get(value, ())
+            return rows[0][self.pk_column.name] if len(rows) == 1 else None
+
+    def rows_with(self, db_session, column_name, keys):
+        """Filas cuya columna column_name está en keys (un paso intermedio de la ruta de joins)."""
+        self._refresh(db_session)
+        with self._lock:
+            if self._rows is None:
+                return None
+            return [row for row in self._rows if row[column_name] in keys]
+
+
+# --- 2. Caché de Todas las Tablas de Referencia ---
+class ReferenceCache:
+    """
+    tables es {nombre: Table} y name_columns {tabla: columna descriptiva}. resolve_names activa
+    la corrección aproximada de nombres y lookups la reescritura de nombres a claves.
+    """
+
+    def __init__(self, tables, name_columns, resolve_names=True, lookups=True):
+        self.tables = {name: ReferenceTable(tables[name], column) for name, column in name_columns.items()}
+        self.resolve_names = resolve_names
+        self.lookups = lookups
+        # (tabla, columna) -> tabla de referencia cuyas claves guarda: claves foráneas y primarias
+        self.key_targets = {}
+        for name, table in tables.items():
+            for column in table.columns:
+                targets = [fk.column.table.name for fk in column.foreign_keys]
+                if column.primary_key:
+                    targets.append(name)
+                for target in targets:
+                    if target in self.tables:
+                        self.key_targets[(name, column.name)] = self.tables[target]
+
+    def mark_stale(self, table):
+        if table in self.tables:
+            self.tables[table].mark_stale()
+
+    def resolve_predicate(self, db_session, table, predicate):
+        """
+        Árbol con los nombres corregidos ('Shiping' -> 'Shipping', 'seattle' -> 'Seattle') y, si la
+        ruta de joins solo pasa por tablas cacheadas, reescritos como filtro por clave de la propia
+        tabla. Devuelve (árbol, [(original, corrección)]); sin cambios, el mismo objeto recibido.
+        """
+        corrections = []
+        resolved = self._resolve(db_session, table, predicate, corrections) if predicate else predicate
+        return resolved, corrections
+
+    def _resolve(self, db_session, table, predicate, corrections):
+        if 'logic' in predicate:
+            children = [self._resolve(db_session, table, child, corrections) for child in predicate['conditions']]
+            if all(new is old for new, old in zip(children, predicate['conditions'])):
+                return predicate
+            return {**predicate, 'conditions': children}
+        owner, _, column = predicate['field'].rpartition('.')
+        if predicate['op'] not in ('==', '!=', 'in'):
+            return predicate
+        reference = self.tables.get(owner or table)
+        if reference is not None and column == reference.name_column.name:
+            if self.resolve_names:
+                predicate = self._resolve_names(db_session, reference, predicate, corrections)
+            if self.lookups and owner:
+                predicate = self._lookup_keys(db_session, table, owner, predicate)
+            return predicate
+        # Un nombre comparado con una clave que join_planner no reconoce como nombre
+        # ('puesto Programmer' contra job_id, String(10)) se traduce a la clave
+        reference = self.key_targets.get((owner or table, column))
+        if reference is None or not self.lookups:
+            return predicate
+        values = predicate['value'] if isinstance(predicate['value'], list) else [predicate['value']]
+        keys = [self._key_for(db_session, reference, value, corrections) if isinstance(value, str) else value for value in values]
+        if keys == values:
+            return predicate
+        return {**predicate, 'value': keys if isinstance(predicate['value'], list) else keys[0]}
+
+    def _key_for(self, db_session, reference, value, corrections):
+        """Clave para value (clave o nombre, con corrección aproximada); value sin cambios si no hay ninguna."""
+        if reference.incremental and value.strip().lstrip('-').isdigit():
+            return value # Ya es una clave numérica escrita como texto ('50' en un INSERT)
+        key = reference.key_for(db_session, value.strip())
+        if key is None and self.resolve_names:
+            found = reference.resolve_name(db_session, value.strip())
+            key = reference.key_for(db_session, found[0]) if found else None
+            if key is not None and found[1]:
+                corrections.append((value, found[0]))
+        return value if key is None else key
+
+    def _resolve_names(self, db_session, reference, predicate, corrections):
+        values = predicate['value'] if isinstance(predicate['value'], list) else [predicate['value']]
+        resolved = []
+        for value in values:
+            found = reference.resolve_name(db_session, value) if isinstance(value, str) else None
+            if found and found[0] != value:
+                if found[1]: # Las diferencias solo de mayúsculas o tildes no se anuncian
+                    corrections.append((value, found[0]))
+                value = found[0]
+            resolved.append(value)
+        if resolved == values:
+            return predicate
+        return {**predicate, 'value': resolved if isinstance(predicate['value'], list) else resolved[0]}
+
+    def _lookup_keys(self, db_session, table, owner, predicate):
+        """
+        'departments.department_name' = 'Shipping' en employees -> department_id = 50. Recorre la
+        ruta de joins al revés sobre las filas cacheadas: locations (city) -> departments
+        (location_id) -> employees.department_id IN (...). Sin filas o con demasiadas claves, el JOIN se queda.
+        """
+        path = join_path(table, owner)
+        if not path or any(edge[0] not in self.tables for edge in path):
+            return predicate
+        matched = self.tables[owner].rows_matching(db_session, predicate['op'], predicate['value'])
+        for index in range(len(path) - 1, 0, -1):
+            if not matched:
+                return predicate
+            _, local_column, neighbour_column, _ = path[index]
+            keys = {row[neighbour_column.name] for row in matched}
+            matched = self.tables[path[index - 1][0]].rows_with(db_session, local_column.name, keys)
+        if not matched:
+            return predicate
+        keys = sorted({row[path[0][2].name] for row in matched} - {None})
+        if not keys or len(keys) > REFERENCE_LOOKUP_MAX_KEYS:
+            return predicate
+        field = path[0][1].name
+        return {'field': field, 'op': '==', 'value': keys[0]} if len(keys) == 1 else {'field': field, 'op': 'in', 'value': keys}
+
+    # --- 3. Valores de un INSERT ---
+    def resolve_record(self, db_session, table, record):
+        """
+        {'department_id': 'Shipping', 'job_id': 'Programmer'} -> {'department_id': 50, 'job_id': 'IT_PROG'}:
+        los nombres dados para una clave foránea se traducen con la caché. Las claves válidas, los
+        nombres repetidos (ambiguos) y los desconocidos no se tocan.
+        """
+        if not self.lookups:
+            return record
+        resolved = dict(record)
+        for field, value in record.items():
+            reference = self.key_targets.get((table, field))
+            if reference is None or reference.name == table or not isinstance(value, str):
+                continue
+            resolved[field] = self._key_for(db_session, reference, value, [])
+        return resolved
@@ -0,0 +1,179 @@
+# result_cache.py
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+# --- 1. Interfaz de la Caché de Resultados ---
+class ResultCache(ABC):
+    """
+    Interfaz de la caché de resultados del SELECT. Las entradas se agrupan por tabla para
+    que INSERT/UPDATE/DELETE puedan invalidarlas (write-through) al hacer commit; depends_on
+    son las demás tablas que lee la entrada (joins del filtro, relaciones cargadas), cuya escritura
+    también la invalida.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def get(self, table, key):
+        """Valor cacheado o None si no está o venció (cuenta el acierto o fallo)."""
+
+    @abstractmethod
+    def set(self, table, key, value, depends_on=()):
+        """Guarda el valor con el TTL de la caché, desalojando las entradas menos usadas si se supera maxsize."""
+
+    @abstractmethod
+    def invalidate_table(self, table):
+        """Descarta las entradas de la tabla y las que dependen de ella."""
+
+    @abstractmethod
+    def clear(self):
+        """Descarta todas las entradas."""
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'backend': type(self).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def result_cache_key(predicate, after_key=None, limit=None, relations=None):
+    """Clave determinista a partir del árbol de predicados ya enlazado, la página pedida y las relaciones cargadas."""
+    return json.dumps({'predicate': predicate, 'after': after_key, 'limit': limit, 'relations': relations or []}, sort_keys=True, default=str)
+
+
+# --- 2. Backend en Memoria (por proceso) ---
+class MemoryResultCache(ResultCache):
+    """Diccionario ordenado en el proceso: TTL por entrada y desalojo LRU al superar maxsize."""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        super().__init__(maxsize, ttl)
+        self._data = OrderedDict() # (tabla, clave) -> (expira_en, valor, tablas de las que depende)
+        self._lock = threading.Lock()
+
+    def get(self, table, key):
+        with self._lock:
+            entry = self._data.get((table, key))
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[(table, key)]
+                self.misses += 1
+                return None
+            self._data.move_to_end((table, key))
+            self.hits += 1
+            return entry[1]
+
+    def set(self, table, key, value, depends_on=()):
+        with self._lock:
+            self._data[(table, key)] = (time.monotonic() + self.ttl, value, frozenset(depends_on))
+            self._data.move_to_end((table, key))
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate_table(self, table):
+        with self._lock:
+            for cache_key in [k for k, entry in self._data.items() if k[0] == table or table in entry[2]]:
+                del self._data[cache_key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        stats = super().stats()
+        stats['size'] = len(self._data)
+        return stats
+
+
+# --- 3. Backend SQLite Local (compartido entre procesos/workers) ---
+class SQLiteResultCache(ResultCache):
+    """
+    Almacén en un archivo SQLite local: todos los workers de la máquina comparten entradas
+    e invalidaciones. Los valores se guardan como JSON.
+    """
+
+    def __init__(self, path, maxsize=1024, ttl=60):
+        super().__init__(maxsize, ttl)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(result_cache)")]
+        if columns and 'depends_on' not in columns:
+            self._conn.execute("DROP TABLE result_cache") # Archivo de una versión anterior: solo es caché
+        # depends_on: ',tabla,otra,' para invalidar con LIKE '%,tabla,%'
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS result_cache ("
+            " table_name TEXT NOT NULL, cache_key TEXT NOT NULL, expires_at REAL NOT NULL,"
+            " last_access REAL NOT NULL, value TEXT NOT NULL, depends_on TEXT NOT NULL DEFAULT '',"
+            " PRIMARY KEY (table_name, cache_key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS result_cache_access ON result_cache (last_access)")
+
+    def get(self, table, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM result_cache WHERE table_name = ? AND cache_key = ? AND expires_at >= ?",
+                (table, key, now)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE result_cache SET last_access = ? WHERE table_name = ? AND cache_key = ?",
+                (now, table, key)
+            )
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, table, key, value, depends_on=()):
+        now = time.time()
+        dependencies = "," + ",".join(sorted(depends_on)) + "," if depends_on else ""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO result_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (table, key, now + self.ttl, now, json.dumps(value, default=str), dependencies)
+            )
+            # Expiradas primero; después LRU por último acceso
+            self._conn.execute("DELETE FROM result_cache WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "DELETE FROM result_cache WHERE rowid IN ("
+                " SELECT rowid FROM result_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,)
+            )
+
+    def invalidate_table(self, table):
+        with self._lock:
+            self._conn.execute("DELETE FROM result_cache WHERE table_name = ? OR depends_on LIKE ?", (table, f"%,{table},%"))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM result_cache")
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            stats['size'] = self._conn.execute("SELECT COUNT(*) FROM result_cache").fetchone()[0]
+        return stats
+
+
+# --- 4. Fábrica ---
+def create_result_cache(backend, maxsize=1024, ttl=60, path=None):
+    """Devuelve la caché configurada o None si está desactivada."""
+    if not backend:
+        return None
+    if backend == 'memory':
+        return MemoryResultCache(maxsize=maxsize, ttl=ttl)
+    if backend == 'sqlite':
+        return SQLiteResultCache(path, maxsize=maxsize, ttl=ttl)
+    raise ValueError(f"Backend de caché de resultados desconocido: '{backend}'")
@@ -0,0 +1,171 @@
+# session_store.py
+import copy
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+# --- 1. Interfaz del Almacén de Sesiones ---
+class SessionStore(ABC):
+    """
+    Guarda el conversation_state en el servidor bajo un ID de sesión opaco: el cliente solo
+    envía y recibe el token, no el estado completo (data_collected, missing_fields, cursor...).
+    """
+
+    def __init__(self, maxsize=10000, ttl=1800):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+    def new_session_id(self):
+        return secrets.token_urlsafe(16)
+
+    @abstractmethod
+    def get(self, session_id):
+        """Copia del estado guardado (y renueva el TTL); None si la sesión no existe o venció."""
+
+    @abstractmethod
+    def set(self, session_id, state):
+        """Guarda el estado de la sesión, desalojando las más antiguas si se supera maxsize."""
+
+    @abstractmethod
+    def delete(self, session_id):
+        """Olvida la sesión (conversación terminada)."""
+
+    def stats(self):
+        return {'backend': type(self).__name__, 'ttl': self.ttl, 'maxsize': self.maxsize}
+
+
+# --- 2. Backend en Memoria (por proceso) ---
+class MemorySessionStore(SessionStore):
+    """TTL deslizante (se renueva en cada turno) y desalojo LRU al superar maxsize."""
+
+    def __init__(self, maxsize=10000, ttl=1800):
+        super().__init__(maxsize, ttl)
+        self._data = OrderedDict() # session_id -> (expira_en, estado)
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._data.get(session_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._data[session_id]
+                return None
+            self._data[session_id] = (time.monotonic() + self.ttl, entry[1])
+            self._data.move_to_end(session_id)
+            # Copia: process_query modifica el estado y no debe tocar el guardado
+            return copy.deepcopy(entry[1])
+
+    def set(self, session_id, state):
+        with self._lock:
+            self._data[session_id] = (time.monotonic() + self.ttl, copy.deepcopy(state))
+            self._data.move_to_end(session_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._data.pop(session_id, None)
+
+    def stats(self):
+        stats = super().stats()
+        stats['size'] = len(self._data)
+        return stats
+
+
+# --- 3. Backend SQLite Local (persistente y compartido entre workers) ---
+class SQLiteSessionStore(SessionStore):
+    """Sesiones en un archivo SQLite local: sobreviven a reinicios y las comparten los workers."""
+
+    def __init__(self, path, maxsize=10000, ttl=1800):
+        super().__init__(maxsize, ttl)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY, expires_at REAL NOT NULL, state TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires_at)")
+
+    def get(self, session_id):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state FROM sessions WHERE session_id = ? AND expires_at >= ?", (session_id, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE sessions SET expires_at = ? WHERE session_id = ?", (now + self.ttl, session_id))
+        return json.loads(row[0])
+
+    def set(self, session_id, state):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)",
+                (session_id, now + self.ttl, json.dumps(state, default=str))
+            )
+            # Expiradas primero; después las de vencimiento más próximo (= menos usadas recientemente)
+            self._conn.execute("DELETE FROM sessions WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "DELETE FROM sessions WHERE rowid IN ("
+                " SELECT rowid FROM sessions ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,)
+            )
+
+    def delete(self, session_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            stats['size'] = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return stats
+
+
+# --- 4. Fábrica y Turnos de Conversación ---
+def create_session_store(backend, maxsize=10000, ttl=1800, path=None):
+    """Devuelve el almacén configurado o None (modo antiguo: el cliente reenvía conversation_state)."""
+    if not backend:
+        return None
+    if backend == 'memory':
+        return MemorySessionStore(maxsize=maxsize, ttl=ttl)
+    if backend == 'sqlite':
+        return SQLiteSessionStore(path, maxsize=maxsize, ttl=ttl)
+    raise ValueError(f"Backend de sesiones desconocido: '{backend}'")
+
+def load_conversation(store, request_data):
+    """Devuelve (session_id, conversation_state) para el turno. Una sesión caducada empieza de cero."""
+    if store is None:
+        return None, dict(request_data.get('conversation_state') or {})
+    session_id = request_data.get('session_id')
+    state = store.get(session_id) if session_id else None
+    if state is None:
+        # IDs desconocidos no se reutilizan: el servidor emite uno nuevo al guardar
+        return None, {}
+    return session_id, state
+
+def save_conversation(store, session_id, agent_response):
+    """
+    Guarda el estado devuelto por process_query y lo sustituye en la respuesta por el token.
+    'missing_fields' se devuelve solo como pista para la interfaz; el servidor no lo lee.
+    """
+    if store is None:
+        return agent_response
+    state = agent_response.pop('conversation_state', None) or {}
+    if not state:
+        if session_id:
+            store.delete(session_id)
+        agent_response['session_id'] = None
+    else:
+        session_id = session_id or store.new_session_id()
+        store.set(session_id, state)
+        agent_response['session_id'] = session_id
+    agent_response['missing_fields'] = state.get('missing_fields', [])
+    return agent_response
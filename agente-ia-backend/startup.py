@@ -0,0 +1,84 @@
+# startup.py
+"""
+Arranque rápido: evita el trabajo de base de datos que no cambia entre reinicios.
+- create_all() inspecciona cada tabla (una ida y vuelta por tabla); con FAST_START solo se
+  ejecuta si la marca de agent_schema_version no coincide con la huella de models.py.
+- La comprobación de datos es un sondeo (SELECT pk ... LIMIT 1), no un COUNT(*) de employees.
+El snapshot del matcher NO se escribe al importar: se genera con un paso explícito al
+construir la imagen ('python startup.py --matcher-snapshot [ruta]') y, con FAST_START, se carga
+en los siguientes arranques.
+"""
+import argparse
+import hashlib
+
+from sqlalchemy import select, delete, insert
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+
+from config import FAST_START
+from models import SchemaVersion
+
+# Sentencias de Core sobre las tablas: el arranque no fuerza la configuración de los mappers ORM
+SCHEMA_VERSION_TABLE = SchemaVersion.__table__
+
+# --- 1. Marca de Versión del Esquema ---
+def schema_fingerprint(metadata):
+    """Huella de tablas, columnas (tipo, nulos, claves) e índices de los modelos."""
+    parts = []
+    for table in sorted(metadata.tables.values(), key=lambda t: t.name):
+        parts.append(table.name)
+        for column in table.columns:
+            targets = ",".join(sorted(fk.target_fullname for fk in column.foreign_keys))
+            parts.append(f"{column.name}:{column.type}:{column.nullable}:{column.primary_key}:{column.unique}:{targets}")
+        parts.extend(sorted(index.name for index in table.indexes))
+    return hashlib.sha256("\n".join(parts).encode('utf-8')).hexdigest()
+
+def read_schema_version(db_session):
+    """Versión guardada en la BD, o None si la tabla de la marca aún no existe."""
+    try:
+        return db_session.scalar(select(SCHEMA_VERSION_TABLE.c.version))
+    except SQLAlchemyError:
+        db_session.rollback() # En PostgreSQL la transacción queda abortada tras el error
+        return None
+
+def write_schema_version(db_session, version):
+    try:
+        db_session.execute(delete(SCHEMA_VERSION_TABLE))
+        db_session.execute(insert(SCHEMA_VERSION_TABLE).values(version=version))
+        db_session.commit()
+    except IntegrityError:
+        # Otra instancia arrancando a la vez ya escribió la misma marca
+        db_session.rollback()
+
+def ensure_schema(db, fast_start=FAST_START):
+    """Ejecuta create_all() solo si hace falta. Devuelve True si se comprobó/creó el esquema."""
+    version = schema_fingerprint(db.metadata)
+    if fast_start and read_schema_version(db.session) == version:
+        return False
+    db.create_all()
+    write_schema_version(db.session, version)
+    return True
+
+# --- 2. Sondeo de Datos ---
+def has_rows(db_session, Model):
+    """Existe al menos una fila: se detiene en la primera en lugar de contar la tabla entera."""
+    primary_key = Model.__table__.primary_key.columns[0]
+    return db_session.execute(select(primary_key).limit(1)).first() is not None
+
+
+# --- 3. Paso de Construcción ---
+def main():
+    parser = argparse.ArgumentParser(description="Artefactos del arranque rápido (FAST_START).")
+    parser.add_argument('--matcher-snapshot', nargs='?', const='', metavar='RUTA',
+                        help="Escribe el snapshot del matcher (por defecto en MATCHER_SNAPSHOT_PATH)")
+    args = parser.parse_args()
+    if args.matcher_snapshot is None:
+        parser.print_help()
+        return
+    import parsing
+    path = args.matcher_snapshot or parsing.MATCHER_SNAPSHOT_PATH
+    parsing.save_matcher_snapshot(path)
+    print(f"Snapshot del matcher escrito en {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+# statement_cache.py
+"""
+Plantillas de sentencias con parámetros enlazados.
+- Un filtro se separa en su forma ('salary > :lit0 AND department_id IN :lit1') y sus valores:
+  las consultas con la misma forma comparten UNA sentencia preparada, así que la caché de
+  sentencias compiladas de SQLAlchemy (y las sentencias preparadas del driver) aciertan siempre.
+- La vista previa SQL se genera desde la compilación de esa misma sentencia, con cada valor
+  escrito por el dialecto según el tipo de su columna (comillas escapadas, fechas, decimales).
+- Contadores de aciertos de la caché compilada de SQLAlchemy, para comprobar que funciona.
+"""
+import re
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import STATEMENT_CACHE_SIZE
+from plan_cache import LRUCache
+
+# --- 1. Forma del Filtro y Valores ---
+def parameterize_predicate(predicate, values):
+    """
+    Árbol con cada valor sustituido por un marcador '__N__' (N = posición en values, que recibe los
+    valores). La lista de un 'in' es UN solo marcador: se enlaza como parámetro expandible y la forma
+    no cambia con el número de elementos.
+    """
+    if 'logic' in predicate:
+        return {'logic': predicate['logic'], 'conditions': [parameterize_predicate(child, values) for child in predicate['conditions']]}
+    value = predicate['value']
+    if isinstance(value, list) and predicate['op'] != 'in':
+        markers = []
+        for item in value:
+            values.append(item)
+            markers.append(f"__{len(values) - 1}__")
+        return {'field': predicate['field'], 'op': predicate['op'], 'value': markers}
+    values.append(value)
+    return {'field': predicate['field'], 'op': predicate['op'], 'value': f"__{len(values) - 1}__"}
+
+def shape_key(shape):
+    """Clave estable (hashable) de la forma de un árbol."""
+    if shape is None:
+        return None
+    if 'logic' in shape:
+        return (shape['logic'],) + tuple(shape_key(child) for child in shape['conditions'])
+    value = shape['value']
+    return (shape['field'], shape['op'], tuple(value) if isinstance(value, list) else value)
+
+
+# --- 2. Vista Previa SQL desde la Sentencia Compilada ---
+_BIND_RE = re.compile(r"\(?__\[POSTCOMPILE_(\w+)\]\)?|(?<![:\w]):(\w+)")
+
+class SqlPreview:
+    """
+    SQL de una plantilla compilada UNA vez por dialecto (estilo de parámetros 'named'); cada
+    vista previa solo sustituye los parámetros por literales con el literal_processor del tipo de
+    su bindparam, en lugar de recompilar la sentencia con literal_binds.
+    """
+
+    def __init__(self, stmt, dialect):
+        compiled = stmt.compile(dialect=_named_dialect(dialect))
+        self.sql = compiled.string
+        self.defaults = compiled.params # LIMIT, literales fijos, etc.
+        self._processors = {name: bind.type.literal_processor(compiled.dialect) for name, bind in compiled.binds.items()}
+
+    def _literal(self, name, value):
+        if value is None:
+            return "NULL"
+        processor = self._processors.get(name)
+        return processor(value) if processor else repr(value)
+
+    def render(self, params=None):
+        values = {**self.defaults, **(params or {})}
+
+        def replace(match):
+            if match.group(1):
+                name = match.group(1)
+                return "(" + (", ".join(self._literal(name, item) for item in values[name]) or "NULL") + ")"
+            name = match.group(2)
+            return self._literal(name, values[name]) if name in values else match.group(0)
+
+        return _BIND_RE.sub(replace, self.sql) + ";"
+
+_NAMED_DIALECTS = {}
+
+def _named_dialect(dialect):
+    """Instancia del mismo dialecto con parámetros ':nombre' (solo para compilar la vista previa)."""
+    named = _NAMED_DIALECTS.get(type(dialect))
+    if named is None:
+        named = _NAMED_DIALECTS[type(dialect)] = type(dialect)(paramstyle='named')
+    return named
+
+
+# --- 3. Plantillas Cacheadas ---
+class StatementTemplate:
+    """
+    Sentencias preparadas de una forma de filtro (p. ej. {'page', 'stream'}) y la columna de cada
+    marcador, para convertir los valores al tipo exacto al enlazarlos. La vista previa de cada
+    sentencia se compila al primer uso.
+    """
+
+    def __init__(self, statements, columns):
+        self.statements = statements
+        self.columns = columns
+        self._previews = {}
+        self._lock = threading.Lock()
+
+    def preview(self, name, dialect, params):
+        key = (name, type(dialect))
+        preview = self._previews.get(key)
+        if preview is None:
+            with self._lock:
+                preview = self._previews.get(key) or SqlPreview(self.statements[name], dialect)
+                self._previews[key] = preview
+        return preview.render(params)
+
+STATEMENT_CACHE = LRUCache(maxsize=STATEMENT_CACHE_SIZE)
+
+
+# --- 4. Aciertos de la Caché Compilada de SQLAlchemy ---
+class CompiledCacheMetrics:
+    """
+    Cuenta, por sentencia ejecutada, si SQLAlchemy reutilizó la compilación ('hit'), la generó
+    ('miss') o no pudo cachearla ('no_key': sentencias sin clave de caché, 'disabled').
+    """
+    OUTCOMES = {'CACHE_HIT': 'hit', 'CACHE_MISS': 'miss', 'NO_CACHE_KEY': 'no_key', 'CACHING_DISABLED': 'disabled', 'NO_DIALECT_SUPPORT': 'disabled'}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = dict.fromkeys(('hit', 'miss', 'no_key', 'disabled', 'raw'), 0)
+
+    def record(self, context):
+        cache_hit = getattr(context, 'cache_hit', None) if getattr(context, 'compiled', None) is not None else None
+        outcome = self.OUTCOMES.get(getattr(cache_hit, 'name', None), 'raw') # 'raw': SQL textual del driver
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self.counts)
+        compiled = counts['hit'] + counts['miss']
+        counts['hit_rate'] = round(counts['hit'] / compiled, 4) if compiled else 0.0
+        return counts
+
+COMPILED_CACHE_METRICS = CompiledCacheMetrics()
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _record_cache_hit(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        COMPILED_CACHE_METRICS.record(context)
+
+def statement_cache_stats():
+    """Plantillas propias (LRU) y caché compilada de SQLAlchemy."""
+    return {'templates': STATEMENT_CACHE.stats(), 'compiled': COMPILED_CACHE_METRICS.snapshot()}
+
+def statement_cache_gauges(stats):
+    """statement_cache_stats() como gauges agent_statement_cache_* para /metrics."""
+    gauges = {f"agent_statement_cache_templates_{key}": value for key, value in stats['templates'].items()}
+    gauges.update({f"agent_statement_cache_compiled_{key}": value for key, value in stats['compiled'].items()})
+    return gauges
@@ -0,0 +1,55 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Las pruebas nunca tocan la BD de DATABASE_URL: config.py la lee al importarse, así que se fija
+# aquí (antes de cualquier import del backend) a un SQLite propio de la sesión de pruebas
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='hr_tests_'), 'hr.sqlite')
+
+SEED_SQL = os.path.join(BACKEND_DIR, 'init-db', 'hr_full_setup.sql')
+SEED_TABLES = ['regions', 'countries', 'locations', 'jobs', 'departments', 'employees']
+# Empleados extra del departamento 50 (Shipping, a cargo de 201): más de una página de resultados
+EXTRA_EMPLOYEES = range(300, 325)
+
+
+def seed_hr(db):
+    """Datos de init-db/hr_full_setup.sql y EXTRA_EMPLOYEES; antes borra lo que hubiera."""
+    from sqlalchemy import text
+    for table in reversed(SEED_TABLES):
+        db.session.execute(text(f"DELETE FROM {table}"))
+    with open(SEED_SQL, encoding='utf-8') as seed_file:
+        for line in seed_file:
+            if line.startswith('INSERT'):
+                db.session.execute(text(line))
+    for employee_id in EXTRA_EMPLOYEES:
+        db.session.execute(text(
+            "INSERT INTO employees (employee_id, first_name, last_name, email, hire_date, job_id, salary, manager_id, department_id) "
+            f"VALUES ({employee_id}, 'N{employee_id}', 'L{employee_id}', 'E{employee_id}', '2020-01-01', 'IT_PROG', {4000 + employee_id}, 201, 50)"
+        ))
+    db.session.commit()
+
+
+@pytest.fixture(scope='session')
+def hr_app():
+    import api
+    with api.app.app_context():
+        api.db.create_all()
+    return api
+
+
+@pytest.fixture
+def hr_db(hr_app):
+    """Extensión db dentro de un app context, con los datos recién sembrados y las cachés vacías."""
+    from db_agent import MODEL_MAP, invalidate_cached_results
+    with hr_app.app.app_context():
+        seed_hr(hr_app.db)
+        for table in MODEL_MAP:
+            invalidate_cached_results(table, hr_app.db.session)
+        yield hr_app.db
+        hr_app.db.session.remove()
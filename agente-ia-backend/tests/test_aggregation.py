@@ -0,0 +1,59 @@
+# tests/test_aggregation.py
+"""Agregaciones: interpretación (función, medida, GROUP BY, filtro) y el cálculo en la BD."""
+import pytest
+
+from db_agent import answer_query
+from parsing import extract_aggregation
+
+
+@pytest.mark.parametrize('query, aggregation', [
+    ("cuantos empleados por departamento",
+     {'func': 'count', 'field': None, 'group_by': ['department_id'], 'table': 'employees', 'where': None}),
+    ("salario promedio por departamento",
+     {'func': 'avg', 'field': 'salary', 'group_by': ['department_id'], 'table': 'employees', 'where': None}),
+    ("salario máximo por puesto y departamento",
+     {'func': 'max', 'field': 'salary', 'group_by': ['job_id', 'department_id'], 'table': 'employees', 'where': None}),
+    ("total de empleados", {'func': 'count', 'field': None, 'group_by': [], 'table': 'employees', 'where': None}),
+    ("suma de salario de empleados del departamento 20",
+     {'func': 'sum', 'field': 'salary', 'group_by': [], 'table': 'employees',
+      'where': {'field': 'department_id', 'op': '==', 'value': 20.0}}),
+    # 'salario maximo' es una columna de jobs, no MAX(salary)
+    ("promedio de salario maximo de puestos", {'func': 'avg', 'field': 'max_salary', 'group_by': [], 'table': 'jobs', 'where': None}),
+    # 'numero de telefono' es un alias de campo, no un COUNT
+    ("numero de telefono de empleados", None),
+])
+def test_extract_aggregation(query, aggregation):
+    assert extract_aggregation(query) == aggregation
+
+
+@pytest.mark.parametrize('query, rows, sql', [
+    ("cuantos empleados por departamento",
+     [{'DEPARTMENT_ID': 10, 'CANTIDAD': 1}, {'DEPARTMENT_ID': 20, 'CANTIDAD': 4},
+      {'DEPARTMENT_ID': 50, 'CANTIDAD': 26}, {'DEPARTMENT_ID': 80, 'CANTIDAD': 1}],
+     "SELECT employees.department_id, count(*) AS value FROM employees GROUP BY employees.department_id ORDER BY employees.department_id;"),
+    ("salario promedio por departamento",
+     [{'DEPARTMENT_ID': 10, 'PROMEDIO_SALARY': 24000.0}, {'DEPARTMENT_ID': 20, 'PROMEDIO_SALARY': 9825.0},
+      {'DEPARTMENT_ID': 50, 'PROMEDIO_SALARY': 4396.15}, {'DEPARTMENT_ID': 80, 'PROMEDIO_SALARY': 10000.0}],
+     "SELECT employees.department_id, avg(employees.salary) AS value FROM employees GROUP BY employees.department_id ORDER BY employees.department_id;"),
+    ("suma de salario de empleados del departamento 20", [{'SUMA_SALARY': 39300.0}],
+     "SELECT sum(employees.salary) AS value FROM employees WHERE employees.department_id = 20;"),
+    # El nombre se traduce a su clave con la caché de referencia: sin JOIN
+    ("cuantos empleados del departamento Shipping", [{'CANTIDAD': 26}],
+     "SELECT count(*) AS value FROM employees WHERE employees.department_id = 50;"),
+])
+def test_aggregation_is_computed_in_the_database(hr_db, query, rows, sql):
+    response = answer_query(query, hr_db.session)
+    assert response['type'] == 'query_result', response['agent_text']
+    assert response['data'] == rows
+    assert " ".join(response['sql_statement'].split()) == sql
+
+
+def test_filter_on_another_table(hr_db):
+    response = answer_query("cuantos empleados de la ciudad Seattle", hr_db.session)
+    assert response['data'] == [{'CANTIDAD': 27}]
+
+
+def test_non_numeric_measure_is_an_error(hr_db):
+    response = answer_query("promedio de nombre de empleados", hr_db.session)
+    assert response['type'] == 'error'
+    assert "no es numérico" in response['agent_text']
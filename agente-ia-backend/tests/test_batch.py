@@ -0,0 +1,68 @@
+# tests/test_batch.py
+"""Lotes de consultas: agrupación en UNION ALL, escrituras en orden y errores por consulta."""
+from batch import answer_batch, plan_batch, plan_item, run_select_group, validate_batch
+from db_agent import answer_query
+from query_counter import QueryCounter, assert_max_queries
+
+SELECTS = [
+    "listar empleados del departamento 50",
+    "listar empleados con salario mayor a 10000",
+    "listar empleados del departamento 20",
+    "listar empleados con salario mayor a 10000",
+]
+
+
+def test_validate_batch():
+    assert validate_batch(SELECTS) is None
+    assert validate_batch([]) is not None
+    assert validate_batch("listar empleados") is not None
+    assert validate_batch(["listar empleados", "  "]) is not None
+
+
+def test_plan_groups_selects_by_table_and_isolates_writes():
+    segments = plan_batch(SELECTS + ["listar departamentos", "eliminar empleados del departamento 80", "listar empleados del departamento 80"])
+    # Lecturas (grupo de employees + departamentos), la escritura sola y la lectura posterior
+    assert [len(tasks) for tasks in segments] == [2, 1, 1]
+
+
+def test_group_runs_in_one_union_with_bound_values(hr_db):
+    members = [plan_item(index, query) for index, query in enumerate(SELECTS)]
+    with assert_max_queries(hr_db.engine, 1) as first:
+        responses = run_select_group(hr_db.session, 'employees', members)
+    # Mismas formas de filtro con otros valores: la misma sentencia, solo cambian los parámetros
+    others = [plan_item(index, query.replace('50', '80').replace('10000', '12000')) for index, query in enumerate(SELECTS)]
+    with QueryCounter(hr_db.engine) as second:
+        run_select_group(hr_db.session, 'employees', others)
+    assert 'UNION ALL' in first.statements[0]
+    assert second.statements == first.statements
+    assert '10000' not in first.statements[0] and '50' not in first.statements[0]
+
+    for index, query in enumerate(SELECTS):
+        single = answer_query(query, hr_db.session)
+        assert responses[index]['data'] == single['data']
+        assert responses[index]['sql_statement'] == single['sql_statement']
+        assert responses[index]['conversation_state'] == single['conversation_state']
+
+
+def test_invalid_filter_only_fails_its_query(hr_db):
+    queries = ["listar empleados del departamento 20", "listar empleados con fecha de contratación mayor a 2021-31-01"]
+    members = [plan_item(index, query) for index, query in enumerate(queries)]
+    responses = run_select_group(hr_db.session, 'employees', members)
+    assert [row['EMPLOYEE_ID'] for row in responses[0]['data']] == [200, 202, 204, 205]
+    assert responses[1]['type'] == 'error'
+    assert "Fecha no válida" in responses[1]['agent_text']
+
+
+def test_answer_batch_keeps_order_and_sees_earlier_writes(hr_db, hr_app):
+    queries = [
+        "listar empleados del departamento 80",
+        "asdf qwer",
+        "eliminar empleados del departamento 80",
+        "listar empleados del departamento 80",
+        "cuantos empleados por departamento",
+    ]
+    results = answer_batch(queries, hr_app.batch_session)
+    assert [result['type'] for result in results] == ['query_result', 'error', 'query_success', 'query_result', 'query_result']
+    assert [row['EMPLOYEE_ID'] for row in results[0]['data']] == [203]
+    assert not results[3]['data']
+    assert {row['DEPARTMENT_ID'] for row in results[4]['data']} == {10, 20, 50}
@@ -0,0 +1,28 @@
+# tests/test_bulk_rows.py
+import pytest
+
+from parsing import extract_bulk_rows
+
+
+@pytest.mark.parametrize('header, columns', [
+    ("nombre, apellido, correo", ['first_name', 'last_name', 'email']),
+    ("Nombre, Apellído, Correo Electrónico", ['first_name', 'last_name', 'email']),
+    ("teléfono, fecha de contratación, comisión", ['phone_number', 'hire_date', 'commission_pct']),
+    ("SALARIO, salary", ['salary', 'salary']),
+])
+def test_headers_resolve_with_and_without_accents(header, columns):
+    bulk = extract_bulk_rows(f"insertar empleados: {header}; a, b, c", 'employees')
+    assert bulk['columns'] == columns
+    assert bulk['unknown'] == []
+
+
+def test_unknown_header_is_reported_as_written():
+    bulk = extract_bulk_rows("insertar empleados: nombre, apodo; Juan, Juanito", 'employees')
+    assert bulk['columns'] == ['first_name', None]
+    assert bulk['unknown'] == ['apodo']
+    assert bulk['rows'] == [['Juan', 'Juanito']]
+
+
+def test_needs_header_and_at_least_one_row():
+    assert extract_bulk_rows("insertar empleados: nombre, apellido", 'employees') is None
+    assert extract_bulk_rows("insertar empleados nombre apellido", 'employees') is None
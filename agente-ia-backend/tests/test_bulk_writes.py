@@ -0,0 +1,91 @@
+# tests/test_bulk_writes.py
+"""Escrituras por conjuntos: UPDATE aritmético, DELETE con árbol de predicados e INSERT de varias filas."""
+import pytest
+
+from db_agent import answer_query
+from models import Employee
+from parsing import extract_bulk_update
+
+INSERT_HEADER = "insertar empleados: nombre, apellido, correo, fecha de contratación, puesto, salario, departamento"
+
+
+@pytest.mark.parametrize('query, bulk', [
+    ("aumentar salario 10% a empleados del departamento 50",
+     {'field': 'salary', 'op': '*', 'amount': 1.1, 'where': {'field': 'department_id', 'op': '==', 'value': 50.0}, 'all_rows': False}),
+    ("reducir salario en 500 a empleados del puesto IT_PROG",
+     {'field': 'salary', 'op': '+', 'amount': -500.0, 'where': {'field': 'job_id', 'op': '==', 'value': 'IT_PROG'}, 'all_rows': False}),
+    ("aumentar salario 5 por ciento a todos los empleados",
+     {'field': 'salary', 'op': '*', 'amount': 1.05, 'where': None, 'all_rows': True}),
+    ("listar empleados con salario mayor a 5000", None),
+])
+def test_extract_bulk_update(query, bulk):
+    assert extract_bulk_update(query, 'employees') == bulk
+
+
+def salaries(db, ids):
+    rows = db.session.query(Employee.employee_id, Employee.salary).filter(Employee.employee_id.in_(ids))
+    return {employee_id: float(salary) for employee_id, salary in rows}
+
+
+def test_percentage_update_is_one_statement(hr_db):
+    response = answer_query("aumentar salario 10% a empleados del departamento 20", hr_db.session)
+    assert response['type'] == 'query_success'
+    assert "**4**" in response['agent_text']
+    assert response['sql_statement'] == "UPDATE employees SET salary=(employees.salary * 1.1) WHERE employees.department_id = 20;"
+    assert salaries(hr_db, [200, 205, 100]) == {200: 14300.0, 205: 9130.0, 100: 24000.0}
+
+
+def test_fixed_decrease_and_missing_where(hr_db):
+    response = answer_query("reducir salario en 500 a empleados del puesto IT_PROG", hr_db.session)
+    assert "**27**" in response['agent_text']
+    assert salaries(hr_db, [204, 300]) == {204: 11500.0, 300: 3800.0}
+
+    response = answer_query("aumentar salario 10%", hr_db.session)
+    assert response['type'] == 'dialog_needed'
+    assert salaries(hr_db, [204]) == {204: 11500.0}
+
+
+def test_delete_with_a_predicate_tree(hr_db):
+    response = answer_query("eliminar empleados con salario entre 4300 y 4309 o departamento 80", hr_db.session)
+    assert response['type'] == 'query_success'
+    assert "**11**" in response['agent_text']
+    assert "BETWEEN 4300.0 AND 4309.0 OR employees.department_id = 80" in response['sql_statement']
+    assert hr_db.session.query(Employee).count() == 32 - 11
+
+    response = answer_query("eliminar empleados", hr_db.session)
+    assert response['type'] == 'dialog_needed'
+
+
+def test_write_invalidates_cached_pages(hr_db):
+    before = answer_query("listar empleados del departamento 80", hr_db.session)
+    answer_query("eliminar empleados del departamento 80", hr_db.session)
+    after = answer_query("listar empleados del departamento 80", hr_db.session)
+    assert len(before['data']) == 1 and not after.get('data')
+
+
+def test_insert_several_rows_in_one_statement(hr_db):
+    query = f"{INSERT_HEADER}; Ana, Ruiz, ARUIZ, 2024-01-02, IT_PROG, 5000, Shipping; Luis, Gómez, LGOMEZ, 2024-02-03, IT_PROG, 5100, 20"
+    response = answer_query(query, hr_db.session)
+    assert response['type'] == 'query_success', response['agent_text']
+    assert "**2**" in response['agent_text']
+    inserted = hr_db.session.query(Employee.first_name, Employee.last_name, Employee.department_id).filter(Employee.employee_id > 324).order_by(Employee.employee_id).all()
+    # 'Shipping' en la columna de departamento se guarda como su ID
+    assert [tuple(row) for row in inserted] == [('Ana', 'Ruiz', 50), ('Luis', 'Gómez', 20)]
+
+
+@pytest.mark.parametrize('rows, message', [
+    ("Ana, Ruiz, ARUIZ, 2024-31-02, IT_PROG, 5000, 50", "Fecha no válida"),
+    ("Ana, Ruiz, ARUIZ, 2024-01-02, IT_PROG, 5000", "no tienen 7 valores"),
+])
+def test_bad_rows_insert_nothing(hr_db, rows, message):
+    response = answer_query(f"{INSERT_HEADER}; Luis, Gómez, LGOMEZ, 2024-02-03, IT_PROG, 5100, 20; {rows}", hr_db.session)
+    assert response['type'] == 'error'
+    assert message in response['agent_text']
+    assert hr_db.session.query(Employee).count() == 32
+
+
+def test_insert_reports_unknown_and_missing_columns(hr_db):
+    response = answer_query("insertar empleados: nombre, apodo; Ana, X", hr_db.session)
+    assert response['type'] == 'error'
+    assert "columnas desconocidas: apodo" in response['agent_text']
+    assert "faltan columnas obligatorias" in response['agent_text']
@@ -0,0 +1,70 @@
+# tests/test_coercion.py
+"""Conversión de valores según el tipo de cada columna (Integer, Numeric, String, Date)."""
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from db_agent import answer_query
+from models import Employee, Location
+from query_counter import assert_max_queries
+from utils import coerce_column_value, coerce_record
+
+
+@pytest.mark.parametrize('column, value, expected', [
+    (Employee.employee_id, 100.0, 100),
+    (Employee.employee_id, '206', 206),
+    (Employee.salary, '5000', Decimal('5000')),
+    (Employee.salary, ' 7000.50 ', Decimal('7000.50')),
+    (Employee.commission_pct, 0.1, Decimal('0.1')), # Sin el error binario del float
+    (Employee.job_id, 100.0, '100'),
+    (Location.postal_code, 98199.0, '98199'),
+    (Employee.hire_date, '2005-01-01', datetime.date(2005, 1, 1)),
+    (Employee.department_id, [10.0, '20', None], [10, 20, None]),
+    (Employee.manager_id, None, None),
+])
+def test_values_take_the_column_type(column, value, expected):
+    result = coerce_column_value(column, value)
+    assert result == expected
+    assert type(result) is type(expected)
+
+
+@pytest.mark.parametrize('column, value, write, message', [
+    (Employee.salary, 'abc', False, "se esperaba un número"),
+    (Employee.salary, True, False, "se esperaba un número"),
+    (Employee.employee_id, '1.5', False, "se esperaba un número entero"),
+    (Employee.hire_date, '2024-02-30', False, "Fecha no válida"),
+    # Solo al escribir: lo que no cabe en la columna
+    (Employee.salary, '123456789', True, "fuera de rango"),
+    (Employee.job_id, 'X' * 11, True, "máximo 10 caracteres"),
+])
+def test_impossible_values_raise_value_error(column, value, write, message):
+    with pytest.raises(ValueError, match=message):
+        coerce_column_value(column, value, write=write)
+
+
+def test_filters_accept_values_that_do_not_fit_the_column():
+    assert coerce_column_value(Employee.salary, '123456789') == Decimal('123456789')
+    assert coerce_column_value(Employee.job_id, 'X' * 11) == 'X' * 11
+
+
+def test_coerce_record_converts_known_columns_as_writes():
+    record = {'first_name': 'Ana', 'salary': '5000', 'hire_date': '2024-01-02', 'department_id': 50.0, 'extra': 1}
+    assert coerce_record(Employee, record) == {
+        'first_name': 'Ana', 'salary': Decimal('5000'), 'hire_date': datetime.date(2024, 1, 2), 'department_id': 50, 'extra': 1,
+    }
+    with pytest.raises(ValueError, match="máximo 10 caracteres"):
+        coerce_record(Employee, {'job_id': 'PROGRAMADOR_SENIOR'})
+
+
+def test_invalid_filter_value_never_reaches_the_database(hr_db):
+    with assert_max_queries(hr_db.engine, 0):
+        response = answer_query("listar empleados con fecha de contratación mayor a 2021-31-01", hr_db.session)
+    assert response['type'] == 'error'
+    assert "Fecha no válida para 'hire_date'" in response['agent_text']
+
+
+def test_typed_literals_in_the_sql_preview(hr_db):
+    response = answer_query("listar empleados con fecha de contratación menor a 2003-01-01 y puesto IT_PROG", hr_db.session)
+    assert "employees.hire_date < '2003-01-01' AND employees.job_id = 'IT_PROG'" in response['sql_statement']
+    assert [row['EMPLOYEE_ID'] for row in response['data']] == [204, 205]
@@ -0,0 +1,39 @@
+# tests/test_eager_loading.py
+"""
+Presupuesto de consultas de los perfiles de eager loading: una página con datos relacionados no
+hace una consulta por fila (regresión N+1).
+"""
+from db_agent import answer_query
+from query_counter import assert_max_queries
+
+
+def test_department_names_in_one_query(hr_db):
+    with assert_max_queries(hr_db.engine, 1):
+        response = answer_query("listar empleados con su departamento", hr_db.session)
+    assert response['type'] == 'query_result'
+    departments = {row['EMPLOYEE_ID']: row['DEPARTMENT'] for row in response['data']}
+    assert departments[100] == 'Administration'
+    assert departments[201] == 'Shipping'
+
+
+def test_manager_names_in_one_query(hr_db):
+    with assert_max_queries(hr_db.engine, 1):
+        response = answer_query("listar empleados con su jefe", hr_db.session)
+    managers = {row['EMPLOYEE_ID']: row['MANAGER'] for row in response['data']}
+    assert managers[100] is None
+    assert managers[200] == 'Steven King'
+    assert managers[300] == 'Susan Mavris'
+
+
+def test_next_page_keeps_the_profile(hr_db):
+    first = answer_query("listar empleados con su departamento y jefe", hr_db.session)
+    with assert_max_queries(hr_db.engine, 1):
+        second = answer_query("siguiente", hr_db.session, first['conversation_state'])
+    assert [row['DEPARTMENT'] for row in second['data']] == ['Shipping'] * len(second['data'])
+    assert {row['MANAGER'] for row in second['data']} == {'Susan Mavris'}
+
+
+def test_collection_adds_one_query(hr_db):
+    with assert_max_queries(hr_db.engine, 2):
+        response = answer_query("listar departamentos con sus empleados", hr_db.session)
+    assert response['type'] == 'query_result'
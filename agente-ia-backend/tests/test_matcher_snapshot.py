@@ -0,0 +1,21 @@
+# tests/test_matcher_snapshot.py
+import os
+
+import config
+from matcher import load_snapshot, save_snapshot
+
+
+def test_load_never_writes_and_rejects_other_keys(tmp_path):
+    path = tmp_path / 'snapshot.pickle'
+    assert load_snapshot(str(path), 'key', lambda: 'built') == 'built'
+    assert not path.exists()
+    save_snapshot(str(path), 'key', 'saved')
+    assert load_snapshot(str(path), 'key', lambda: 'built') == 'saved'
+    assert load_snapshot(str(path), 'other', lambda: 'built') == 'built'
+
+
+def test_fast_start_is_opt_in_and_snapshot_lives_next_to_the_code():
+    if 'FAST_START' not in os.environ:
+        assert config.FAST_START is False
+    if 'MATCHER_SNAPSHOT_PATH' not in os.environ:
+        assert os.path.dirname(config.MATCHER_SNAPSHOT_PATH) == os.path.dirname(os.path.abspath(config.__file__))
@@ -0,0 +1,63 @@
+# tests/test_org_chart.py
+"""Organigrama: interpretación de la petición y WITH RECURSIVE (o la tabla de cierre) sobre manager_id."""
+import pytest
+
+import db_agent
+from config import HIERARCHY_MAX_DEPTH
+from org_chart import refresh_closure
+from parsing import extract_hierarchy_request
+
+
+@pytest.mark.parametrize('query, request_', [
+    ("subordinados de 100", {'direction': 'down', 'root_id': 100, 'max_depth': HIERARCHY_MAX_DEPTH}),
+    ("subordinados de 100 hasta nivel 2", {'direction': 'down', 'root_id': 100, 'max_depth': 2}),
+    ("subordinados directos de 200", {'direction': 'down', 'root_id': 200, 'max_depth': 1}),
+    ("cadena de mando de 300", {'direction': 'up', 'root_id': 300, 'max_depth': HIERARCHY_MAX_DEPTH}),
+    ("jefes de 205", {'direction': 'up', 'root_id': 205, 'max_depth': HIERARCHY_MAX_DEPTH}),
+    ("subordinados de 100 hasta nivel 0", None),
+    ("organigrama de empleados", None),
+])
+def test_extract_hierarchy_request(query, request_):
+    assert extract_hierarchy_request(query) == request_
+
+
+def levels(response):
+    assert response['type'] == 'query_result', response['agent_text']
+    return {row['EMPLOYEE_ID']: row['NIVEL'] for row in response['data']}
+
+
+def test_subordinates_in_one_recursive_query(hr_db):
+    response = db_agent.answer_query("subordinados de 100 hasta nivel 1", hr_db.session)
+    assert levels(response) == {200: 1, 201: 1, 203: 1}
+    assert response['sql_statement'].startswith("WITH RECURSIVE")
+
+    response = db_agent.answer_query("subordinados de 200", hr_db.session)
+    assert levels(response) == {202: 1, 204: 1, 205: 1}
+
+
+def test_whole_subtree_has_every_level(hr_db):
+    subtree = levels(db_agent.answer_query("subordinados de 100", hr_db.session))
+    # 200, 201 y 203; los 3 de 200 y los 25 empleados extra, que cuelgan de 201
+    assert len(subtree) == 3 + 3 + 25
+    assert subtree[205] == 2 and subtree[324] == 2
+
+
+def test_chain_of_command_goes_up(hr_db):
+    response = db_agent.answer_query("cadena de mando de 300", hr_db.session)
+    assert [(row['EMPLOYEE_ID'], row['NIVEL']) for row in response['data']] == [(201, 1), (100, 2)]
+
+
+def test_unknown_employee_has_no_subordinates(hr_db):
+    response = db_agent.answer_query("subordinados de 999", hr_db.session)
+    assert not response.get('data')
+    assert "no tiene subordinados" in response['agent_text']
+
+
+def test_closure_table_gives_the_same_tree(hr_db, monkeypatch):
+    expected = levels(db_agent.answer_query("subordinados de 100", hr_db.session))
+    monkeypatch.setattr(db_agent, 'ORG_CLOSURE_TABLE', True)
+    refresh_closure(hr_db.session, HIERARCHY_MAX_DEPTH)
+    hr_db.session.commit()
+    response = db_agent.answer_query("subordinados de 100", hr_db.session)
+    assert levels(response) == expected
+    assert "RECURSIVE" not in response['sql_statement']
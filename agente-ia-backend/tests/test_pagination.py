@@ -0,0 +1,67 @@
+# tests/test_pagination.py
+"""Paginación keyset: el cursor opaco del estado de la conversación y las páginas de 'siguiente'."""
+import pytest
+
+from db_agent import answer_query
+from parsing import is_next_page_request
+from utils import decode_cursor, encode_cursor
+
+DEPARTMENT_50 = {'field': 'department_id', 'op': '==', 'value': 50.0}
+
+
+@pytest.mark.parametrize('data', [
+    {'predicate': None, 'after': 100, 'relations': []},
+    {'predicate': {'logic': 'or', 'conditions': [DEPARTMENT_50, {'field': 'locations.city', 'op': '==', 'value': 'Múnich'}]},
+     'after': 'IT_PROG', 'relations': ['department', 'manager']},
+])
+def test_cursor_round_trip(data):
+    token = encode_cursor(data)
+    assert token.isascii() and '/' not in token and '+' not in token
+    assert decode_cursor(token) == data
+
+
+@pytest.mark.parametrize('token', ['!!!', 'bm90IGpzb24=', 'ñ'])
+def test_invalid_cursor_raises_value_error(token):
+    with pytest.raises(ValueError, match="Cursor de paginación no válido"):
+        decode_cursor(token)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("siguiente", True), ("Siguiente.", True), ("  siguiente!  ", True),
+    ("listar empleados siguiente", False), ("", False),
+])
+def test_is_next_page_request(text, expected):
+    assert is_next_page_request(text) is expected
+
+
+def ids(response):
+    return [row['EMPLOYEE_ID'] for row in response['data']]
+
+
+def test_siguiente_walks_the_pages_by_primary_key(hr_db):
+    first = answer_query("listar empleados del departamento 50", hr_db.session)
+    assert ids(first) == [201] + list(range(300, 309))
+    assert decode_cursor(first['conversation_state']['cursor']) == {'predicate': DEPARTMENT_50, 'after': 308, 'relations': []}
+
+    second = answer_query("siguiente", hr_db.session, first['conversation_state'])
+    assert ids(second) == list(range(309, 319))
+    # Seek sobre la clave primaria, sin OFFSET de página
+    assert "employees.employee_id > 308" in second['sql_statement']
+
+    last = answer_query("siguiente", hr_db.session, second['conversation_state'])
+    assert ids(last) == list(range(319, 325))
+    assert last['conversation_state'] == {}
+    assert "siguiente" not in last['agent_text']
+
+
+def test_new_query_discards_the_cursor(hr_db):
+    first = answer_query("listar empleados del departamento 50", hr_db.session)
+    other = answer_query("listar empleados del departamento 80", hr_db.session, first['conversation_state'])
+    assert ids(other) == [203]
+
+
+def test_bad_cursor_is_an_error_response(hr_db):
+    state = {'intent': 'SELECT', 'table': 'employees', 'cursor': '!!!'}
+    response = answer_query("siguiente", hr_db.session, state)
+    assert response['type'] == 'error'
+    assert response['conversation_state'] == {}
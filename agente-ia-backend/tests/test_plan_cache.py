@@ -0,0 +1,64 @@
+# tests/test_plan_cache.py
+"""Caché de planes: plantilla normalizada, enlace de los literales y LRU con contadores."""
+import pytest
+
+import db_agent
+from plan_cache import LRUCache, bind_literals, normalize_query
+
+
+@pytest.mark.parametrize('query, template, literals', [
+    ("listar empleados con salario mayor a 5000", "listar empleados con salario mayor a __0__", ['5000']),
+    ("  listar  empleados con salario mayor a $7000.50 ", "listar empleados con salario mayor a __0__", ['$7000.50']),
+    ("salario entre 4000 y 9000", "salario entre __0__ y __1__", ['4000', '9000']),
+    # Solo números sueltos: fechas y códigos quedan en la plantilla
+    ("fecha mayor a 2005-01-01", "fecha mayor a 2005-01-01", []),
+    ("empleados del puesto IT_PROG", "empleados del puesto IT_PROG", []),
+    # Algo parecido a un marcador: no se cachea
+    ("empleados con id __1__", None, []),
+])
+def test_normalize_query(query, template, literals):
+    assert normalize_query(query) == (template, literals)
+
+
+def test_bind_literals_fills_every_placeholder():
+    template = {'logic': 'and', 'conditions': [
+        {'field': 'salary', 'op': 'between', 'value': ['__0__', '__1__']},
+        {'field': 'department_id', 'op': '==', 'value': '__2__'},
+        {'field': 'job_id', 'op': '==', 'value': 'IT_PROG'},
+    ]}
+    assert bind_literals(template, ['4000', '$9,000', '50']) == {'logic': 'and', 'conditions': [
+        {'field': 'salary', 'op': 'between', 'value': [4000.0, 9000.0]},
+        {'field': 'department_id', 'op': '==', 'value': 50.0},
+        {'field': 'job_id', 'op': '==', 'value': 'IT_PROG'},
+    ]}
+    assert bind_literals(None, []) is None
+
+
+def test_queries_with_the_same_template_share_a_plan():
+    db_agent.PLAN_CACHE.clear()
+    first, first_literals = db_agent.get_query_plan("listar empleados con salario mayor a 5000")
+    second, second_literals = db_agent.get_query_plan("listar empleados con salario mayor a 7000")
+    assert second is first
+    assert first['is_template'] and first['predicate'] == {'field': 'salary', 'op': '>', 'value': '__0__'}
+    assert bind_literals(second['predicate'], second_literals) == {'field': 'salary', 'op': '>', 'value': 7000.0}
+    assert first_literals == ['5000']
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats() == {'size': 2, 'maxsize': 2, 'hits': 3, 'misses': 1, 'hit_rate': 0.75}
+
+
+def test_cached_plan_answers_with_the_new_values(hr_db):
+    db_agent.PLAN_CACHE.clear()
+    db_agent.answer_query("listar empleados con salario mayor a 12000", hr_db.session)
+    hits = db_agent.PLAN_CACHE.stats()['hits']
+    response = db_agent.answer_query("listar empleados con salario mayor a 13000", hr_db.session)
+    assert [row['EMPLOYEE_ID'] for row in response['data']] == [100]
+    assert db_agent.PLAN_CACHE.stats()['hits'] == hits + 1
@@ -0,0 +1,104 @@
+# tests/test_predicate_tree.py
+"""
+Condiciones múltiples: el árbol de extract_predicate_tree, su compilación a UN filtro SQL y la
+consulta completa sobre la BD sembrada.
+"""
+import pytest
+from sqlalchemy.dialects import sqlite
+
+from db_agent import MODEL_MAP, answer_query, build_filter_expression, build_scoped_filter
+from join_planner import qualify_predicate
+from parsing import extract_predicate_tree
+
+SALARY_GT_5000 = {'field': 'salary', 'op': '>', 'value': 5000.0}
+DEPARTMENT_50 = {'field': 'department_id', 'op': '==', 'value': 50.0}
+JOB_IT_PROG = {'field': 'job_id', 'op': '==', 'value': 'IT_PROG'}
+
+
+@pytest.mark.parametrize('query, tree', [
+    ("listar empleados", None),
+    ("listar empleados con salario mayor a 5000", SALARY_GT_5000),
+    ("empleados con sueldo menor que 3,000", {'field': 'salary', 'op': '<', 'value': 3000.0}),
+    ("empleados con salario mayor a $10,000", {'field': 'salary', 'op': '>', 'value': 10000.0}),
+    ("empleados cuyo jefe no es 100", {'field': 'manager_id', 'op': '!=', 'value': 100.0}),
+    ("empleados con apellido igual a King", {'field': 'last_name', 'op': '==', 'value': 'King'}),
+    # AND tiene precedencia sobre OR, en cualquier posición
+    ("empleados con salario mayor a 5000 y departamento 50 o puesto IT_PROG",
+     {'logic': 'or', 'conditions': [{'logic': 'and', 'conditions': [SALARY_GT_5000, DEPARTMENT_50]}, JOB_IT_PROG]}),
+    ("empleados del puesto IT_PROG o salario mayor a 5000 y departamento 50",
+     {'logic': 'or', 'conditions': [JOB_IT_PROG, {'logic': 'and', 'conditions': [SALARY_GT_5000, DEPARTMENT_50]}]}),
+    # Colas BETWEEN e IN (con y sin paréntesis)
+    ("empleados con salario entre 4000 y 9000", {'field': 'salary', 'op': 'between', 'value': [4000.0, 9000.0]}),
+    ("empleados del departamento en 10, 20 y 50", {'field': 'department_id', 'op': 'in', 'value': [10.0, 20.0, 50.0]}),
+    ("empleados con departamento en (10, 20, 50)", {'field': 'department_id', 'op': 'in', 'value': [10.0, 20.0, 50.0]}),
+    # Igualdad implícita: valor con dígitos o nombre propio tras el campo
+    ("empleados del departamento 50", DEPARTMENT_50),
+    ("empleados de la ciudad Seattle", {'field': 'city', 'op': '==', 'value': 'Seattle'}),
+    ("empleados de la ciudad South San Francisco", {'field': 'city', 'op': '==', 'value': 'South San Francisco'}),
+    # Campos con y sin tildes; el valor conserva las del original
+    ("empleados con fecha de contratación mayor a 2005-01-01", {'field': 'hire_date', 'op': '>', 'value': '2005-01-01'}),
+    ("empleados con fecha de contratacion mayor a 2005-01-01", {'field': 'hire_date', 'op': '>', 'value': '2005-01-01'}),
+    ("ubicaciones de la ciudad Múnich", {'field': 'city', 'op': '==', 'value': 'Múnich'}),
+])
+def test_extract_predicate_tree(query, tree):
+    assert extract_predicate_tree(query, 'employees') == tree
+
+
+def compile_sql(expression):
+    return str(expression.compile(dialect=sqlite.dialect(), compile_kwargs={'literal_binds': True}))
+
+
+@pytest.mark.parametrize('predicate, sql', [
+    (SALARY_GT_5000, "employees.salary > 5000.0"),
+    ({'field': 'manager_id', 'op': '!=', 'value': 100.0}, "employees.manager_id != 100"),
+    ({'field': 'salary', 'op': 'between', 'value': [4000.0, 9000.0]}, "employees.salary BETWEEN 4000.0 AND 9000.0"),
+    ({'field': 'department_id', 'op': 'in', 'value': [10.0, 20.0]}, "employees.department_id IN (10, 20)"),
+    ({'field': 'hire_date', 'op': '>', 'value': '2005-01-01'}, "employees.hire_date > '2005-01-01'"),
+    ({'field': 'last_name', 'op': '==', 'value': "O'Connell"}, "employees.last_name = 'O''Connell'"),
+    ({'logic': 'or', 'conditions': [{'logic': 'and', 'conditions': [SALARY_GT_5000, DEPARTMENT_50]}, JOB_IT_PROG]},
+     "employees.salary > 5000.0 AND employees.department_id = 50 OR employees.job_id = 'IT_PROG'"),
+    ({'logic': 'and', 'conditions': [{'logic': 'or', 'conditions': [DEPARTMENT_50, JOB_IT_PROG]}, SALARY_GT_5000]},
+     "(employees.department_id = 50 OR employees.job_id = 'IT_PROG') AND employees.salary > 5000.0"),
+])
+def test_build_filter_expression(predicate, sql):
+    assert compile_sql(build_filter_expression(MODEL_MAP['employees'], predicate, 'employees')) == sql
+
+
+@pytest.mark.parametrize('predicate, message', [
+    ({'field': 'hire_date', 'op': '>', 'value': '2021-31-01'}, "Fecha no válida"),
+    ({'field': 'salary', 'op': '>', 'value': 'abc'}, "se esperaba un número"),
+    ({'field': 'apodo', 'op': '==', 'value': 'x'}, "no válido para la tabla"),
+])
+def test_build_filter_expression_rejects_bad_input(predicate, message):
+    with pytest.raises(Exception, match=message):
+        build_filter_expression(MODEL_MAP['employees'], predicate, 'employees')
+
+
+def test_scoped_filter_joins_other_tables_in_a_subquery():
+    predicate = qualify_predicate('employees', {'field': 'city', 'op': '==', 'value': 'Seattle'})
+    assert predicate == {'field': 'locations.city', 'op': '==', 'value': 'Seattle'}
+    sql = " ".join(compile_sql(build_scoped_filter(MODEL_MAP['employees'], 'employees', predicate)).split())
+    assert sql == (
+        "employees.employee_id IN (SELECT employees.employee_id FROM employees "
+        "JOIN departments ON employees.department_id = departments.department_id "
+        "JOIN locations ON departments.location_id = locations.location_id "
+        "WHERE locations.city = 'Seattle')"
+    )
+
+
+def employee_ids(response):
+    assert response['type'] == 'query_result', response['agent_text']
+    return {row['EMPLOYEE_ID'] for row in response['data']}
+
+
+@pytest.mark.parametrize('query, ids', [
+    ("listar empleados con salario mayor a 5000 y departamento 20 o puesto AD_PRES", {100, 200, 202, 204, 205}),
+    ("listar empleados del departamento 80 o departamento 50 y salario mayor a 4320", {201, 203, 321, 322, 323, 324}),
+    ("listar empleados con salario entre 8000 y 13000", {200, 203, 204, 205}),
+    ("listar empleados con departamento en (10, 80)", {100, 203}),
+    ("listar empleados con fecha de contratación menor a 2003-01-01", {203, 204, 205}),
+])
+def test_answer_query_runs_the_whole_tree(hr_db, query, ids):
+    response = answer_query(query, hr_db.session)
+    assert employee_ids(response) == ids
+    assert response['sql_statement'].count('WHERE') == 1
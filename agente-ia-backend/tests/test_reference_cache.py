@@ -0,0 +1,90 @@
+# tests/test_reference_cache.py
+"""
+Caché de tablas de referencia en modo async: dos peticiones concurrentes que resuelven nombres
+sobre la caché vacía (las dos leen la BD) terminan sin bloquear el event loop.
+
+Requiere: pip install pytest "sqlalchemy[asyncio]" aiosqlite
+"""
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from config import REFERENCE_TABLES
+from extensions import db
+from join_planner import SCHEMA_TABLES
+from models import Region, Country, Location, Department
+from reference_cache import ReferenceCache
+
+pytest.importorskip('aiosqlite')
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / 'hr.sqlite'
+    engine = create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Region.__table__), [{'region_id': 1, 'region_name': 'Europe'}, {'region_id': 2, 'region_name': 'Americas'}])
+        conn.execute(insert(Country.__table__), [{'country_id': 'UK', 'country_name': 'United Kingdom', 'region_id': 1},
+                                                 {'country_id': 'US', 'country_name': 'United States of America', 'region_id': 2}])
+        conn.execute(insert(Location.__table__), [{'location_id': 1700, 'city': 'Seattle', 'country_id': 'US'},
+                                                  {'location_id': 2500, 'city': 'Oxford', 'country_id': 'UK'}])
+        conn.execute(insert(Department.__table__), [{'department_id': 10, 'department_name': 'Administration', 'location_id': 1700},
+                                                    {'department_id': 50, 'department_name': 'Shipping', 'location_id': 1700},
+                                                    {'department_id': 80, 'department_name': 'Sales', 'location_id': 2500}])
+    engine.dispose()
+    return path
+
+
+def run_in_thread(coroutine, timeout):
+    """Ejecuta el event loop en un hilo aparte: si se bloquea, la prueba falla en vez de colgarse."""
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = asyncio.run(coroutine)
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "El event loop se bloqueó (¿candado retenido durante una lectura de la BD?)"
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+
+def test_concurrent_async_name_lookups(db_path):
+    cache = ReferenceCache(SCHEMA_TABLES, REFERENCE_TABLES)
+    queries = [
+        {'field': 'departments.department_name', 'op': '==', 'value': 'Shipping'},
+        {'field': 'departments.department_name', 'op': '==', 'value': 'Shiping'},
+        {'field': 'locations.city', 'op': '==', 'value': 'Seattle'},
+        {'field': 'regions.region_name', 'op': '==', 'value': 'Europe'},
+    ]
+
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        sessions = async_sessionmaker(engine)
+
+        async def lookup(predicate):
+            async with sessions() as session:
+                return await session.run_sync(lambda sync_session: cache.resolve_predicate(sync_session, 'employees', predicate))
+
+        try:
+            return await asyncio.gather(*(lookup(predicate) for predicate in queries * 2))
+        finally:
+            await engine.dispose()
+
+    results = run_in_thread(main(), timeout=20)
+    predicates = [predicate for predicate, _ in results]
+    assert predicates[0] == {'field': 'department_id', 'op': '==', 'value': 50}
+    assert predicates[1] == {'field': 'department_id', 'op': '==', 'value': 50}
+    assert results[1][1] == [('Shiping', 'Shipping')]
+    assert predicates[2] == {'field': 'department_id', 'op': 'in', 'value': [10, 50]}
+    assert predicates[3] == {'field': 'department_id', 'op': '==', 'value': 80}
+    assert predicates[4:] == predicates[:4]
@@ -0,0 +1,30 @@
+# tests/test_reference_lookups.py
+"""Nombres de tablas de referencia en los filtros de escritura: corregidos y traducidos a claves, sin JOIN."""
+from db_agent import answer_query
+from models import Employee
+
+
+def test_bulk_update_by_department_name(hr_db):
+    response = answer_query("aumentar salario 10% a empleados del departamento Shiping", hr_db.session)
+    assert response['type'] == 'query_success'
+    assert response['corrections'] == [{'original': 'Shiping', 'corrected': 'Shipping'}]
+    assert response['sql_statement'] == "UPDATE employees SET salary=(employees.salary * 1.1) WHERE employees.department_id = 50;"
+    assert "**26**" in response['agent_text']
+
+
+def test_delete_by_city_uses_the_department_keys(hr_db):
+    response = answer_query("eliminar empleados de la ciudad Seattle y salario mayor a 4320", hr_db.session)
+    assert response['type'] == 'query_success'
+    assert response['sql_statement'] == (
+        "DELETE FROM employees WHERE employees.department_id IN (10, 50) AND employees.salary > 4320.0;"
+    )
+    # 100 (24000), 201 (6500) y 321..324
+    assert "**6**" in response['agent_text']
+    assert hr_db.session.query(Employee).filter(Employee.department_id.in_([10, 50])).count() == 27 - 6
+
+
+def test_unknown_name_keeps_the_join(hr_db):
+    response = answer_query("eliminar empleados del departamento Inexistente Zzz", hr_db.session)
+    assert response['type'] == 'status'
+    assert "JOIN departments" in response['sql_statement']
+    assert 'corrections' not in response
@@ -0,0 +1,39 @@
+# tests/test_result_cache.py
+import pytest
+
+from result_cache import ResultCache, MemoryResultCache, SQLiteResultCache
+
+
+class IncompleteCache(ResultCache):
+    def get(self, table, key):
+        return None
+
+    def set(self, table, key, value, depends_on=()):
+        pass
+
+    def clear(self):
+        pass
+
+
+def test_backend_missing_a_method_fails_on_instantiation():
+    with pytest.raises(TypeError, match='invalidate_table'):
+        IncompleteCache()
+
+
+@pytest.mark.parametrize('make_cache', [
+    lambda tmp_path: MemoryResultCache(),
+    lambda tmp_path: SQLiteResultCache(str(tmp_path / 'results.sqlite')),
+])
+def test_invalidation_follows_dependencies(tmp_path, make_cache):
+    cache = make_cache(tmp_path)
+    cache.set('employees', 'plain', [1])
+    cache.set('employees', 'joined', [2], depends_on=['departments', 'locations'])
+    cache.set('departments', 'own', [3])
+    cache.invalidate_table('locations')
+    assert cache.get('employees', 'joined') is None
+    assert cache.get('employees', 'plain') == [1]
+    cache.invalidate_table('departments')
+    assert cache.get('departments', 'own') is None
+    assert cache.get('employees', 'plain') == [1]
+    cache.invalidate_table('employees')
+    assert cache.get('employees', 'plain') is None
@@ -0,0 +1,35 @@
+# tests/test_session_store.py
+import pytest
+
+from session_store import SessionStore, MemorySessionStore, SQLiteSessionStore
+
+
+class IncompleteStore(SessionStore):
+    def get(self, session_id):
+        return None
+
+    def set(self, session_id, state):
+        pass
+
+
+def test_backend_missing_a_method_fails_on_instantiation():
+    with pytest.raises(TypeError, match='delete'):
+        IncompleteStore()
+
+
+@pytest.mark.parametrize('make_store', [
+    lambda tmp_path: MemorySessionStore(maxsize=2),
+    lambda tmp_path: SQLiteSessionStore(str(tmp_path / 'sessions.sqlite'), maxsize=2),
+])
+def test_backends_round_trip_and_evict(tmp_path, make_store):
+    store = make_store(tmp_path)
+    store.set('a', {'cursor': 'x'})
+    state = store.get('a')
+    assert state == {'cursor': 'x'}
+    state['cursor'] = 'changed' # La copia devuelta no toca el estado guardado
+    assert store.get('a') == {'cursor': 'x'}
+    store.set('b', {})
+    store.set('c', {})
+    assert store.get('a') is None
+    store.delete('b')
+    assert store.get('b') is None and store.get('c') == {}
@@ -0,0 +1,72 @@
+# tests/test_statement_cache.py
+"""Plantillas de sentencias: forma del filtro, valores enlazados y vista previa SQL segura."""
+import datetime
+
+import pytest
+
+import db_agent
+from models import Employee
+from statement_cache import COMPILED_CACHE_METRICS, parameterize_predicate, shape_key
+
+SALARY_BETWEEN = {'field': 'salary', 'op': 'between', 'value': [4000.0, 9000.0]}
+DEPARTMENT_IN = {'field': 'department_id', 'op': 'in', 'value': [10.0, 20.0, 30.0]}
+LAST_NAME = {'field': 'last_name', 'op': '==', 'value': "O'Hara"}
+
+
+def test_parameterize_predicate_separates_shape_and_values():
+    values = []
+    shape = parameterize_predicate({'logic': 'and', 'conditions': [SALARY_BETWEEN, DEPARTMENT_IN, LAST_NAME]}, values)
+    assert shape == {'logic': 'and', 'conditions': [
+        {'field': 'salary', 'op': 'between', 'value': ['__0__', '__1__']},
+        # La lista de un 'in' es un solo marcador (parámetro expandible)
+        {'field': 'department_id', 'op': 'in', 'value': '__2__'},
+        {'field': 'last_name', 'op': '==', 'value': '__3__'},
+    ]}
+    assert values == [4000.0, 9000.0, [10.0, 20.0, 30.0], "O'Hara"]
+
+
+@pytest.mark.parametrize('first, second, same', [
+    (SALARY_BETWEEN, {**SALARY_BETWEEN, 'value': [1.0, 2.0]}, True),
+    (DEPARTMENT_IN, {**DEPARTMENT_IN, 'value': [50.0]}, True),
+    (LAST_NAME, {**LAST_NAME, 'op': '!='}, False),
+    ({'logic': 'and', 'conditions': [SALARY_BETWEEN, LAST_NAME]}, {'logic': 'or', 'conditions': [SALARY_BETWEEN, LAST_NAME]}, False),
+    ({'logic': 'and', 'conditions': [SALARY_BETWEEN, LAST_NAME]}, {'logic': 'and', 'conditions': [LAST_NAME, SALARY_BETWEEN]}, False),
+])
+def test_shape_key(first, second, same):
+    assert (shape_key(parameterize_predicate(first, [])) == shape_key(parameterize_predicate(second, []))) is same
+    assert shape_key(None) is None
+
+
+def test_same_shape_reuses_the_template_with_typed_params():
+    first, first_params = db_agent.select_template(Employee, 'employees', DEPARTMENT_IN)
+    second, second_params = db_agent.select_template(Employee, 'employees', {**DEPARTMENT_IN, 'value': [50.0]})
+    assert second is first
+    assert first_params == {'lit0': [10, 20, 30]} and second_params == {'lit0': [50]}
+
+    _, params = db_agent.select_template(Employee, 'employees', {'field': 'hire_date', 'op': '>', 'value': '2005-01-01'}, after_key=205)
+    assert params == {'lit0': datetime.date(2005, 1, 1), 'after_key': 205}
+
+
+def test_invalid_value_raises_when_binding():
+    with pytest.raises(ValueError, match="Fecha no válida"):
+        db_agent.select_template(Employee, 'employees', {'field': 'hire_date', 'op': '>', 'value': '2005-13-01'})
+
+
+def test_preview_escapes_literals(hr_db):
+    template, params = db_agent.select_template(Employee, 'employees', LAST_NAME)
+    preview = db_agent.sql_preview(hr_db.session, template, 'page', params)
+    assert "WHERE employees.last_name = 'O''Hara' ORDER BY employees.employee_id" in preview
+    assert preview.endswith("LIMIT 11 OFFSET 0;")
+
+    template, params = db_agent.select_template(Employee, 'employees', {**DEPARTMENT_IN, 'value': [50.0]})
+    assert "employees.department_id IN (50)" in db_agent.sql_preview(hr_db.session, template, 'page', params)
+
+
+def test_repeated_shapes_hit_the_compiled_cache(hr_db):
+    db_agent.answer_query("listar empleados con salario mayor a 5000", hr_db.session)
+    COMPILED_CACHE_METRICS.reset()
+    for amount in (6000, 7000, 8000, 9000):
+        response = db_agent.answer_query(f"listar empleados con salario mayor a {amount}", hr_db.session)
+        assert f"employees.salary > {amount}" in response['sql_statement']
+    stats = COMPILED_CACHE_METRICS.snapshot()
+    assert stats['hit'] == 4 and stats['miss'] == 0
@@ -1,5 +1,10 @@
 # utils.py
-from sqlalchemy import inspect 
+import base64
+import datetime
+import json
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import inspect, Integer, Numeric, Float, String, Boolean, Date
+from sqlalchemy.sql import ClauseElement
 # Importamos las constantes de configuración
 from config import TRANSLATION_MAP, FIELD_MAP
 
@@ -34,6 +39,47 @@ def map_to_dict_dynamic(item, model_map):
     
     return data
 
+class ModelProjection:
+    """
+    Metadatos precalculados UNA vez por modelo para el camino rápido del SELECT:
+    columnas a proyectar en un select() de Core, claves de salida y conversores por columna.
+    Produce los mismos diccionarios que map_to_dict_dynamic, pero sin objetos ORM.
+    """
+
+    def __init__(self, Model):
+        mapper = inspect(Model)
+        keys = [key for key in mapper.columns.keys() if not key.startswith('_')]
+        self.keys = keys
+        self.columns = [getattr(Model, key) for key in keys]
+        self.pk_index = keys.index(mapper.primary_key[0].key)
+
+        merge_name = 'first_name' in keys and 'last_name' in keys
+        # (índice, clave de salida, conversor) para cada columna que se copia tal cual
+        self._plain = []
+        for index, key in enumerate(keys):
+            if key == 'last_name' or (merge_name and key == 'first_name'):
+                continue
+            column_type = mapper.columns[key].type
+            converter = float if isinstance(column_type, (Integer, Numeric, Boolean)) else str
+            self._plain.append((index, key.upper(), converter))
+        self._name_indexes = None
+        if merge_name:
+            self._name_indexes = (keys.index('first_name'), keys.index('last_name'))
+
+    def row_to_dict(self, row):
+        data = {}
+        for index, key, converter in self._plain:
+            value = row[index]
+            data[key] = None if value is None else converter(value)
+        if self._name_indexes:
+            first, last = row[self._name_indexes[0]], row[self._name_indexes[1]]
+            data['NOMBRE'] = f"{first} {last}"
+        return data
+
+    def rows_to_dicts(self, rows):
+        row_to_dict = self.row_to_dict
+        return [row_to_dict(row) for row in rows]
+
 def get_db_column_name(spanish_term):
     """Busca el nombre de la columna DB usando el FIELD_MAP."""
     return FIELD_MAP.get(spanish_term.lower())
@@ -41,4 +87,130 @@ def get_db_column_name(spanish_term):
 def requires_auto_id(table_name):
     """Verifica si la tabla usa una clave primaria numérica que debe ser autogenerada."""
     auto_id_tables = ['employees', 'departments', 'locations', 'regions']
-    return table_name in auto_id_tables
\ No newline at end of file
+    return table_name in auto_id_tables
+
+def encode_cursor(data):
+    """Codifica el estado de paginación como un token opaco (base64 url-safe de JSON)."""
+    raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(token):
+    """Decodifica un cursor de paginación. Lanza ValueError si el token no es válido."""
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise ValueError(f"Cursor de paginación no válido: {e}")
+
+# --- Conversión de Valores al Tipo de Cada Columna ---
+# Un conversor por columna, calculado una sola vez a partir del tipo del modelo (Integer, Numeric,
+# String, Date): cada literal se enlaza con el tipo exacto de su columna (sin job_id = 100.0 ni
+# salary = '5000') y los valores imposibles se rechazan antes de llegar a la BD.
+_COERCERS = {}
+
+def _invalid(column, value, expected):
+    return ValueError(f"Valor no válido para '{column.key}': '{value}' ({expected})")
+
+def _to_decimal(column, value):
+    if isinstance(value, bool):
+        raise _invalid(column, value, "se esperaba un número")
+    try:
+        # repr() de un float es su forma decimal más corta: 0.1 -> Decimal('0.1'), no 0.1000000000000000055...
+        number = Decimal(repr(value) if isinstance(value, float) else value.strip() if isinstance(value, str) else value)
+    except (InvalidOperation, TypeError, ValueError):
+        raise _invalid(column, value, "se esperaba un número")
+    if not number.is_finite():
+        raise _invalid(column, value, "se esperaba un número")
+    return number
+
+def _integer_coercer(column):
+    def coerce(value, write):
+        if type(value) is int:
+            return value
+        number = _to_decimal(column, value)
+        if number != number.to_integral_value():
+            raise _invalid(column, value, "se esperaba un número entero")
+        return int(number)
+    return coerce
+
+def _numeric_coercer(column):
+    precision, scale = column.type.precision, column.type.scale or 0
+    limit = Decimal(10) ** (precision - scale) if precision else None
+    as_float = isinstance(column.type, Float) or not column.type.asdecimal
+
+    def coerce(value, write):
+        number = _to_decimal(column, value)
+        # Solo al escribir: en un filtro, 'salario menor a 1000000000' es válido aunque no quepa en la columna
+        if write and limit is not None and abs(number) >= limit:
+            raise _invalid(column, value, f"fuera de rango: máximo {precision - scale} dígitos enteros")
+        return float(number) if as_float else number
+    return coerce
+
+def _string_coercer(column):
+    length = column.type.length
+
+    def coerce(value, write):
+        if isinstance(value, float):
+            value = str(int(value)) if value.is_integer() else repr(value) # 98199.0 -> '98199'
+        elif not isinstance(value, str):
+            value = str(value)
+        if write and length is not None and len(value) > length:
+            raise _invalid(column, value, f"máximo {length} caracteres")
+        return value
+    return coerce
+
+def _date_coercer(column):
+    def coerce(value, write):
+        if isinstance(value, datetime.date):
+            return value
+        try:
+            return datetime.date.fromisoformat(str(value).strip())
+        except ValueError:
+            raise ValueError(f"Fecha no válida para '{column.key}': '{value}' (formato YYYY-MM-DD)")
+    return coerce
+
+def _passthrough(value, write):
+    return value
+
+def column_coercer(column):
+    """Conversor (valor, write) -> valor tipado de la columna; se construye la primera vez y se reutiliza."""
+    key = (column.table.name, column.key)
+    coercer = _COERCERS.get(key)
+    if coercer is None:
+        column_type = column.type
+        if isinstance(column_type, Integer):
+            coercer = _integer_coercer(column)
+        elif isinstance(column_type, Numeric):
+            coercer = _numeric_coercer(column)
+        elif isinstance(column_type, Date):
+            coercer = _date_coercer(column)
+        elif isinstance(column_type, String):
+            coercer = _string_coercer(column)
+        else:
+            coercer = _passthrough
+        _COERCERS[key] = coercer
+    return coercer
+
+def precompute_coercers(tables):
+    """Calcula al arrancar los conversores de todas las columnas de las tablas dadas."""
+    for table in tables:
+        for column in table.columns:
+            column_coercer(column)
+
+def coerce_column_value(column, value, write=False):
+    """
+    Convierte value (o cada elemento de una lista) al tipo de la columna: int para Integer,
+    Decimal para Numeric, str para String y date para Date ('YYYY-MM-DD'). Lanza ValueError si
+    no es convertible; con write, también si no cabe en la columna (longitud, dígitos).
+    None y las expresiones SQL (bindparam de una plantilla) no cambian.
+    """
+    if value is None or isinstance(value, ClauseElement):
+        return value
+    coercer = column_coercer(column)
+    if isinstance(value, list):
+        return [v if v is None or isinstance(v, ClauseElement) else coercer(v, write) for v in value]
+    return coercer(value, write)
+
+def coerce_record(Model, record):
+    """Aplica coerce_column_value (como escritura) a cada campo de un diccionario columna -> valor."""
+    columns = Model.__table__.c
+    return {key: coerce_column_value(columns[key], value, write=True) if key in columns else value for key, value in record.items()}